@@ -9,17 +9,27 @@ import requests
 import os
 import logging
 from datetime import datetime, timedelta
-from flask import Flask, jsonify, request, render_template_string, send_file
+from flask import Flask, Response, jsonify, request, render_template_string, send_file
 from flask_cors import CORS
 import urllib3
 
+# Vendored copies of the repository-root lawn_*.py modules - only api/ is deployed; CI checks they match
+from lawn_http import get_session
+from lawn_logging import configure_logging
+from lawn_cache import SingleFlightCache
+from lawn_dispatch import Outbox, OutboxDispatcher, WebhookDispatcher
+from lawn_ecowitt import EcowittParser
+from lawn_metrics import REGISTRY, cache_gauges, instrument_flask
+from lawn_storage import OUTBOX_MIGRATION, Database, migrate
+
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app)
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Configuration from environment variables
@@ -38,6 +48,15 @@ ECOWITT_CONFIG = {
     }
 }
 
+# Ecowitt readings are shared across requests for this long
+ECOWITT_CACHE_TTL = int(os.environ.get('ECOWITT_CACHE_TTL', 60))  # seconds
+ecowitt_cache = SingleFlightCache(ttl=ECOWITT_CACHE_TTL, negative_ttl=10)
+
+# Latency of outbound calls for /metrics
+ECOWITT_FETCH_SECONDS = REGISTRY.histogram('lawn_ecowitt_fetch_seconds', 'Ecowitt cloud API fetch latency', ('property',))
+RAINBIRD_CALL_SECONDS = REGISTRY.histogram('lawn_rainbird_call_seconds', 'RainBird Node.js service call latency',
+                                           ('endpoint',))
+
 # n8n Configuration
 N8N_CONFIG = {
     'webhook_url': 'https://workflows.saxtechnology.com/webhook/c5186699-f17d-42e6-a3eb-9b83d7f9d2da',
@@ -45,6 +64,19 @@ N8N_CONFIG = {
     'instance_url': 'https://workflows.saxtechnology.com'
 }
 
+# Outbound n8n events and RainBird commands are journaled in a local SQLite outbox
+OUTBOX_DB_PATH = os.environ.get('OUTBOX_DB_PATH', '/tmp/hughes_lawn_outbox.db')
+outbox = Outbox(Database(OUTBOX_DB_PATH), lease=float(os.environ.get('OUTBOX_LEASE', 120)))
+
+# Fire-and-forget n8n notifications are delivered in the background
+n8n_dispatcher = WebhookDispatcher(
+    outbox,
+    N8N_CONFIG['webhook_url'],
+    max_queue=int(os.environ.get('N8N_QUEUE_SIZE', 500)),
+    flush_interval=0,
+    timeout=5
+)
+
 # RainBird configuration with Dynamic DNS
 RAINBIRD_CONFIG = {
     'service_url': f"http://{os.environ.get('RAINBIRD_DNS', 'q0852082.eero.online')}:3000",
@@ -124,21 +156,8 @@ current_data = {
     'last_updated': None
 }
 
-def celsius_to_fahrenheit(celsius):
-    """Convert Celsius to Fahrenheit"""
-    return (celsius * 9/5) + 32
-
-def mm_to_inches(mm):
-    """Convert millimeters to inches"""
-    return mm * 0.0393701
-
-def kmh_to_mph(kmh):
-    """Convert km/h to mph"""
-    return kmh * 0.621371
-
-def mmhg_to_inhg(mmhg):
-    """Convert mmHg to inHg"""
-    return mmhg * 0.03937
+# Ecowitt channel -> zone extractor shared with the other deployments
+ecowitt_parser = EcowittParser({zone['channel']: zone_id for zone_id, zone in ZONES.items()})
 
 def get_current_season():
     """Determine current season based on month"""
@@ -154,12 +173,13 @@ def call_rainbird_service(endpoint, method='GET', data=None):
     headers = {'Content-Type': 'application/json'}
     
     try:
-        if method.upper() == 'GET':
-            response = requests.get(url, headers=headers, timeout=15)
-        elif method.upper() == 'POST':
-            response = requests.post(url, headers=headers, json=data, timeout=15)
-        else:
-            raise ValueError("Unsupported HTTP method")
+        with RAINBIRD_CALL_SECONDS.time(endpoint=endpoint):
+            if method.upper() == 'GET':
+                response = get_session('rainbird').get(url, headers=headers, timeout=15)
+            elif method.upper() == 'POST':
+                response = get_session('rainbird').post(url, headers=headers, json=data, timeout=15)
+            else:
+                raise ValueError("Unsupported HTTP method")
         
         response.raise_for_status()
         return response.json()
@@ -168,57 +188,51 @@ def call_rainbird_service(endpoint, method='GET', data=None):
         logger.error(f"RainBird service error: {e}")
         return {'status': 'offline', 'error': str(e)}
 
+# Queued irrigation commands are dropped if they could not be sent within this window
+RAINBIRD_COMMAND_TTL = int(os.environ.get('RAINBIRD_COMMAND_TTL', 300))  # seconds
+
+def deliver_rainbird_commands(events):
+    """Send queued RainBird commands from the outbox"""
+    for _, _, command, _ in events:
+        result = call_rainbird_service(command['endpoint'], 'POST', command['data'])
+        if not result or 'error' in result:
+            return 'retry', str(result)
+    return 'sent', None
+
+rainbird_dispatcher = OutboxDispatcher(outbox, 'rainbird', deliver=deliver_rainbird_commands,
+                                       poll_interval=5, max_attempts=3)
+
+def fetch_ecowitt_data():
+    """Fetch raw real-time data from the Ecowitt cloud API"""
+    with ECOWITT_FETCH_SECONDS.time(property='default'):
+        response = get_session('ecowitt').get(ECOWITT_CONFIG['url'], params=ECOWITT_CONFIG['params'], timeout=10)
+    if response.status_code == 200:
+        return response.json()
+    logger.error(f"❌ Ecowitt error: HTTP {response.status_code}")
+    return None
+
 def get_ecowitt_weather():
     """Fetch real weather data from Ecowitt API"""
     try:
-        response = requests.get(ECOWITT_CONFIG['url'], params=ECOWITT_CONFIG['params'], timeout=10)
+        data = ecowitt_cache.get(ECOWITT_CONFIG['params']['mac'], fetch_ecowitt_data)
         
-        if response.status_code == 200:
-            data = response.json()
-            
+        if data:
             if data.get('code') == 0 and 'data' in data:
-                weather_data = data['data']
-                
-                # Extract outdoor data with unit conversion
-                outdoor = weather_data.get('outdoor', {})
-                rainfall = weather_data.get('rainfall', {})
-                wind = weather_data.get('wind', {})
-                solar_and_uvi = weather_data.get('solar_and_uvi', {})
-                pressure = weather_data.get('pressure', {})
-                
-                # Convert units
-                temp_c = float(outdoor.get('temperature', {}).get('value', 20))
-                temp_f = celsius_to_fahrenheit(temp_c)
-                
-                rain_day_mm = float(rainfall.get('daily', {}).get('value', 0))
-                rain_day_in = mm_to_inches(rain_day_mm)
-                
-                rain_week_mm = float(rainfall.get('weekly', {}).get('value', 0))
-                rain_week_in = mm_to_inches(rain_week_mm)
-                
-                wind_kmh = float(wind.get('wind_speed', {}).get('value', 0))
-                wind_mph = kmh_to_mph(wind_kmh)
+                soil, weather = ecowitt_parser.parse(data)
                 
-                pressure_mmhg = float(pressure.get('absolute', {}).get('value', 760))
-                pressure_inhg = mmhg_to_inhg(pressure_mmhg)
-                
-                # Store weather data
+                # Store weather data - missing readings fall back to mild defaults
                 current_data['weather'] = {
-                    'temperature': round(temp_f, 1),
-                    'humidity': float(outdoor.get('humidity', {}).get('value', 50)),
-                    'rainfall_24h': round(rain_day_in, 2),
-                    'rainfall_week': round(rain_week_in, 2),
-                    'wind_speed': round(wind_mph, 1),
-                    'uv_index': int(solar_and_uvi.get('uvi', {}).get('value', 0)),
-                    'pressure': round(pressure_inhg, 2)
+                    'temperature': round(weather.get('temperature', 68.0), 1),
+                    'humidity': weather.get('humidity', 50.0),
+                    'rainfall_24h': round(weather.get('rain_today', 0.0), 2),
+                    'rainfall_week': round(weather.get('rain_week', 0.0), 2),
+                    'wind_speed': round(weather.get('wind_speed', 0.0), 1),
+                    'uv_index': weather.get('uvi', 0),
+                    'pressure': round(weather.get('pressure', 29.92), 2)
                 }
                 
                 # Store soil moisture data
-                for zone_key, zone_info in ZONES.items():
-                    channel = zone_info['channel']
-                    if channel in weather_data:
-                        moisture_value = float(weather_data[channel].get('humidity', {}).get('value', 30))
-                        current_data['soil_moisture'][zone_key] = moisture_value
+                current_data['soil_moisture'].update(soil)
                 
                 current_data['last_updated'] = datetime.now().isoformat()
                 logger.info(f"✅ Weather data updated: {current_data['weather']['temperature']}°F")
@@ -353,10 +367,7 @@ def rainbird_irrigate():
             'result': result
         }
         
-        try:
-            requests.post(N8N_CONFIG['webhook_url'], json=webhook_data, timeout=5)
-        except:
-            pass  # Don't fail if webhook fails
+        n8n_dispatcher.submit(webhook_data)  # Queued - don't fail or wait if the webhook is down
         
         return jsonify(result)
     except Exception as e:
@@ -398,7 +409,7 @@ def ai_analysis():
         }
         
         try:
-            response = requests.post(N8N_CONFIG['webhook_url'], json=webhook_data, timeout=10)
+            response = get_session('n8n').post(N8N_CONFIG['webhook_url'], json=webhook_data, timeout=10)
             if response.status_code == 200:
                 return jsonify(response.json())
         except Exception as e:
@@ -432,16 +443,29 @@ def n8n_webhook():
                     zone = zone_data.get('zone')
                     duration = zone_data.get('duration', 15)
                     
-                    # Trigger irrigation
-                    call_rainbird_service('start-zone', 'POST', {
-                        'zone': zone,
-                        'duration': duration
-                    })
+                    # Trigger irrigation - journaled first so a restart cannot lose the decision
+                    outbox.enqueue('rainbird', {
+                        'endpoint': 'start-zone',
+                        'data': {'zone': zone, 'duration': duration}
+                    }, ttl=RAINBIRD_COMMAND_TTL)
+            rainbird_dispatcher.start()
+            rainbird_dispatcher.wake()
         
         return jsonify({'status': 'success', 'message': 'Webhook processed'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Scrape-time gauges: cache effectiveness and queue depths
+cache_gauges({'ecowitt': ecowitt_cache})
+REGISTRY.gauge('lawn_outbox_events', 'Outbox events by topic and status',
+               lambda: [({'topic': topic, 'status': status}, count)
+                        for topic, counts in outbox.stats().items() for status, count in counts.items()])
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -451,6 +475,14 @@ def health():
         'version': '2.0-cloud'
     })
 
+# Create the outbox table (this database holds nothing else) and resume delivering anything left from the last run
+try:
+    migrate(outbox.db.connection(), [OUTBOX_MIGRATION])
+    n8n_dispatcher.start()
+    rainbird_dispatcher.start()
+except Exception as e:
+    logger.error(f"❌ Outbox initialization failed: {e}")
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8000))
     app.run(host='0.0.0.0', port=port, debug=False)
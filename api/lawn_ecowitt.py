@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Ecowitt payloads
+Table-driven parser for real_time API responses, and gateway push -> API response conversion
+"""
+
+import calendar
+import hashlib
+import logging
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+# Unit conversion functions - the API is queried in Celsius, mm, km/h and mmHg (see ECOWITT_CONFIG)
+def celsius_to_fahrenheit(celsius):
+    """Convert Celsius to Fahrenheit"""
+    return (celsius * 9/5) + 32
+
+
+def mm_to_inches(mm):
+    """Convert millimeters to inches"""
+    return mm * 0.0393701
+
+
+def kmh_to_mph(kmh):
+    """Convert km/h to mph"""
+    return kmh * 0.621371
+
+
+def mmhg_to_inhg(mmhg):
+    """Convert mmHg to inHg"""
+    return mmhg * 0.03937
+
+
+# Weather fields: (target key, paths under 'data' - first one present wins, conversion).
+# Alternate paths cover stations that report the same reading in another section.
+WEATHER_SPEC = (
+    ('temperature', (('temp_and_humidity_ch1', 'temperature'), ('outdoor', 'temperature')), celsius_to_fahrenheit),
+    ('humidity', (('temp_and_humidity_ch1', 'humidity'), ('outdoor', 'humidity')), float),
+    ('rain_today', (('rainfall', 'daily'), ('rainfall_piezo', 'daily'), ('rainfall', 'rain', 'daily')), mm_to_inches),
+    ('rain_week', (('rainfall', 'weekly'), ('rainfall_piezo', 'weekly'), ('rainfall', 'rain', 'weekly')), mm_to_inches),
+    ('wind_speed', (('wind', 'wind_speed'),), kmh_to_mph),
+    ('uvi', (('solar_and_uvi', 'uvi'),), int),
+    ('pressure', (('pressure', 'relative'), ('pressure', 'absolute')), mmhg_to_inhg)
+)
+
+# Soil probe paths; {channel} is the zone's Ecowitt channel, e.g. soil_ch14
+SOIL_PATHS = (('{channel}', 'soilmoisture'), ('{channel}', 'humidity'), ('outdoor', '{channel}', 'humidity'))
+
+
+class EcowittParser:
+    """Extractor compiled from WEATHER_SPEC and a channel -> zone map.
+
+    Paths are resolved once at construction; parsing a reading is a
+    fixed walk over the compiled fields with no per-field logging. New
+    sensors are a new WEATHER_SPEC row, not new code.
+    """
+
+    def __init__(self, soil_channels, weather_spec=WEATHER_SPEC, soil_paths=SOIL_PATHS):
+        self.weather_fields = tuple(weather_spec)
+        self.soil_fields = tuple(
+            (zone, tuple(tuple(key.format(channel=channel) for key in path) for path in soil_paths), float)
+            for channel, zone in soil_channels.items()
+        )
+
+    def parse(self, ecowitt_data):
+        """(soil, weather) from one response in a single pass - empty dicts when nothing matched"""
+        data = ecowitt_data.get('data') if ecowitt_data else None
+        if not isinstance(data, dict):
+            return {}, {}
+        soil = _extract(data, self.soil_fields)
+        weather = _extract(data, self.weather_fields)
+        logger.debug("Ecowitt reading: soil=%s weather=%s", soil, weather)
+        return soil, weather
+
+    def soil(self, ecowitt_data):
+        data = ecowitt_data.get('data') if ecowitt_data else None
+        return _extract(data, self.soil_fields) if isinstance(data, dict) else {}
+
+    def weather(self, ecowitt_data):
+        data = ecowitt_data.get('data') if ecowitt_data else None
+        return _extract(data, self.weather_fields) if isinstance(data, dict) else {}
+
+
+def _extract(data, fields):
+    values = {}
+    for target, paths, convert in fields:
+        for path in paths:
+            node = data
+            for key in path:
+                node = node.get(key) if isinstance(node, dict) else None
+                if node is None:
+                    break
+            if isinstance(node, dict):
+                node = node.get('value')
+            if node is None or node == '':
+                continue
+            try:
+                values[target] = convert(float(node))
+            except (TypeError, ValueError):
+                logger.error(f"❌ Invalid Ecowitt value for {target}: {node!r}")
+            break
+    return values
+
+
+# Gateway field -> (cloud API section, cloud API field, converter to the units ECOWITT_CONFIG requests)
+# The gateway always posts imperial units; the parser expects Celsius, mm, km/h and mmHg.
+PUSH_FIELDS = {
+    'tempf': ('outdoor', 'temperature', lambda f: (f - 32) * 5 / 9),
+    'humidity': ('outdoor', 'humidity', None),
+    'tempinf': ('indoor', 'temperature', lambda f: (f - 32) * 5 / 9),
+    'humidityin': ('indoor', 'humidity', None),
+    'temp1f': ('temp_and_humidity_ch1', 'temperature', lambda f: (f - 32) * 5 / 9),
+    'humidity1': ('temp_and_humidity_ch1', 'humidity', None),
+    'baromrelin': ('pressure', 'relative', lambda inhg: inhg * 25.4),
+    'baromabsin': ('pressure', 'absolute', lambda inhg: inhg * 25.4),
+    'windspeedmph': ('wind', 'wind_speed', lambda mph: mph * 1.609344),
+    'windgustmph': ('wind', 'wind_gust', lambda mph: mph * 1.609344),
+    'winddir': ('wind', 'wind_direction', None),
+    'solarradiation': ('solar_and_uvi', 'solar', None),
+    'uv': ('solar_and_uvi', 'uvi', None),
+    'rainratein': ('rainfall', 'rain_rate', lambda inches: inches * 25.4),
+    'eventrainin': ('rainfall', 'event', lambda inches: inches * 25.4),
+    'hourlyrainin': ('rainfall', 'hourly', lambda inches: inches * 25.4),
+    'dailyrainin': ('rainfall', 'daily', lambda inches: inches * 25.4),
+    'weeklyrainin': ('rainfall', 'weekly', lambda inches: inches * 25.4),
+    'monthlyrainin': ('rainfall', 'monthly', lambda inches: inches * 25.4),
+    'yearlyrainin': ('rainfall', 'yearly', lambda inches: inches * 25.4),
+    'rrain_piezo': ('rainfall_piezo', 'rain_rate', lambda inches: inches * 25.4),
+    'drain_piezo': ('rainfall_piezo', 'daily', lambda inches: inches * 25.4),
+    'wrain_piezo': ('rainfall_piezo', 'weekly', lambda inches: inches * 25.4)
+}
+
+# WH51 soil probes post soilmoisture1..16; the cloud API calls them soil_ch1..16
+SOIL_CHANNELS = 16
+
+
+def passkey_for(mac):
+    """PASSKEY a gateway sends with each push - MD5 of its MAC address"""
+    return hashlib.md5(mac.upper().encode()).hexdigest().upper()
+
+
+def _push_time(form):
+    """Epoch seconds of the reading; dateutc is "YYYY-MM-DD HH:MM:SS" in UTC or "now" """
+    stamp = form.get('dateutc', 'now')
+    try:
+        return calendar.timegm(datetime.strptime(stamp.replace('+', ' '), '%Y-%m-%d %H:%M:%S').timetuple())
+    except ValueError:
+        return int(time.time())
+
+
+def push_to_api_response(form):
+    """Build {'code', 'msg', 'time', 'data'} as the real_time API would return for this push"""
+    reading_time = str(_push_time(form))
+    data = {}
+
+    def put(section, field, value):
+        data.setdefault(section, {})[field] = {'time': reading_time, 'value': str(value)}
+
+    for key, (section, field, convert) in PUSH_FIELDS.items():
+        raw = form.get(key)
+        if raw in (None, ''):
+            continue
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            continue
+        put(section, field, round(convert(value), 2) if convert else raw)
+
+    for channel in range(1, SOIL_CHANNELS + 1):
+        raw = form.get(f'soilmoisture{channel}')
+        if raw not in (None, ''):
+            put(f'soil_ch{channel}', 'soilmoisture', raw)
+
+    return {'code': 0, 'msg': 'success', 'time': reading_time, 'data': data}
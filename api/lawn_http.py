@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Shared HTTP client layer
+Pooled keep-alive sessions for the Ecowitt, RainBird and n8n integrations
+"""
+
+import atexit
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Defaults for every integration - override with environment variables
+HTTP_CONFIG = {
+    'pool_connections': int(os.environ.get('HTTP_POOL_CONNECTIONS', 10)),  # Host pools kept per session
+    'pool_maxsize': int(os.environ.get('HTTP_POOL_MAXSIZE', 10)),  # Keep-alive sockets per host
+    'retries': int(os.environ.get('HTTP_RETRIES', 2)),
+    'backoff_factor': float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.5)),
+    'status_forcelist': (429, 502, 503, 504)
+}
+
+# Per-integration overrides of HTTP_CONFIG
+CLIENT_CONFIG = {
+    'ecowitt': {},
+    'rainbird': {
+        # The Node.js service talks to a single ESP-ME3 - keep the pool small
+        'pool_maxsize': int(os.environ.get('RAINBIRD_POOL_MAXSIZE', 4))
+    },
+    'n8n': {
+        # Webhook posts are not idempotent, only connection failures are retried
+        'retries': int(os.environ.get('N8N_HTTP_RETRIES', 1))
+    }
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session(name):
+    """Create a requests session with pooled adapters and a retry policy"""
+    config = dict(HTTP_CONFIG)
+    config.update(CLIENT_CONFIG.get(name, {}))
+
+    retry = Retry(
+        total=config['retries'],
+        connect=config['retries'],
+        read=config['retries'],
+        status=config['retries'],
+        backoff_factor=config['backoff_factor'],
+        status_forcelist=config['status_forcelist'],
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        raise_on_status=False  # Hand the last response back so callers can inspect status_code
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config['pool_connections'],
+        pool_maxsize=config['pool_maxsize'],
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+def get_session(name='default'):
+    """Get the shared keep-alive session for an integration (ecowitt, rainbird, n8n)"""
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _build_session(name)
+                _sessions[name] = session
+    return session
+
+
+def close_sessions():
+    """Close all pooled connections"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+atexit.register(close_sessions)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Logging
+Structured log records, per-event sampling, repeated-error rate limiting and a JSON-lines sink
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# Defaults - override with environment variables
+LOG_CONFIG = {
+    'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    'format': os.environ.get('LOG_FORMAT', 'text'),  # text or json (one JSON object per line)
+    'file': os.environ.get('LOG_FILE'),  # Log to this file instead of stderr
+    'sample_every': int(os.environ.get('LOG_SAMPLE_EVERY', 20)),  # Keep 1 in N records of a sampled event
+    'error_window': float(os.environ.get('LOG_ERROR_WINDOW', 300))  # Seconds an identical warning/error is held back
+}
+
+
+def sampled(event, **fields):
+    """extra= for a routine hot-path record - only 1 in LOG_SAMPLE_EVERY per event is written"""
+    return {'event': event, 'fields': fields, 'sample': True}
+
+
+def structured(event, **fields):
+    """extra= for a record with an event name and fields; warnings/errors repeat at most once per window"""
+    return {'event': event, 'fields': fields}
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps the first and then every Nth INFO/DEBUG record of each sampled event"""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'sample', False) or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self._counts.get(record.event, 0)
+            self._counts[record.event] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets an identical warning/error through once per window, then reports how many were held back.
+
+    Records are identical when they share an event name and fields, or
+    otherwise the same logger and message template.
+    """
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self._seen = {}  # key -> [window_end, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.window <= 0:
+            return True
+        event = getattr(record, 'event', None)
+        if event is not None:
+            key = (event, repr(sorted(getattr(record, 'fields', {}).items())))
+        else:
+            key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now < entry[0]:
+                entry[1] += 1
+                return False
+            if len(self._seen) > 1000:
+                self._seen = {k: v for k, v in self._seen.items() if v[0] > now}
+            self._seen[key] = [now + self.window, 0]
+        if entry is not None and entry[1]:
+            record.suppressed = entry[1]
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """basicConfig's layout plus event fields and suppression counts"""
+
+    def __init__(self):
+        super().__init__('%(levelname)s:%(name)s:%(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        if getattr(record, 'suppressed', 0):
+            line += f' (+{record.suppressed} identical suppressed)'
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, event, msg, fields..."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        event = getattr(record, 'event', None)
+        if event is not None:
+            entry['event'] = event
+            entry.update(getattr(record, 'fields', {}))
+        for attribute in ('sampled', 'suppressed'):
+            if getattr(record, attribute, None):
+                entry[attribute] = getattr(record, attribute)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(config=None):
+    """Install the root handler - replaces logging.basicConfig in every app"""
+    config = dict(LOG_CONFIG, **(config or {}))
+    if config['file']:
+        handler = logging.handlers.WatchedFileHandler(config['file'])
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter() if config['format'] == 'json' else TextFormatter())
+    handler.addFilter(SamplingFilter(config['sample_every']))
+    handler.addFilter(RateLimitFilter(config['error_window']))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(config['level'].upper())
+    return handler
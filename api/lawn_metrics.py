@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Metrics
+In-process counters and latency histograms rendered in the Prometheus text format
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds - Ecowitt and RainBird calls sit in the 0.1-5s range, SQLite and analysis well under 10ms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _labels(self.labelnames, key), value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """with HISTOGRAM.time(label=...): observes the block's wall time, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(series) for key, series in self._values.items()}
+        samples = []
+        for key, series in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', _labels(self.labelnames, key, [('le', _number(bound))]),
+                                cumulative))
+            samples.append((f'{self.name}_sum', _labels(self.labelnames, key), series[-2]))
+            samples.append((f'{self.name}_count', _labels(self.labelnames, key), series[-1]))
+        return samples
+
+
+class GaugeCallback:
+    """Values read at scrape time from func() - a number, or a list of (labels dict, value)"""
+    type = 'gauge'
+
+    def __init__(self, name, help, func):
+        self.name = name
+        self.help = help
+        self.func = func
+
+    def samples(self):
+        try:
+            values = self.func()
+        except Exception:
+            return []
+        if values is None:
+            return []
+        if not isinstance(values, (list, tuple)):
+            return [(self.name, '', values)]
+        return [(self.name, _labels(labels.keys(), labels.values()), value)
+                for labels, value in values if value is not None]
+
+
+class MetricsRegistry:
+    """Named metrics; asking twice for the same name returns the first one"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets)
+
+    def gauge(self, name, help, func):
+        """Register (or replace) a gauge read from func() on every scrape"""
+        with self._lock:
+            self._metrics[name] = GaugeCallback(name, help, func)
+            return self._metrics[name]
+
+    def render(self):
+        """Text exposition format 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(f'{name}{labels} {_number(value)}' for name, labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram('lawn_http_request_seconds', 'Flask request latency by route',
+                                          ('route', 'method', 'status'))
+
+
+def instrument_flask(app, registry=REGISTRY):
+    """Time every request by its URL rule (not the raw path, so ids do not explode the label set)"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=rule,
+                                         method=request.method, status=response.status_code)
+        return response
+
+    return app
+
+
+def cache_gauges(caches, registry=REGISTRY):
+    """Hit ratio and counters for {name: cache with stats()} - SingleFlightCache and LRUCache"""
+    def stat(field):
+        return lambda: [({'cache': name}, cache.stats().get(field)) for name, cache in caches.items()]
+
+    def ratio():
+        values = []
+        for name, cache in caches.items():
+            stats = cache.stats()
+            lookups = stats.get('hits', 0) + stats.get('misses', 0)
+            values.append(({'cache': name}, stats.get('hits', 0) / lookups if lookups else 0.0))
+        return values
+
+    registry.gauge('lawn_cache_hits', 'Cache hits since start', stat('hits'))
+    registry.gauge('lawn_cache_misses', 'Cache misses since start', stat('misses'))
+    registry.gauge('lawn_cache_entries', 'Entries currently cached', stat('entries'))
+    registry.gauge('lawn_cache_hit_ratio', 'Hits / (hits + misses) since start', ratio)
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - SQLite storage helpers
+Per-thread connection manager and a write-behind queue that batches
+sensor, weather, log and watering rows
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from lawn_metrics import REGISTRY
+from lawn_rollups import (RETENTION_CONFIG, ROLLUP_UPSERT, WEATHER_FIELDS, apply_retention,
+                          backfill_rollups, rollup_params)
+from lawn_tracing import span
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SECONDS = REGISTRY.histogram('lawn_sqlite_seconds', 'SQLite statement latency: read, write, or a writer batch',
+                                    ('op',))
+SENSOR_WRITER_DROPPED = REGISTRY.counter('lawn_sensor_writer_dropped_rows_total',
+                                         'Rows discarded after every sensor writer flush attempt failed')
+
+SOIL_INSERT = 'INSERT INTO sensor_data (data_source, sensor_type, sensor_value, timestamp) VALUES (?, ?, ?, ?)'
+WEATHER_INSERT = '''INSERT INTO weather_history
+                    (temperature, humidity, rain_today, rain_week, wind_speed, uvi, pressure, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+LOG_INSERT = 'INSERT INTO historical_logs (event_type, description, data, timestamp) VALUES (?, ?, ?, ?)'
+WATERING_INSERT = 'INSERT INTO watering_history (zone_id, duration_minutes, triggered_by, timestamp) VALUES (?, ?, ?, ?)'
+
+
+def sqlite_timestamp(when=None):
+    """Timestamp in the same UTC format as SQLite's CURRENT_TIMESTAMP"""
+    when = when or datetime.utcnow()
+    return when.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def configure_connection(conn, busy_timeout_ms=5000):
+    """WAL journal + NORMAL sync: readers never block the writer, no fsync per commit"""
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+    return conn
+
+
+def _add_weather_pressure(conn):
+    """Older databases were created before weather_history.pressure existed"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(weather_history)')]
+    if 'pressure' not in columns:
+        conn.execute('ALTER TABLE weather_history ADD COLUMN pressure REAL')
+
+
+# The outbox alone - also used for a separate outbox database (api/app.py)
+OUTBOX_MIGRATION = (5, 'n8n / RainBird outbox', [
+    # Times are epoch seconds so due / lease checks are plain comparisons
+    '''CREATE TABLE IF NOT EXISTS outbox
+       (id INTEGER PRIMARY KEY AUTOINCREMENT,
+        topic TEXT NOT NULL,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        coalesce_key TEXT,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        claimed_at REAL,
+        expires_at REAL,
+        last_error TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL)''',
+    # Dispatcher claims: WHERE topic = ? AND status = 'pending' AND next_attempt_at <= ?
+    'CREATE INDEX IF NOT EXISTS idx_outbox_topic_status_next ON outbox (topic, status, next_attempt_at)',
+    # Merging a submit into the event still waiting for the same coalesce key
+    "CREATE INDEX IF NOT EXISTS idx_outbox_coalesce ON outbox (topic, coalesce_key) WHERE status = 'pending'"
+])
+
+# (version, description, statements or callable) - append only, never edit a released entry
+SCHEMA_MIGRATIONS = [
+    (1, 'base tables', [
+        '''CREATE TABLE IF NOT EXISTS sensor_data
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_source TEXT,
+            sensor_type TEXT,
+            sensor_value REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS maintenance_log
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            mow_height REAL,
+            fertilizer_type TEXT,
+            fertilizer_date DATE,
+            observations TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS watering_history
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            zone_id TEXT,
+            duration_minutes INTEGER,
+            triggered_by TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS calendar_events
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date DATE,
+            event_type TEXT,
+            event_data TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS weather_history
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            temperature REAL,
+            humidity REAL,
+            rain_today REAL,
+            rain_week REAL,
+            wind_speed REAL,
+            uvi INTEGER,
+            pressure REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS historical_logs
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT,
+            description TEXT,
+            data TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'''
+    ]),
+    (2, 'weather_history.pressure', _add_weather_pressure),
+    (3, 'query indexes', [
+        # Last mow / fertilize lookups: WHERE event_type = ? ORDER BY date DESC
+        'CREATE INDEX IF NOT EXISTS idx_calendar_events_type_date ON calendar_events (event_type, date)',
+        # Month and day calendar views
+        'CREATE INDEX IF NOT EXISTS idx_calendar_events_date ON calendar_events (date)',
+        # Historical logs filtered by age, optionally by type
+        'CREATE INDEX IF NOT EXISTS idx_historical_logs_timestamp ON historical_logs (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_historical_logs_type_timestamp ON historical_logs (event_type, timestamp)',
+        # Per-zone soil series
+        'CREATE INDEX IF NOT EXISTS idx_sensor_data_type_timestamp ON sensor_data (sensor_type, timestamp)',
+        # Weather by day - queried as a timestamp range so the index is usable
+        'CREATE INDEX IF NOT EXISTS idx_weather_history_timestamp ON weather_history (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_watering_history_timestamp ON watering_history (timestamp)'
+    ]),
+    (4, 'hourly/daily sensor rollups', backfill_rollups),
+    OUTBOX_MIGRATION
+]
+
+
+def migrate(conn, migrations=SCHEMA_MIGRATIONS):
+    """Apply pending migrations in order; the schema version lives in PRAGMA user_version"""
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    for version, description, migration in migrations:
+        if version <= current:
+            continue
+        try:
+            conn.execute('BEGIN')
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in migration:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+        logger.info(f"✅ Database migrated to v{version}: {description}")
+    return current
+
+
+def day_bounds(date):
+    """[start, end) timestamp strings for a YYYY-MM-DD date, for index-friendly range filters"""
+    start = datetime.strptime(date, '%Y-%m-%d')
+    return sqlite_timestamp(start), sqlite_timestamp(start + timedelta(days=1))
+
+
+class Database:
+    """Owns one SQLite connection per thread (and per gunicorn worker process).
+
+    Connections are opened lazily, configured for WAL with a busy timeout,
+    and reused for the life of the thread so sqlite3's per-connection
+    statement cache keeps the route queries prepared.
+    """
+
+    def __init__(self, db_path, busy_timeout=5.0, cached_statements=256):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+
+    def connection(self):
+        """Get this thread's connection, reopening it after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        configure_connection(conn, busy_timeout_ms=self.busy_timeout * 1000)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def query(self, sql, params=()):
+        """Run a SELECT and return all rows (sqlite3.Row, index or key access)"""
+        with SQLITE_SECONDS.time(op='read'), span('sqlite'):
+            return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        """Run a SELECT and return the first row or None"""
+        with SQLITE_SECONDS.time(op='read'), span('sqlite'):
+            return self.connection().execute(sql, params).fetchone()
+
+    def scalar(self, sql, params=(), default=None):
+        """Run a SELECT and return the first column of the first row"""
+        row = self.query_one(sql, params)
+        return row[0] if row is not None else default
+
+    def execute(self, sql, params=()):
+        """Run one write statement in its own transaction; returns the cursor"""
+        conn = self.connection()
+        with SQLITE_SECONDS.time(op='write'), span('sqlite'), conn:
+            return conn.execute(sql, params)
+
+    def transaction(self):
+        """Context manager committing on success and rolling back on error"""
+        return self.connection()
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SensorWriter:
+    """Background writer that flushes queued rows in one transaction.
+
+    Rows are committed every `flush_interval` seconds or as soon as
+    `max_batch` rows are waiting, whichever comes first. close() (also
+    registered with atexit) drains whatever is still queued. Soil and
+    weather readings update the hourly/daily rollups in the same
+    transaction, and the retention policy runs on this thread every
+    `retention_interval` seconds so deletes never compete with a second
+    writer. A batch whose transaction fails (e.g. `database is locked`
+    past the busy timeout) is kept and retried on the next flush; it is
+    only dropped, and counted, after `max_retries` further failures.
+    """
+
+    def __init__(self, db_path, flush_interval=5.0, max_batch=200, retention_interval=None, max_retries=5):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        if retention_interval is None:
+            retention_interval = RETENTION_CONFIG['interval_seconds']
+        self.retention_interval = retention_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue()
+        self._last_readings = {}  # stream -> reading key last accepted
+        self._readings_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.rows_dropped = 0
+        self.retrying = 0  # Rows held from a failed flush
+
+    def queue_depth(self):
+        """Rows waiting for the next flush"""
+        return self._queue.qsize()
+
+    def stats(self):
+        """Write and loss counters for diagnostics"""
+        return {
+            'queue_depth': self.queue_depth(),
+            'rows_written': self.rows_written,
+            'flushes': self.flushes,
+            'failed_flushes': self.failed_flushes,
+            'retrying': self.retrying,
+            'rows_dropped': self.rows_dropped
+        }
+
+    def start(self):
+        """Start the flush thread (idempotent)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='sensor-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def is_new_reading(self, stream, reading_key):
+        """Record reading_key for stream; False if it was already ingested.
+
+        Used to skip re-inserting the same Ecowitt payload when several
+        routes extract from one cached response.
+        """
+        if reading_key is None:
+            return True
+        with self._readings_lock:
+            if self._last_readings.get(stream) == reading_key:
+                return False
+            self._last_readings[stream] = reading_key
+            return True
+
+    def submit(self, sql, params):
+        """Queue a single row for the next flush"""
+        self.start()
+        self._queue.put((sql, tuple(params), None))
+
+    def add_soil(self, zone, value, source='ecowitt', timestamp=None):
+        timestamp = timestamp or sqlite_timestamp()
+        self.submit(SOIL_INSERT, (source, f'soil_{zone}', value, timestamp))
+        for params in rollup_params(f'soil_{zone}', value, timestamp):
+            self.submit(ROLLUP_UPSERT, params)
+
+    def add_weather(self, weather, timestamp=None):
+        timestamp = timestamp or sqlite_timestamp()
+        self.submit(WEATHER_INSERT, (
+            weather.get('temperature'), weather.get('humidity'),
+            weather.get('rain_today'), weather.get('rain_week'),
+            weather.get('wind_speed'), weather.get('uvi'), weather.get('pressure'),
+            timestamp))
+        for field in WEATHER_FIELDS:
+            if weather.get(field) is not None:
+                for params in rollup_params(field, weather[field], timestamp):
+                    self.submit(ROLLUP_UPSERT, params)
+
+    def add_log(self, event_type, description, data, timestamp=None):
+        self.submit(LOG_INSERT, (event_type, description, data, timestamp or sqlite_timestamp()))
+
+    def add_watering(self, zone_id, duration_minutes, triggered_by, timestamp=None):
+        self.submit(WATERING_INSERT, (zone_id, duration_minutes, triggered_by, timestamp or sqlite_timestamp()))
+
+    def flush(self, timeout=10):
+        """Block until everything queued so far has been committed"""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put((None, None, done))
+        return done.wait(timeout)
+
+    def close(self):
+        """Stop the flush thread after draining the queue"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put((None, None, None))  # Wake the worker
+            thread.join(timeout=30)
+
+    def _run(self):
+        conn = configure_connection(sqlite3.connect(self.db_path, check_same_thread=False))
+        batch = []
+        failures = 0  # Consecutive failed flushes of the rows at the head of batch
+        waiters = []
+        deadline = time.monotonic() + self.flush_interval
+        next_retention = time.monotonic() + min(self.retention_interval, 60) if self.retention_interval else None
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    sql, params, done = self._queue.get(timeout=timeout)
+                    if sql is not None:
+                        batch.append((sql, params))
+                    elif done is not None:
+                        waiters.append(done)
+                except queue.Empty:
+                    pass
+
+                stopping = self._stop.is_set()
+                if stopping:
+                    # Drain everything that is already queued
+                    while True:
+                        try:
+                            sql, params, done = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if sql is not None:
+                            batch.append((sql, params))
+                        elif done is not None:
+                            waiters.append(done)
+
+                # After a failed flush the retry waits for the deadline, even when the batch is full
+                full = len(batch) >= self.max_batch and not failures
+                if waiters or stopping or full or time.monotonic() >= deadline:
+                    if batch:
+                        if self._write(conn, batch):
+                            batch, failures = [], 0
+                        else:
+                            failures += 1
+                            if failures > self.max_retries or stopping:
+                                logger.error(f"❌ Sensor writer gave up after {failures} attempts "
+                                             f"({len(batch)} rows dropped)")
+                                self.rows_dropped += len(batch)
+                                SENSOR_WRITER_DROPPED.inc(len(batch))
+                                batch, failures = [], 0
+                        self.retrying = len(batch)
+                    for done in waiters:
+                        done.set()
+                    waiters = []
+                    deadline = time.monotonic() + self.flush_interval
+
+                if stopping:
+                    break
+
+                if next_retention is not None and time.monotonic() >= next_retention:
+                    try:
+                        apply_retention(conn)
+                    except sqlite3.Error as e:
+                        logger.error(f"❌ Retention failed: {e}")
+                    next_retention = time.monotonic() + self.retention_interval
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        """Write one batch in a single transaction, grouped by statement; False if it was rolled back"""
+        grouped = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        try:
+            with SQLITE_SECONDS.time(op='batch'), conn:
+                for sql, rows in grouped.items():
+                    conn.executemany(sql, rows)
+            self.rows_written += len(batch)
+            self.flushes += 1
+            return True
+        except sqlite3.Error as e:
+            self.failed_flushes += 1
+            logger.error(f"❌ Sensor writer flush failed ({len(batch)} rows kept for retry): {e}")
+            return False
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Request tracing
+Per-request spans with a Server-Timing summary, exported as JSON lines to stdout or a file
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# Defaults - override with environment variables
+TRACE_CONFIG = {
+    'export': os.environ.get('TRACE_EXPORT', ''),  # '' (off), 'stdout', or a JSON-lines file path
+    'server_timing': os.environ.get('TRACE_SERVER_TIMING', '1') != '0',  # Add the Server-Timing header
+    'max_spans': int(os.environ.get('TRACE_MAX_SPANS', 500))  # Per trace - later spans are counted, not kept
+}
+
+_current = contextvars.ContextVar('lawn_span', default=None)
+_export_lock = threading.Lock()
+
+
+class Trace:
+    """All spans recorded while handling one request"""
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans = []
+        self.dropped = 0
+
+    def add(self, span):
+        if len(self.spans) < TRACE_CONFIG['max_spans']:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'started', 'start_time', 'duration', 'attributes', 'error')
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.started = time.perf_counter()
+        self.start_time = time.time()
+        self.duration = None
+        self.attributes = attributes or {}
+        self.error = None
+        trace.add(self)
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+    def to_dict(self):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start_time,
+            'duration_ms': None if self.duration is None else round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current one; a no-op outside a traced request"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_trace(name, traceparent=None, **attributes):
+    """Open a root span; returns (span, token) for finish_trace"""
+    trace_id = None
+    if traceparent:
+        # W3C traceparent: version-trace_id-parent_id-flags
+        parts = traceparent.split('-')
+        if len(parts) == 4 and len(parts[1]) == 32:
+            trace_id = parts[1]
+    root = Span(Trace(trace_id), name, attributes=attributes)
+    return root, _current.set(root)
+
+
+def finish_trace(root):
+    """Close the root span and export the trace"""
+    root.finish()
+    if TRACE_CONFIG['export']:
+        export(root.trace)
+    return root.trace
+
+
+def end_context(token):
+    """Detach the request's root span from this thread's context"""
+    try:
+        _current.reset(token)
+    except ValueError:
+        _current.set(None)  # Token from another context (e.g. a streamed response) - just clear it
+
+
+def server_timing(trace):
+    """Server-Timing header value: total time per span name, root first"""
+    totals = {}
+    for item in trace.spans:
+        if item.duration is None:
+            continue
+        name = 'total' if item.parent_id is None else item.name
+        duration, count = totals.get(name, (0.0, 0))
+        totals[name] = (duration + item.duration, count + 1)
+    entries = []
+    for name, (duration, count) in totals.items():
+        metric = ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+        entry = f'{metric};dur={duration * 1000:.1f}'
+        if count > 1:
+            entry += f';desc="{count}x"'
+        entries.append(entry)
+    return ', '.join(entries)
+
+
+def export(trace):
+    """Write the trace as one JSON line to stdout or TRACE_EXPORT"""
+    root = trace.spans[0] if trace.spans else None
+    line = json.dumps({
+        'trace_id': trace.trace_id,
+        'name': root.name if root else None,
+        'duration_ms': round(root.duration * 1000, 3) if root and root.duration is not None else None,
+        'dropped_spans': trace.dropped,
+        'spans': [item.to_dict() for item in trace.spans]
+    }, default=str)
+    try:
+        with _export_lock:
+            if TRACE_CONFIG['export'] == 'stdout':
+                sys.stdout.write(line + '\n')
+                sys.stdout.flush()
+            else:
+                with open(TRACE_CONFIG['export'], 'a') as f:
+                    f.write(line + '\n')
+    except OSError as e:
+        logger.error(f"❌ Trace export failed: {e}")
+
+
+def trace_flask(app):
+    """Root span per request, Server-Timing header on the response, export on completion"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_trace():
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        g.trace_root, g.trace_token = start_trace(f'{request.method} {rule}',
+                                                  traceparent=request.headers.get('traceparent'))
+
+    @app.after_request
+    def _finish_trace(response):
+        root = g.get('trace_root')
+        if root is not None:
+            root.attributes['status'] = response.status_code
+            trace = finish_trace(root)
+            if TRACE_CONFIG['server_timing']:
+                response.headers['Server-Timing'] = server_timing(trace)
+            response.headers['X-Trace-Id'] = trace.trace_id
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc):
+        token = g.pop('trace_token', None)
+        if token is not None:
+            end_context(token)
+
+    return app
@@ -4,7 +4,7 @@
 # import aiohttp
 import json
 import requests
-from flask import Flask, jsonify, request, render_template_string, send_file
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from datetime import datetime, timedelta
 import logging
@@ -13,16 +13,34 @@ import threading
 import time
 import os
 import random
+from functools import partial, wraps
 # from pyrainbird.async_client import CreateController
 import urllib3
+from lawn_http import get_session
+from lawn_logging import configure_logging, sampled, structured
+from lawn_analysis import LawnAI
+from lawn_assets import CLIENT_HINTS, AssetBundle, ResponsiveImage
+from lawn_cache import SingleFlightCache
+from lawn_dispatch import Outbox, OutboxDispatcher, WebhookDispatcher
+from lawn_ecowitt import push_to_api_response
+from lawn_events import EventBroker
+from lawn_maintenance import MaintenanceIndex, event_date
+from lawn_metrics import REGISTRY, cache_gauges, instrument_flask
+from lawn_rollups import WEATHER_FIELDS, daily_weather_summary, parse_history_range, query_history
+from lawn_scheduler import IngestionScheduler
+from lawn_storage import Database, SensorWriter, configure_connection, migrate, sqlite_timestamp
+from lawn_tenants import DEFAULT_PROPERTY_ID, NoRainbird, Property, PropertyRegistry, UnknownProperty
+from lawn_tracing import span, trace_flask, traced
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 app = Flask(__name__)
 CORS(app)
+instrument_flask(app)
+trace_flask(app)
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # REAL Ecowitt API Configuration
@@ -41,9 +59,47 @@ ECOWITT_CONFIG = {
     }
 }
 
+# Ecowitt readings are shared by the monitor loop and every route for this long
+ECOWITT_CACHE_TTL = int(os.environ.get('ECOWITT_CACHE_TTL', 60))  # seconds
+ecowitt_cache = SingleFlightCache(ttl=ECOWITT_CACHE_TTL, negative_ttl=10)
+
+# Latency of outbound calls for /metrics
+ECOWITT_FETCH_SECONDS = REGISTRY.histogram('lawn_ecowitt_fetch_seconds', 'Ecowitt cloud API fetch latency', ('property',))
+RAINBIRD_CALL_SECONDS = REGISTRY.histogram('lawn_rainbird_call_seconds', 'RainBird Node.js service call latency',
+                                           ('endpoint',))
+
+# SQLite database - one reused connection per thread, WAL + busy timeout
+DB_PATH = os.environ.get('DB_PATH', 'hughes_lawn_ai.db')
+db = Database(DB_PATH, busy_timeout=float(os.environ.get('DB_BUSY_TIMEOUT', 5)))
+
+# Sensor, weather, log and watering rows are written behind in batches
+sensor_writer = SensorWriter(
+    DB_PATH,
+    flush_interval=float(os.environ.get('DB_FLUSH_INTERVAL', 5)),
+    max_batch=int(os.environ.get('DB_FLUSH_ROWS', 200))
+)
+
+# Last mow / fertilizer / aeration / zone watering - loaded at startup, kept current by the routes
+maintenance_index = MaintenanceIndex()
+
 # n8n Webhook Configuration
 N8N_WEBHOOK_URL = 'https://workflows.saxtechnology.com/webhook/c5186699-f17d-42e6-a3eb-9b83d7f9d2da'
 
+# Outbound n8n events and RainBird commands are journaled in SQLite before they are sent
+outbox = Outbox(db, lease=float(os.environ.get('OUTBOX_LEASE', 120)))
+
+# n8n posts are delivered from the outbox in the background - requests never wait on the webhook
+n8n_dispatcher = WebhookDispatcher(
+    outbox,
+    N8N_WEBHOOK_URL,
+    max_queue=int(os.environ.get('N8N_QUEUE_SIZE', 500)),
+    batch_size=int(os.environ.get('N8N_BATCH_SIZE', 1)),
+    flush_interval=float(os.environ.get('N8N_FLUSH_INTERVAL', 1))
+)
+
+# Soil, weather, confidence and RainBird changes pushed to dashboards over /api/stream
+live_updates = EventBroker()
+
 # RainBird configuration - Enhanced integration with working controller
 RAINBIRD_CONFIG = {
     'service_url': 'http://localhost:3000',  # Your working Node.js service
@@ -61,26 +117,71 @@ RAINBIRD_CONFIG = {
 }
 
 # Simple direct Rainbird communication - just like your working frontend
-def call_rainbird_service(endpoint, method='get', data=None):
+def call_rainbird_service(endpoint, method='get', data=None, timeout=15, prop=None):
     """Simple direct communication with Rainbird service - no complex caching or queuing"""
-    url = f"http://localhost:3000/api/{endpoint}"
+    prop = prop or properties.default
+    if not prop.has_rainbird:
+        raise NoRainbird(prop.property_id)
+    url = f"{prop.rainbird['service_url']}/api/{endpoint}"
     headers = {'Content-Type': 'application/json'}
     
     try:
-        if method.lower() == 'get':
-            response = requests.get(url, headers=headers, timeout=15)
-        elif method.lower() == 'post':
-            response = requests.post(url, headers=headers, json=data, timeout=15)
-        else:
-            raise ValueError("Unsupported HTTP method")
+        with RAINBIRD_CALL_SECONDS.time(endpoint=endpoint), span('rainbird', endpoint=endpoint):
+            if method.lower() == 'get':
+                response = get_session('rainbird').get(url, headers=headers, timeout=timeout)
+            elif method.lower() == 'post':
+                response = get_session('rainbird').post(url, headers=headers, json=data, timeout=timeout)
+            else:
+                raise ValueError("Unsupported HTTP method")
         
         response.raise_for_status()
         return response.json()
         
     except requests.RequestException as e:
-        logger.error(f"Rainbird service error: {e}")
+        logger.error("Rainbird service error: %s", e, extra=structured('rainbird.error', endpoint=endpoint))
         raise
 
+# A journaled command still unconfirmed after the outbox lease is replayed - but never this long after it was issued
+RAINBIRD_COMMAND_TTL = int(os.environ.get('RAINBIRD_COMMAND_TTL', 300))  # seconds
+
+def run_rainbird_command(endpoint, data=None, timeout=15, prop=None):
+    """Journal a RainBird command in the outbox, send it, and record the outcome"""
+    prop = prop or properties.default
+    if not prop.has_rainbird:
+        raise NoRainbird(prop.property_id)
+    command_id = outbox.enqueue('rainbird', {'endpoint': endpoint, 'data': data, 'property_id': prop.property_id},
+                                ttl=RAINBIRD_COMMAND_TTL, claim=True)
+    try:
+        result = call_rainbird_service(endpoint, method='post', data=data, timeout=timeout, prop=prop)
+    except Exception as e:
+        outbox.mark_dead([command_id], str(e))
+        raise
+    if result and result.get('success'):
+        outbox.mark_sent([command_id])
+    else:
+        outbox.mark_dead([command_id], str(result))
+    live_updates.publish('rainbird', {'command': endpoint, 'data': data, 'success': bool(result and result.get('success')),
+                                      'status': prop.state['rainbird_status'], 'command_id': command_id},
+                         prop.property_id)
+    return result
+
+def replay_rainbird_commands(events):
+    """Send RainBird commands a previous process journaled but never confirmed"""
+    for _, _, command, _ in events:
+        logger.info(f"🔁 Replaying RainBird command {command['endpoint']} {command['data']}")
+        try:
+            prop = properties.get(command.get('property_id'))
+        except UnknownProperty:
+            return 'drop', f"unknown property {command.get('property_id')}"
+        if not prop.has_rainbird:
+            return 'drop', f"no RainBird service for {prop.property_id}"
+        result = call_rainbird_service(command['endpoint'], method='post', data=command['data'], prop=prop)
+        if not (result and result.get('success')):
+            return 'drop', str(result)
+    return 'sent', None
+
+rainbird_dispatcher = OutboxDispatcher(outbox, 'rainbird', deliver=replay_rainbird_commands, max_attempts=3)
+
 
 # NC Fertilizers
 NC_FERTILIZERS = [
@@ -132,385 +233,30 @@ current_data = {
     'rainbird_status': 'online',
     'rainbird_next_schedule': None,
     'mow_confidence': 75,
+    'analysis': None,
     'ai_analysis': '',
     'calendar_events': {},
     'forecast_data': []
 }
 
-# Unit conversion functions
-def celsius_to_fahrenheit(celsius):
-    """Convert Celsius to Fahrenheit"""
-    return (celsius * 9/5) + 32
-
-def mm_to_inches(mm):
-    """Convert millimeters to inches"""
-    return mm * 0.0393701
-
-def kmh_to_mph(kmh):
-    """Convert km/h to mph"""
-    return kmh * 0.621371
-
-def mmhg_to_inhg(mmhg):
-    """Convert mmHg to inHg"""
-    return mmhg * 0.03937
-
-# AI Analysis Class
-# AI Analysis Class
-class LawnAI:
-    def __init__(self):
-        self.zone = '7b'
-        self.location = 'Fuquay-Varina, NC 27526'
-        self.grass_type = 'TifTuf Bermuda'
-        self.target_height = '1.5-2 inches'
-    
-    def get_season(self, date):
-        """Get the current season based on date"""
-        month = date.month
-        if month in [12, 1, 2]: 
-            return "Winter"
-        elif month in [3, 4, 5]: 
-            return "Spring"
-        elif month in [6, 7, 8]: 
-            return "Summer"
-        else: 
-            return "Fall"
-    
-    def get_seasonal_advice(self, season):
-        """Get seasonal lawn care advice"""
-        advice = {
-            'Spring': "Begin fertilizing, increase mowing frequency, watch for spring dead spot",
-            'Summer': "Deep watering 2-3x weekly, maintain 1.5-2 inch height, monitor for armyworms", 
-            'Fall': "Apply fall fertilizer, overseed thin areas, continue mowing until dormancy",
-            'Winter': "Minimal maintenance, avoid heavy traffic when frozen, clean mower for storage"
-        }
-        return advice.get(season, "Monitor conditions and adjust care accordingly")
-    
-    def get_fertilizer_advice(self, month):
-        """Get month-specific fertilizer recommendations"""
-        advice = {
-            'January': "Hold off - Bermuda is dormant",
-            'February': "Late month: Apply pre-emergent crabgrass preventer", 
-            'March': "Light starter fertilizer (8-8-8) as grass greens up",
-            'April': "First major feeding (16-4-8 Bermuda Blend)",
-            'May': "Continue nitrogen feeding for growth",
-            'June': "Regular feeding with 15-0-15 Summer blend",
-            'July': "Light feeding only if needed - watch for heat stress",
-            'August': "Resume regular feeding schedule",
-            'September': "Fall fertilizer (5-10-30) for root development",
-            'October': "Last feeding of season - winterizer blend",
-            'November': "No fertilizing - prepare for dormancy",
-            'December': "Dormant season - no fertilizer needed"
-        }
-        return advice.get(month, "Adjust based on grass conditions")
-        
-    def calculate_mow_confidence(self, soil_data, weather_data):
-        """Calculate mowing confidence based on conditions"""
-        if not soil_data:
-            return 0
-            
-        # Get average moisture
-        moistures = [v for v in soil_data.values() if isinstance(v, (int, float))]
-        avg_moisture = sum(moistures) / len(moistures) if moistures else 0
-        
-        # Ideal moisture range is 30-40%
-        confidence = 100
-        
-        # Moisture penalties
-        if avg_moisture < 30:
-            confidence -= 30  # Too dry
-        elif avg_moisture <= 40:  # This covers 30-40% range
-            confidence -= 0   # Sweet Spot!
-        elif avg_moisture <= 50:  # This covers 41-50% range
-            confidence -= 15  # Moist
-        elif avg_moisture <= 60:  # This covers 51-60% range
-            confidence -= 50  # A Little Wet
-        elif avg_moisture <= 70:  # This covers 61-70% range
-            confidence -= 60  # Wet
-        else:  # Above 70%
-            confidence -= 80  # Too Wet
-        
-        # Weather penalties
-        if weather_data.get('rain_today', 0) > 0.5:
-            confidence -= 30  # Recent rain
-            
-        if weather_data.get('humidity', 0) > 80:
-            confidence -= 10  # High humidity
-            
-        if weather_data.get('temperature', 75) > 90:
-            confidence -= 20  # Hot
-        elif weather_data.get('temperature', 75) < 50:
-            confidence -= 25  # Too cold
-            
-        return max(0, min(100, confidence))
-
-    def generate_comprehensive_analysis(self, soil_data, weather_data, maintenance_data, observations):
-        """Generate AI analysis HTML with improved formatting and specific recommendations"""
-        current_date = datetime.now()
-        season = self.get_season(current_date)
-        mow_confidence = self.calculate_mow_confidence(soil_data, weather_data)
-
-        # Initialize all variables at the top
-        watering_status = "✅ Optimal"
-        rainbird_assessment = "is currently optimal"
-        weekly_water_need = 1.5
-        expected_rain = 0
-        next_mow_date = current_date + timedelta(days=5)
-        next_mow_reason = "maintaining 5-day mowing cycle"
-        
-        # Analyze soil conditions with zone comparisons
-        soil_analysis = []
-        zone_moisture = {}
-        avg_moisture = 0
-        
-        if soil_data:
-            for zone, moisture in soil_data.items():
-                if isinstance(moisture, (int, float)):
-                    zone_moisture[zone] = moisture
-                    zone_config = ZONES.get(zone, {})
-                    if moisture < 30:
-                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: TOO DRY - NEEDS WATER ({moisture:.1f}%)")
-                    elif moisture <= 40:
-                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: PERFECT MOISTURE ({moisture:.1f}%)")
-                    elif moisture <= 50:
-                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: MOIST ({moisture:.1f}%)")
-                    elif moisture <= 60:
-                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: More MOIST, may clump and make tracks ({moisture:.1f}%)")
-                    elif moisture <= 70:
-                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: WET - delay mowing ({moisture:.1f}%)")
-                    else:
-                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: TOO WET - do not mow ({moisture:.1f}%)")
-            
-            moistures = [v for v in soil_data.values() if isinstance(v, (int, float))]
-            avg_moisture = sum(moistures) / len(moistures) if moistures else 0
-        
-        # Determine if good to mow and why
-        can_mow = mow_confidence >= 60
-        mow_reason = "Excellent conditions" if can_mow else "Poor conditions"
-        
-        # Specific condition analysis
-        temp = weather_data.get('temperature', 75) if weather_data else 75
-        humidity = weather_data.get('humidity', 50) if weather_data else 50
-        rain_today = weather_data.get('rain_today', 0) if weather_data else 0
-        rain_week = weather_data.get('rain_week', 0) if weather_data else 0
-        wind = weather_data.get('wind_speed', 0) if weather_data else 0
-        uvi = weather_data.get('uvi', 5) if weather_data else 5
-
-        # Update expected rain
-        expected_rain = rain_week
-        
-        # Get last mow date from database
-        days_since_mow = 999
-        last_mow_date = None
-        try:
-            conn = sqlite3.connect('hughes_lawn_ai.db')
-            c = conn.cursor()
-            c.execute('''SELECT date FROM calendar_events 
-                        WHERE event_type = 'mow' 
-                        ORDER BY date DESC LIMIT 1''')
-            last_mow_result = c.fetchone()
-            if last_mow_result:
-                last_mow_date = datetime.strptime(last_mow_result[0], '%Y-%m-%d')
-                days_since_mow = (current_date - last_mow_date).days
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error getting last mow date: {e}")
-
-        # Build specific immediate actions
-        immediate_actions = []
-        
-        # Mowing recommendation with specifics
-        if can_mow:
-            if temp > 90:
-                immediate_actions.append(f"⚠️ Temperature is high ({int(temp)}°F) - mow early morning or evening to avoid heat stress")
-            elif days_since_mow > 7:
-                immediate_actions.append(f"🚜 It's been {days_since_mow} days since your last mow - grass may be tall, set height to 2.5\" for first pass")
-            elif days_since_mow < 5:
-                immediate_actions.append(f"⏰ Last mow was only {days_since_mow} days ago - wait until day 6 to avoid stressing the grass")
-            else:
-                immediate_actions.append("✅ Proceed with mowing at 1.5-2 inch height - conditions are optimal")
-        else:
-            # Specific reasons why not to mow
-            if rain_today > 0.5:
-                days_to_wait = 2 if rain_today > 1.0 else 1
-                immediate_actions.append(f"🌧️ Just rained {rain_today:.2f}\" today - wait {days_to_wait} days for soil to dry")
-            elif avg_moisture > 60:
-                next_good_day = "tomorrow" if avg_moisture < 70 else "2-3 days"
-                immediate_actions.append(f"💧 Soil too wet (avg {avg_moisture:.0f}%) - next good mowing day likely {next_good_day}")
-            elif temp < 50:
-                immediate_actions.append(f"🥶 Too cold ({int(temp)}°F) - wait for temperature above 55°F for healthy mowing")
-            else:
-                immediate_actions.append("❌ Conditions not optimal - check specific zone recommendations below")
-        
-        # Zone-specific comparisons
-        if zone_moisture:
-            zones_sorted = sorted(zone_moisture.items(), key=lambda x: x[1])
-            if len(zones_sorted) >= 2:
-                driest = zones_sorted[0]
-                wettest = zones_sorted[-1]
-            
-                if wettest[1] - driest[1] > 15:
-                    immediate_actions.append(f"💦 {wettest[0].replace('_', ' ').title()} is significantly wetter ({wettest[1]:.0f}%) than {driest[0].replace('_', ' ').title()} ({driest[1]:.0f}%) - adjust watering zones")
-        
-        # Specific watering recommendations
-        for zone, moisture in zone_moisture.items():
-            if moisture < 25:
-                immediate_actions.append(f"🚨 {zone.replace('_', ' ').title()} critically dry ({moisture:.0f}%) - water immediately")
-            elif moisture < 30:
-                immediate_actions.append(f"💧 {zone.replace('_', ' ').title()} needs water soon ({moisture:.0f}%)")
-            elif moisture > 70:
-                immediate_actions.append(f"⚠️ {zone.replace('_', ' ').title()} is oversaturated ({moisture:.0f}%) - skip next watering cycle")
-                
-        # Perfect conditions check
-        if all(30 <= m <= 40 for m in zone_moisture.values()):
-            immediate_actions.append("🌟 All zones are at perfect moisture levels (30-40%) - excellent lawn management!")
-        
-        # Weather-based recommendations
-        if temp > 85 and rain_week < 0.5:
-            immediate_actions.append("🌡️ Hot and dry week - consider increasing watering frequency")
-        
-        # Seasonal specific actions
-        if current_date.month in [2, 3, 9] and not any("pre-emergent" in action for action in immediate_actions):
-            immediate_actions.append("🌱 Apply pre-emergent crabgrass preventer this week")
-
-        # Calculate next optimal mow date
-        if not can_mow:
-            # Calculate when conditions will be good
-            if avg_moisture > 60:
-                days_to_dry = int((avg_moisture - 40) / 10)
-                next_mow_date = current_date + timedelta(days=days_to_dry)
-                next_mow_reason = f"allowing soil to dry to optimal moisture (currently {avg_moisture:.0f}%)"
-            elif rain_today > 0:
-                next_mow_date = current_date + timedelta(days=2)
-                next_mow_reason = "allowing 48 hours after rain for soil to dry"
-            elif temp < 55:
-                next_mow_date = current_date + timedelta(days=2)
-                next_mow_reason = "waiting for warmer temperatures"
-            else:
-                next_mow_date = current_date + timedelta(days=1)
-                next_mow_reason = "conditions should improve tomorrow"
-        else:
-            next_mow_date = current_date + timedelta(days=5)
-            next_mow_reason = "maintaining 5-day mowing cycle"
-            
-        # Analyze RainBird schedule
-        if expected_rain > 1.0:
-            rainbird_assessment = "should be reduced by 50% due to significant rainfall"
-            watering_status = "⚠️ Needs adjustment"
-        elif expected_rain > 0.5:
-            rainbird_assessment = "is optimal with current rainfall supplementing irrigation"
-            watering_status = "✅ Optimal"
-        elif avg_moisture < 30:
-            rainbird_assessment = "should be increased by 20-30% due to dry conditions"
-            watering_status = "⚠️ Needs increase"
-        elif avg_moisture > 50:
-            rainbird_assessment = "should be reduced to prevent overwatering"
-            watering_status = "⚠️ Needs reduction"
-        else:
-            rainbird_assessment = "is currently optimal for maintaining 30-40% soil moisture"
-            watering_status = "✅ Optimal"
-
-        # Build the analysis HTML - THIS IS THE COMPLETE, CLEAN VERSION
-        analysis_html = f"""
-        <div class="ai-decision">
-            <span class="decision-icon">{'✅' if can_mow else '❌'}</span>
-            <div class="decision-text">
-                <strong>Mowing Decision: {'YES - ' + mow_reason if can_mow else 'NO - ' + mow_reason}</strong>
-                <div>Confidence Level: {mow_confidence}% | Average Soil Moisture: {avg_moisture:.1f}%</div>
-            </div>
-            <div class="decision-confidence">{mow_confidence}%</div>
-        </div>
-        
-        <div class="ai-section">
-            <h3>📍 Zone Status</h3>
-            <ul style="margin: 0; padding-left: 1.5rem;">
-                {"".join(f"<li>{analysis}</li>" for analysis in soil_analysis)}
-            </ul>
-        </div>
-
-        <div class="ai-section">
-            <h3>⚡ Immediate Actions</h3>
-            <ul style="margin: 0; padding-left: 1.5rem;">
-                {"".join(f"<li>{action}</li>" for action in immediate_actions)}
-            </ul>
-        </div>
-        
-        <div class="ai-section">
-            <h3>📅 This Week's Plan</h3>
-            <p><strong>Next Optimal Mow Date:</strong> {next_mow_date.strftime('%A, %B %d')} - {next_mow_reason}. 
-            {"Ready to mow now!" if can_mow and days_since_mow >= 5 else f"Last mow was {days_since_mow} days ago." if days_since_mow < 999 else "No recent mow recorded in system."}</p>
-            
-            <p><strong>RainBird Schedule:</strong> {watering_status} - Current watering schedule {rainbird_assessment}. 
-            Target: {weekly_water_need:.1f}" per week, with {expected_rain:.1f}" expected from rainfall.</p>
-            
-            <p><strong>Current season:</strong> {season} - {self.get_seasonal_advice(season)}</p>
-        </div>
-
-        <div class="ai-section">
-            <h3>📆 {current_date.strftime('%B')} Recommendations</h3>
-            <p><strong>Fertilization:</strong> {self.get_fertilizer_advice(current_date.strftime('%B'))}</p>
-            <p><strong>Watering:</strong> Target 1-1.5 inches per week including rainfall. Water early morning (6-8 AM).</p>
-        </div>
-        
-        <div class="ai-section">
-            <h3>🌱 Bermuda Grass Health</h3>
-            <p>Maintain {self.target_height} height for golf course appearance. 
-            {"Conditions are optimal for healthy growth." if 30 <= avg_moisture <= 40 else "Adjust watering to optimize growth conditions."}</p>
-            <p><strong>Health Score:</strong> {"⭐⭐⭐⭐⭐" if 30 <= avg_moisture <= 40 else "⭐⭐⭐☆☆"}</p>
-        </div>
-        """
-        
-        # Update global confidence
-        current_data['mow_confidence'] = mow_confidence
-    
-        # Send enhanced data to n8n for additional AI processing
-        if zone_moisture and weather_data:
-            enhanced_data = {
-                'zones': zone_moisture,
-                'weather': weather_data,
-                'days_since_mow': days_since_mow,
-                'immediate_actions': immediate_actions,
-                'can_mow': can_mow,
-                'season': season
-            }
-            send_to_n8n_orchestration(zone_moisture, weather_data, mow_confidence, enhanced_data)
-        
-        return analysis_html
-    
-    def get_season(self, date):
-        month = date.month
-        if month in [12, 1, 2]: return "Winter"
-        elif month in [3, 4, 5]: return "Spring"
-        elif month in [6, 7, 8]: return "Summer"
-        else: return "Fall"
-    
-    def get_fertilizer_advice(self, month):
-        advice = {
-            'January': "Hold off - Bermuda is dormant",
-            'February': "Late month: Apply pre-emergent crabgrass preventer", 
-            'March': "Light starter fertilizer (8-8-8) as grass greens up",
-            'April': "First major feeding (16-4-8 Bermuda Blend)",
-            'May': "Continue nitrogen feeding for growth",
-            'June': "Regular feeding with 15-0-15 Summer blend",
-            'July': "Light feeding only if needed - watch for heat stress",
-            'August': "Resume regular feeding schedule",
-            'September': "Fall fertilizer (5-10-30) for root development",
-            'October': "Last feeding of season - winterizer blend",
-            'November': "No fertilizing - prepare for dormancy",
-            'December': "Dormant season - no fertilizer needed"
-        }
-        return advice.get(month, "Adjust based on grass conditions")
-    
-    def get_seasonal_advice(self, season):
-        advice = {
-            'Spring': "Begin fertilizing, increase mowing frequency, watch for spring dead spot",
-            'Summer': "Deep watering 2-3x weekly, maintain 1.5-2 inch height, monitor for armyworms", 
-            'Fall': "Apply fall fertilizer, overseed thin areas, continue mowing until dormancy",
-            'Winter': "Minimal maintenance, avoid heavy traffic when frozen, clean mower for storage"
-        }
-        return advice.get(season, "Monitor conditions and adjust care accordingly")
-
-# Initialize components
-lawn_ai = LawnAI()
+# Every lawn this process serves - the configuration above is the default property,
+# more come from PROPERTIES_FILE and share the HTTP pools, caches and outbox
+properties = PropertyRegistry()
+properties.register(Property(
+    DEFAULT_PROPERTY_ID,
+    name='Hughes Lawn',
+    ecowitt=ECOWITT_CONFIG,
+    zones=ZONES,
+    rainbird=RAINBIRD_CONFIG,
+    location='Fuquay-Varina, NC 27526',
+    hardiness_zone='7b',
+    state=current_data
+))
+properties.load_file(os.environ.get('PROPERTIES_FILE'))
+
+# Initialize components - analyses are memoized on their input fingerprint
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 128))
+lawn_ai = LawnAI(cache_size=ANALYSIS_CACHE_SIZE)
 
 # HTML Dashboard Template
 DASHBOARD_HTML = '''
@@ -1735,10 +1481,10 @@ DASHBOARD_HTML = '''
             // Load dashboard data immediately (Ecowitt only)
             updateDashboard();
             
-            // Auto-poll Ecowitt every 5 minutes for weather/soil data
-            setInterval(updateDashboard, 300000); // Every 5 minutes
+            // Live updates from the ingestion loop; poll every 5 minutes only while the stream is unavailable
+            connectLiveUpdates();
             
-            addLog('success', 'Dashboard loaded - Ecowitt polling every 5 minutes');
+            addLog('success', 'Dashboard loaded - live updates enabled');
         });
 
         // Calendar functions
@@ -1963,14 +1709,35 @@ DASHBOARD_HTML = '''
             }
         }
         
+        // One day out of the month's columnar history: {field: value} or null
+        function historyDay(history, dateKey) {
+            const index = history && history.success ? history.timestamps.indexOf(dateKey) : -1;
+            if (index < 0) return null;
+            const day = {};
+            Object.entries(history.series).forEach(([name, values]) => {
+                if (values[index] !== null) day[name] = values[index];
+            });
+            return Object.keys(day).length ? day : null;
+        }
+        
         function showHistoricalWeather(dateKey) {
             const formContent = document.getElementById('form-content');
             formContent.innerHTML = '<p>Loading weather data...</p>';
             
-            fetch(API_BASE + '/api/weather/historical/' + dateKey)
-                .then(response => response.json())
-                .then(data => {
-                    if (data.success && data.weather) {
+            // Daily buckets for the whole month in one request per kind - other days of the month
+            // revalidate the same URL with its ETag instead of fetching again
+            const month = dateKey.slice(0, 7);
+            const [year, monthNumber] = month.split('-').map(Number);
+            const lastDay = new Date(year, monthNumber, 0).getDate().toString().padStart(2, '0');
+            const range = `start=${month}-01&end=${month}-${lastDay}&resolution=day`;
+            
+            Promise.all([
+                fetch(`${API_BASE}/api/history/weather?${range}&agg=last`).then(response => response.json()),
+                fetch(`${API_BASE}/api/history/soil?${range}&agg=mean`).then(response => response.json())
+            ])
+                .then(([weatherHistory, soilHistory]) => {
+                    const data = {weather: historyDay(weatherHistory, dateKey), soil: historyDay(soilHistory, dateKey)};
+                    if (data.weather) {
                         const weather = data.weather;
                         formContent.innerHTML = `
                             <div style="background: rgba(59, 130, 246, 0.1); padding: 1.5rem; border-radius: 12px; border-left: 4px solid #3b82f6;">
@@ -2001,7 +1768,16 @@ DASHBOARD_HTML = '''
                                         ${weather.pressure ? weather.pressure.toFixed(2) + '" Hg' : 'No data'}
                                     </div>
                                 </div>
-                                ${weather.timestamp ? `<p style="margin-top: 1rem; opacity: 0.7; font-size: 0.9rem;">Recorded: ${new Date(weather.timestamp).toLocaleString()}</p>` : ''}
+                                ${data.soil ? `
+                                <h4 style="color: #3b82f6; margin: 1rem 0 0.5rem;">Average Soil Moisture</h4>
+                                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem;">
+                                    ${Object.entries(data.soil).map(([zone, value]) => `
+                                    <div>
+                                        <strong>${zone.split('_').map(word => word.charAt(0).toUpperCase() + word.slice(1)).join(' ')}:</strong><br>
+                                        ${value.toFixed(1)}%
+                                    </div>`).join('')}
+                                </div>` : ''}
+                                <p style="margin-top: 1rem; opacity: 0.7; font-size: 0.9rem;">Last reading of the day; soil is the daily mean</p>
                             </div>
                         `;
                     } else {
@@ -2361,6 +2137,51 @@ DASHBOARD_HTML = '''
                 });
         }
 
+        // Live updates (Server-Sent Events)
+        let pollTimer = null;
+        
+        function startPolling() {
+            if (!pollTimer) {
+                pollTimer = setInterval(updateDashboard, 300000); // Every 5 minutes
+            }
+        }
+        
+        function stopPolling() {
+            if (pollTimer) {
+                clearInterval(pollTimer);
+                pollTimer = null;
+            }
+        }
+        
+        function connectLiveUpdates() {
+            if (!window.EventSource) {
+                startPolling();
+                return;
+            }
+            const source = new EventSource(API_BASE + '/api/stream');
+            source.addEventListener('soil', e => updateSoilMoisture(JSON.parse(e.data)));
+            source.addEventListener('weather', e => updateWeatherDisplay(JSON.parse(e.data)));
+            source.addEventListener('confidence', e => {
+                const data = JSON.parse(e.data);
+                updateGauge(data.mow_confidence);
+                if (data.ai_analysis) {
+                    document.getElementById('ai-content').innerHTML = data.ai_analysis;
+                }
+            });
+            source.addEventListener('rainbird', e => {
+                const data = JSON.parse(e.data);
+                if (!data.success) {
+                    addLog('error', `RainBird ${data.command} failed`);
+                }
+                updateRainBirdDisplay(data);
+            });
+            // Our buffer overflowed on the server - refetch everything
+            source.addEventListener('resync', updateDashboard);
+            // The browser reconnects by itself; the stream replays current state on reconnect
+            source.onopen = stopPolling;
+            source.onerror = startPolling;
+        }
+
         // Update functions
         function updateDashboard() {
             fetch(API_BASE + '/api/dashboard/data')
@@ -3409,226 +3230,106 @@ function formatTime(seconds) {
 </html>
 '''
 
+# The dashboard has no template variables - it is split into hashed CSS/JS and compressed once, not rendered per request
+dashboard_assets = AssetBundle()
+DASHBOARD_PAGE = dashboard_assets.add_page('dashboard.html', DASHBOARD_HTML)
+dashboard_assets.register(app)
+
+# Background photo - resized JPEG/WebP variants built once, picked per request by ?w= or client hints
+grass_image = ResponsiveImage('grass.jpeg')
+
 def init_db():
-    """Initialize database with all required tables"""
-    conn = sqlite3.connect('hughes_lawn_ai.db')
-    c = conn.cursor()
-    
-    # Original tables
-    c.execute('''CREATE TABLE IF NOT EXISTS sensor_data
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  data_source TEXT,
-                  sensor_type TEXT,
-                  sensor_value REAL,
-                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS maintenance_log
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  mow_height REAL,
-                  fertilizer_type TEXT,
-                  fertilizer_date DATE,
-                  observations TEXT,
-                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS watering_history
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  zone_id TEXT,
-                  duration_minutes INTEGER,
-                  triggered_by TEXT,
-                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # New tables
-    c.execute('''CREATE TABLE IF NOT EXISTS calendar_events
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  date DATE,
-                  event_type TEXT,
-                  event_data TEXT,
-                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS weather_history
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  temperature REAL,
-                  humidity REAL,
-                  rain_today REAL,
-                  rain_week REAL,
-                  wind_speed REAL,
-                  uvi INTEGER,
-                  pressure REAL,
-                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS historical_logs
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  event_type TEXT,
-                  description TEXT,
-                  data TEXT,
-                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
-    
-    # Check if pressure column exists in weather_history and add if missing
-    c.execute("PRAGMA table_info(weather_history)")
-    columns = [column[1] for column in c.fetchall()]
-    if 'pressure' not in columns:
-        try:
-            c.execute("ALTER TABLE weather_history ADD COLUMN pressure REAL")
-            logger.info("Added pressure column to weather_history table")
-        except:
-            pass  # Column might already exist
-    
-    conn.commit()
-    conn.close()
+    """Initialize database and apply any pending schema migrations"""
+    conn = configure_connection(sqlite3.connect(DB_PATH))
+    try:
+        version = migrate(conn)
+        logger.info(f"✅ Database schema at v{version}")
+    finally:
+        conn.close()
 
-def test_ecowitt_connection():
-    """Test Ecowitt connection and get data"""
+def test_ecowitt_connection(prop=None):
+    """Get Ecowitt data - cached for ECOWITT_CACHE_TTL, concurrent callers share one fetch"""
+    prop = prop or properties.default
+    with span('ecowitt', property=prop.property_id):
+        return ecowitt_cache.get(prop.station_key, lambda: fetch_ecowitt_data(prop))
+
+def fetch_ecowitt_data(prop=None):
+    """Fetch real-time data from the Ecowitt cloud API"""
+    prop = prop or properties.default
     try:
-        logger.info("🔍 Testing Ecowitt connection...")
-        response = requests.get(ECOWITT_CONFIG['url'], params=ECOWITT_CONFIG['params'], timeout=15)
+        with ECOWITT_FETCH_SECONDS.time(property=prop.property_id), span('ecowitt_fetch'):
+            response = get_session('ecowitt').get(prop.ecowitt['url'], params=prop.ecowitt['params'], timeout=15)
         
         if response.status_code == 200:
             data = response.json()
-            logger.info("✅ Ecowitt connected successfully")
+            logger.info("✅ Ecowitt data fetched", extra=sampled('ecowitt.fetch', property=prop.property_id))
             return data
         else:
-            logger.error(f"❌ Ecowitt error: HTTP {response.status_code}")
+            logger.error("❌ Ecowitt error: HTTP %s", response.status_code,
+                         extra=structured('ecowitt.error', property=prop.property_id))
             return None
             
     except Exception as e:
-        logger.error(f"❌ Ecowitt connection failed: {e}")
+        logger.error("❌ Ecowitt connection failed: %s", e, extra=structured('ecowitt.error', property=prop.property_id))
         return None
 
-def extract_soil_data(ecowitt_data):
+@traced('extract_soil')
+def extract_soil_data(ecowitt_data, prop=None):
     """Extract soil moisture data from Ecowitt response"""
     if not ecowitt_data or 'data' not in ecowitt_data:
         return None
     
-    data = ecowitt_data['data']
-    soil_sensors = {}
-    
-    # Map sensors to zones
-    sensor_mappings = {
-        'soil_ch12': 'crepe_myrtle',
-        'soil_ch13': 'swing_set',  
-        'soil_ch14': 'front_yard'
-    }
+    prop = prop or properties.default
+    # Channels map to zones through the property's compiled parser (soil_ch14 -> front_yard, ...)
+    soil_sensors = prop.parser.soil(ecowitt_data)
+    prop.state['soil_moisture'].update(soil_sensors)
     
-    for sensor_key, zone_name in sensor_mappings.items():
-        if sensor_key in data and 'soilmoisture' in data[sensor_key]:
-            moisture_data = data[sensor_key]['soilmoisture']
-            if 'value' in moisture_data:
-                try:
-                    value = float(moisture_data['value'])
-                    soil_sensors[zone_name] = value
-                    current_data['soil_moisture'][zone_name] = value
-                    logger.info(f"✅ {zone_name}: {value}%")
-                except (ValueError, TypeError):
-                    logger.error(f"❌ Invalid value for {sensor_key}")
-    
-    # Save to database
-    if soil_sensors:
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
+    # Queue for the batched writer - a payload already ingested by another caller is skipped.
+    # The history tables hold the default property only.
+    if soil_sensors and prop is properties.default and sensor_writer.is_new_reading('soil', ecowitt_data.get('time')):
+        timestamp = sqlite_timestamp()
         for zone, value in soil_sensors.items():
-            c.execute('INSERT INTO sensor_data (data_source, sensor_type, sensor_value) VALUES (?, ?, ?)',
-                     ('ecowitt', f'soil_{zone}', value))
-        conn.commit()
-        conn.close()
+            sensor_writer.add_soil(zone, value, timestamp=timestamp)
     
+    if soil_sensors:
+        live_updates.publish('soil', soil_with_rain(prop.state), prop.property_id)
     return soil_sensors if soil_sensors else None
 
-def extract_weather_data(ecowitt_data):
-    """Enhanced weather data extraction with unit conversions"""
+@traced('extract_weather')
+def extract_weather_data(ecowitt_data, prop=None):
+    """Weather data from Ecowitt response, converted to imperial units"""
     if not ecowitt_data or 'data' not in ecowitt_data:
         return None
     
-    logger.info("🌤️ Extracting weather data...")
-    weather = {}
-    
-    # Look in data section
-    data_section = ecowitt_data.get('data', {})
-    if data_section:
-        logger.info(f"Weather data section keys: {list(data_section.keys())}")
-        
-        # Temperature and humidity from temp_and_humidity_ch1
-        temp_hum_data = data_section.get('temp_and_humidity_ch1')
-        if temp_hum_data and isinstance(temp_hum_data, dict):
-            logger.info(f"Found temp_and_humidity_ch1: {temp_hum_data}")
-            
-            # Extract temperature
-            if 'temperature' in temp_hum_data and 'value' in temp_hum_data['temperature']:
-                celsius = float(temp_hum_data['temperature']['value'])
-                weather['temperature'] = celsius_to_fahrenheit(celsius)
-                logger.info(f"✅ Temperature: {weather['temperature']}°F")
-            
-            # Extract humidity
-            if 'humidity' in temp_hum_data and 'value' in temp_hum_data['humidity']:
-                weather['humidity'] = float(temp_hum_data['humidity']['value'])
-                logger.info(f"✅ Humidity: {weather['humidity']}%")
-        
-        # Rain data extraction
-        rain_data = data_section.get('rainfall')
-        if rain_data and isinstance(rain_data, dict):
-            logger.info(f"Found rainfall data: {rain_data}")
-            if 'daily' in rain_data and 'value' in rain_data['daily']:
-                mm = float(rain_data['daily']['value'])
-                weather['rain_today'] = mm_to_inches(mm)
-                logger.info(f"✅ Rain today: {weather['rain_today']}\"")
-            
-            if 'weekly' in rain_data and 'value' in rain_data['weekly']:
-                mm = float(rain_data['weekly']['value'])
-                weather['rain_week'] = mm_to_inches(mm)
-                logger.info(f"✅ Rain this week: {weather['rain_week']}\"")
-        
-        # Wind data
-        wind_data = data_section.get('wind')
-        if wind_data and isinstance(wind_data, dict):
-            logger.info(f"Found wind data: {wind_data}")
-            if 'wind_speed' in wind_data and 'value' in wind_data['wind_speed']:
-                mph = float(wind_data['wind_speed']['value'])
-                weather['wind_speed'] = mph
-                logger.info(f"✅ Wind speed: {weather['wind_speed']} mph")
-        
-        # UV Index
-        uv_data = data_section.get('solar_and_uvi')
-        if uv_data and isinstance(uv_data, dict):
-            logger.info(f"Found solar_and_uvi data: {uv_data}")
-            if 'uvi' in uv_data and 'value' in uv_data['uvi']:
-                weather['uvi'] = int(uv_data['uvi']['value'])
-                logger.info(f"✅ UV Index: {weather['uvi']}")
-        
-        # Pressure
-        pressure_data = data_section.get('pressure')
-        if pressure_data and isinstance(pressure_data, dict):
-            logger.info(f"Found pressure data: {pressure_data}")
-            if 'relative' in pressure_data and 'value' in pressure_data['relative']:
-                mmhg = float(pressure_data['relative']['value'])
-                weather['pressure'] = mmhg_to_inhg(mmhg)
-                logger.info(f"✅ Pressure: {weather['pressure']}\" Hg")
+    prop = prop or properties.default
+    weather = prop.parser.weather(ecowitt_data)
     
-    # Update global weather data
+    # Update the property's weather data
     if weather:
-        current_data['weather'].update(weather)
+        prop.state['weather'].update(weather)
     
-    # Save to database
-    if weather:
-        try:
-            conn = sqlite3.connect('hughes_lawn_ai.db')
-            c = conn.cursor()
-            c.execute('''INSERT INTO weather_history 
-                        (temperature, humidity, rain_today, rain_week, wind_speed, uvi, pressure) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?)''',
-                     (weather.get('temperature'), weather.get('humidity'), 
-                      weather.get('rain_today'), weather.get('rain_week'),
-                      weather.get('wind_speed'), weather.get('uvi'), weather.get('pressure')))
-            conn.commit()
-            conn.close()
-            logger.info("✅ Weather data saved to database")
-        except Exception as e:
-            logger.error(f"❌ Weather database save error: {e}")
+    # Queue for the batched writer - a payload already ingested by another caller is skipped
+    if weather and prop is properties.default and sensor_writer.is_new_reading('weather', ecowitt_data.get('time')):
+        sensor_writer.add_weather(weather)
+        logger.info("✅ Weather data queued for database", extra=sampled('storage.weather'))
     
+    if weather:
+        live_updates.publish('weather', prop.state['weather'], prop.property_id)
+        # Soil status depends on rainfall, so the soil card is refreshed too
+        live_updates.publish('soil', soil_with_rain(prop.state), prop.property_id)
     return weather if weather else None
 
+def soil_with_rain(state):
+    """Soil moisture plus the rain totals the dashboard uses for zone status"""
+    soil = state['soil_moisture'].copy()
+    if state['weather']:
+        soil['rain_today'] = state['weather'].get('rain_today', 0)
+        soil['rain_week'] = state['weather'].get('rain_week', 0)
+    return soil
+
 def get_rainbird_status():
     """Get RainBird controller status from the Node.js service."""
     try:
-        logger.info("🔍 Getting RainBird status via Node.js service...")
         info = call_rainbird_service('controller-info', 'get')
         status = call_rainbird_service('zone-status', 'get')
 
@@ -3637,7 +3338,7 @@ def get_rainbird_status():
             zone_status = status.get('data', {})
             model_data = controller_info.get('model', {})
 
-            logger.info("✅ RainBird service connected successfully")
+            logger.info("✅ RainBird service connected", extra=sampled('rainbird.status'))
 
             active_zones = zone_status.get('activeZones', []) # This is a list of running zone numbers
             irrigation_active = bool(active_zones)
@@ -3656,7 +3357,7 @@ def get_rainbird_status():
             raise Exception(f"Failed to get data from Rainbird service: {error_msg}")
 
     except Exception as e:
-        logger.error(f"❌ RainBird Node.js service not responding: {e}")
+        logger.error("❌ RainBird Node.js service not responding: %s", e, extra=structured('rainbird.offline'))
         return {
             'status': 'offline',
             'connected': False,
@@ -3719,82 +3420,149 @@ def get_rainbird_schedule():
             'controller_status': {'status': 'offline', 'error': str(e)}
         }
 
-def ai_monitoring_loop():
-    """Background AI monitoring - ECOWITT ONLY"""
-    logger.info("🤖 Starting AI monitoring loop (Ecowitt only)...")
-    while True:
-        try:
-            # Get Ecowitt data ONLY
-            ecowitt_data = test_ecowitt_connection()
-            if ecowitt_data:
-                soil_data = extract_soil_data(ecowitt_data)
-                weather_data = extract_weather_data(ecowitt_data)
-                
-                if soil_data:
-                    # Run AI analysis
-                    maintenance_data = {'last_mow_height': 2.0, 'last_fertilizer_type': None}
-                    analysis = lawn_ai.generate_comprehensive_analysis(
-                        soil_data, weather_data or {}, maintenance_data, ""
-                    )
-                    current_data['ai_analysis'] = analysis
-                    logger.info(f"📊 AI Analysis updated - Mow confidence: {current_data['mow_confidence']}%")
-                    
-                    # Send to n8n for orchestration (without enhanced_data)
-                    send_to_n8n_orchestration(soil_data, weather_data, current_data['mow_confidence'])
-            
-            # NO RAINBIRD POLLING - Set status as available for manual use
-            current_data['rainbird_status'] = 'available'
-            
-            time.sleep(300)  # 5 minutes
-        except Exception as e:
-            logger.error(f"❌ Monitoring error: {e}")
-            time.sleep(300)  # 5 minutes on error
+def last_mow_date(prop):
+    """Last mow for a property - the calendar tracks the default property only"""
+    return maintenance_index.last_date('mow') if prop is properties.default else None
 
-def send_to_n8n_orchestration(soil_data, weather_data, mow_confidence, enhanced_data=None):
+def read_ecowitt_station(prop):
+    """Ingestion source - fetch the property's Ecowitt station and extract soil / weather"""
+    ecowitt_data = test_ecowitt_connection(prop)
+    if not ecowitt_data:
+        return None
+    soil_data = extract_soil_data(ecowitt_data, prop)
+    if not soil_data:
+        return None
+    return {'soil': soil_data, 'weather': extract_weather_data(ecowitt_data, prop)}
+
+def analyze_reading(prop, reading):
+    """Ingestion sink - run AI analysis; HTML is only rendered when the dashboard asks for it"""
+    analysis = lawn_ai.analyze_cached(reading['soil'], reading['weather'], last_mow_date(prop))
+    publish_analysis(analysis, prop)
+    logger.info("📊 AI Analysis updated", extra=sampled('analysis.updated', property=prop.property_id,
+                                                        mow_confidence=analysis.mow_confidence))
+
+def notify_n8n_reading(prop, reading):
+    """Ingestion sink - send to n8n for orchestration, merged with the enhanced event from analyze_reading"""
+    weather_data = reading['weather']
+    send_to_n8n_orchestration(reading['soil'], weather_data,
+                              lawn_ai.calculate_mow_confidence(reading['soil'], weather_data or {}), prop=prop)
+
+def send_to_n8n_orchestration(soil_data, weather_data, mow_confidence, enhanced_data=None, prop=None):
     """Send data to n8n for AI orchestration and scheduling"""
+    prop = prop or properties.default
     try:
+        if prop is properties.default:
+            zones_config = {
+                'front_yard': {'zones': [1, 2], 'optimal': '30-40%'},
+                'swing_set': {'zones': [4, 5], 'optimal': '30-40%'},
+                'crepe_myrtle': {'zones': [6], 'optimal': '30-40%'}
+            }
+        else:
+            zones_config = {
+                zone_id: {'zones': zone.get('rainbird_zones', []),
+                          'optimal': f"{zone.get('optimal_min', 30)}-{zone.get('optimal_max', 40)}%"}
+                for zone_id, zone in prop.zones.items()
+            }
         payload = {
             'timestamp': datetime.now().isoformat(),
-            'location': 'Fuquay-Varina, NC 27526',
-            'zone': '7b',
+            'property_id': prop.property_id,
+            'location': prop.location,
+            'zone': prop.hardiness_zone,
             'soil_moisture': soil_data,
             'weather': weather_data,
             'mow_confidence': mow_confidence,
             'analysis_request': 'schedule_optimization',
-            'zones_config': {
-                'front_yard': {'zones': [1, 2], 'optimal': '30-40%'},
-                'swing_set': {'zones': [4, 5], 'optimal': '30-40%'},
-                'crepe_myrtle': {'zones': [6], 'optimal': '30-40%'}
-            }
+            'zones_config': zones_config
         }
         
         # Add enhanced data if available
         if enhanced_data:
             payload['enhanced_analysis'] = enhanced_data
         
-        response = requests.post(N8N_WEBHOOK_URL, json=payload, timeout=10)
-        if response.status_code == 200:
-            logger.info("✅ Data sent to n8n orchestration")
-        else:
-            logger.error(f"❌ n8n webhook returned {response.status_code}")
+        # One orchestration event per property per tick - later sends merge into the queued one
+        n8n_dispatcher.submit(payload, coalesce_key=f'orchestration:{prop.property_id}')
     except Exception as e:
-        logger.error(f"❌ Failed to send to n8n: {e}")
+        logger.error(f"❌ Failed to queue n8n event: {e}")
+
+def publish_analysis(analysis, prop=None):
+    """Make a fresh Analysis current for a property and hand its decisions to n8n"""
+    prop = prop or properties.default
+    state = prop.state
+    state['mow_confidence'] = analysis.mow_confidence
+    if analysis is not state['analysis']:
+        state['analysis'] = analysis
+        state['ai_analysis'] = ''
+    publish_confidence(prop)
+
+    # Send enhanced data to n8n for additional AI processing
+    if analysis.zone_moisture and analysis.weather:
+        send_to_n8n_orchestration(analysis.zone_moisture, analysis.weather,
+                                  analysis.mow_confidence, analysis.enhanced_data(), prop=prop)
+
+def publish_confidence(prop):
+    """Push the mow confidence to live clients - the analysis HTML is only rendered when someone is listening"""
+    if live_updates.has_subscribers(prop.property_id):
+        live_updates.publish('confidence', {'mow_confidence': prop.state['mow_confidence'],
+                                            'ai_analysis': current_analysis_html(prop)}, prop.property_id)
+
+def current_analysis_html(prop=None):
+    """Dashboard HTML for a property's current analysis, rendered once per analysis"""
+    state = (prop or properties.default).state
+    if not state['ai_analysis'] and state['analysis'] is not None:
+        with span('render'):
+            state['ai_analysis'] = lawn_ai.render_html(state['analysis'])
+    return state['ai_analysis']
+
+# Background ingestion - each property's station is a fixed-rate pipeline fanned out to its consumers
+MONITOR_INTERVAL = float(os.environ.get('MONITOR_INTERVAL', 300))  # seconds
+ECOWITT_POLL_CONFIG = {
+    'rps': float(os.environ.get('ECOWITT_RPS', 1.0)),  # Shared budget for api.ecowitt.net, all stations
+    'burst': int(os.environ.get('ECOWITT_BURST', 2)),
+    'jitter': float(os.environ.get('ECOWITT_POLL_JITTER', 0.1)),  # Fraction of the interval
+    'min_interval': float(os.environ.get('ECOWITT_MIN_INTERVAL', 60)),  # While readings are changing
+    'max_interval': float(os.environ.get('ECOWITT_MAX_INTERVAL', 900))  # While readings repeat
+}
+ingestion = IngestionScheduler(max_workers=int(os.environ.get('INGEST_WORKERS', 8)))
+ingestion.add_budget('ecowitt', ECOWITT_POLL_CONFIG['rps'], burst=ECOWITT_POLL_CONFIG['burst'])
+
+def reading_change_key(reading):
+    """What counts as a new reading for polling: soil moisture to the whole percent and rainfall"""
+    weather = reading.get('weather') or {}
+    return (tuple(sorted((zone, round(value)) for zone, value in reading['soil'].items())),
+            weather.get('rain_today'), weather.get('rain_week'))
+
+def schedule_ingestion():
+    """One pipeline per property, start times spread across the interval and jittered"""
+    stations = list(properties)
+    for index, prop in enumerate(stations):
+        ingestion.add_pipeline(
+            f'ecowitt:{prop.property_id}',
+            partial(read_ecowitt_station, prop),
+            [('analysis', partial(analyze_reading, prop), 15),
+             ('n8n', partial(notify_n8n_reading, prop), 15)],
+            interval=MONITOR_INTERVAL,
+            source_timeout=30,
+            offset=MONITOR_INTERVAL * index / len(stations),
+            jitter=MONITOR_INTERVAL * ECOWITT_POLL_CONFIG['jitter'],
+            budget='ecowitt',
+            change_key=reading_change_key,
+            min_interval=min(MONITOR_INTERVAL, ECOWITT_POLL_CONFIG['min_interval']),
+            max_interval=max(MONITOR_INTERVAL, ECOWITT_POLL_CONFIG['max_interval'])
+        )
+
+schedule_ingestion()
 
 # Flask Routes
 @app.route('/')
 def index():
     """Serve the dashboard"""
-    return render_template_string(DASHBOARD_HTML)
+    return dashboard_assets.response(DASHBOARD_PAGE, headers={'Accept-CH': CLIENT_HINTS})
 
 @app.route('/grass-background')
 def grass_background():
     """Serve grass background image"""
-    # Check if grass.jpeg exists in current directory
-    if os.path.exists('grass.jpeg'):
-        return send_file('grass.jpeg', mimetype='image/jpeg')
-    else:
-        # Return a green gradient as fallback
-        return '', 404
+    # 404 when grass.jpeg is missing - the page falls back to its green gradient
+    return grass_image.response()
 
 @app.route('/api/diagnostic/test-all')
 def diagnostic_test_all():
@@ -3834,45 +3602,146 @@ def diagnostic_test_all():
     except Exception as e:
         results['rainbird'] = {'status': 'offline', 'error': str(e)}
     
+    # In-process cache effectiveness
+    results['caches'] = {
+        'ecowitt': ecowitt_cache.stats(),
+        'analysis': lawn_ai.cache.stats()
+    }
+    results['ingestion'] = ingestion.stats()
+    results['outbox'] = {
+        'events': outbox.stats(),
+        'n8n': n8n_dispatcher.stats(),
+        'rainbird': rainbird_dispatcher.stats()
+    }
+    results['sensor_writer'] = sensor_writer.stats()
+    
     return jsonify(results)
 
+# Scrape-time gauges: cache effectiveness, queue depths and ingestion lag
+cache_gauges({'ecowitt': ecowitt_cache, 'analysis': lawn_ai.cache})
+REGISTRY.gauge('lawn_outbox_events', 'Outbox events by topic and status',
+               lambda: [({'topic': topic, 'status': status}, count)
+                        for topic, counts in outbox.stats().items() for status, count in counts.items()])
+REGISTRY.gauge('lawn_sensor_writer_queue_depth', 'Rows waiting for the next sensor writer flush',
+               sensor_writer.queue_depth)
+REGISTRY.gauge('lawn_ingest_lag_seconds', 'How late each pipeline last started its source',
+               lambda: [({'pipeline': name}, stats['lag_ms'] / 1000)
+                        for name, stats in ingestion.stats().items() if name != 'budgets'])
+REGISTRY.gauge('lawn_ingest_interval_seconds', 'Current (adaptive) poll interval per pipeline',
+               lambda: [({'pipeline': name}, stats['interval'])
+                        for name, stats in ingestion.stats().items() if name != 'budgets'])
+REGISTRY.gauge('lawn_ingest_budget_queue_depth', 'Pipelines waiting for a rate budget token',
+               lambda: [({'budget': name}, stats['queue_depth'])
+                        for name, stats in ingestion.stats().get('budgets', {}).items()])
+REGISTRY.gauge('lawn_stream_clients', 'Connected live update (SSE) clients',
+               lambda: live_updates.stats()['clients'])
+REGISTRY.gauge('lawn_stream_dropped_events', 'Live update events dropped from full client buffers',
+               lambda: live_updates.stats()['dropped'])
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.errorhandler(UnknownProperty)
+def unknown_property(e):
+    return jsonify({'success': False, 'error': f'Unknown property: {e.args[0]}'}), 404
+
+@app.errorhandler(NoRainbird)
+def no_rainbird(e):
+    return jsonify({'success': False, 'error': f'No RainBird service configured for property {e.args[0]}'}), 409
+
+def rainbird_property(property_id):
+    """Property a RainBird route controls - checked before the command is journaled"""
+    prop = properties.get(property_id)
+    if not prop.has_rainbird:
+        raise NoRainbird(prop.property_id)
+    return prop
+
+def default_property_only(view):
+    """Calendar, history, log and watering tables only track the default lawn.
+
+    The routes behind this are not property scoped; a ?property_id= (or a
+    property_id in a JSON body) naming any other lawn gets a 404 instead of
+    the default lawn's data.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        body = request.get_json(silent=True) if request.is_json else None
+        property_id = request.args.get('property_id') or (body.get('property_id') if isinstance(body, dict) else None)
+        if property_id is not None and properties.get(property_id) is not properties.default:
+            return jsonify({'success': False,
+                            'error': f'{request.path} only covers the default property ({properties.default_id})'}), 404
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/properties')
+def list_properties():
+    """Lawns served by this instance"""
+    return jsonify({
+        'success': True,
+        'default': properties.default_id,
+        'properties': [prop.summary() for prop in properties]
+    })
+
 @app.route('/api/dashboard/data')
-def dashboard_data():
+@app.route('/api/properties/<property_id>/dashboard/data')
+def dashboard_data(property_id=None):
     """Get current dashboard data"""
+    prop = properties.get(property_id)
+    state = prop.state
     try:
         # Get fresh Ecowitt data if needed
-        if not current_data['soil_moisture']:
-            ecowitt_data = test_ecowitt_connection()
+        if not state['soil_moisture']:
+            ecowitt_data = test_ecowitt_connection(prop)
             if ecowitt_data:
-                extract_soil_data(ecowitt_data)
-                extract_weather_data(ecowitt_data)
-        
-        # Include rain data with soil moisture for status calculation
-        soil_with_rain = current_data['soil_moisture'].copy()
-        if current_data['weather']:
-            soil_with_rain['rain_today'] = current_data['weather'].get('rain_today', 0)
-            soil_with_rain['rain_week'] = current_data['weather'].get('rain_week', 0)
+                extract_soil_data(ecowitt_data, prop)
+                extract_weather_data(ecowitt_data, prop)
         
         return jsonify({
             'success': True,
-            'soil_moisture': soil_with_rain,
-            'weather': current_data['weather'],
-            'mow_confidence': current_data['mow_confidence'],
-            'ai_analysis': current_data['ai_analysis'] or '<div class="ai-section"><p>No analysis available yet - waiting for sensor data</p></div>',
-            'rainbird_status': current_data['rainbird_status'],
-            'forecast_data': current_data.get('forecast_data', [])
+            'property_id': prop.property_id,
+            # Include rain data with soil moisture for status calculation
+            'soil_moisture': soil_with_rain(state),
+            'weather': state['weather'],
+            'mow_confidence': state['mow_confidence'],
+            'ai_analysis': current_analysis_html(prop) or '<div class="ai-section"><p>No analysis available yet - waiting for sensor data</p></div>',
+            'rainbird_status': state['rainbird_status'],
+            'forecast_data': state.get('forecast_data', [])
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/stream')
+@app.route('/api/properties/<property_id>/stream')
+def live_stream(property_id=None):
+    """Server-Sent Events: current state on connect, then changes as ingestion produces them"""
+    prop = properties.get(property_id)
+    subscription = live_updates.subscribe(prop.property_id)
+    if subscription is None:
+        return jsonify({'success': False, 'error': 'Too many live update clients'}), 503
+
+    def snapshot():
+        state = prop.state
+        events = [('soil', soil_with_rain(state)), ('weather', state['weather'])]
+        if state['analysis'] is not None or state['ai_analysis']:
+            events.append(('confidence', {'mow_confidence': state['mow_confidence'],
+                                          'ai_analysis': current_analysis_html(prop)}))
+        return events
+
+    return Response(live_updates.stream(subscription, snapshot), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/ai/comprehensive-analysis')
-def comprehensive_ai_analysis():
+@app.route('/api/properties/<property_id>/ai/comprehensive-analysis')
+def comprehensive_ai_analysis(property_id=None):
     """Run comprehensive AI analysis"""
+    prop = properties.get(property_id)
     try:
         # Get fresh data
-        ecowitt_data = test_ecowitt_connection()
-        soil_data = extract_soil_data(ecowitt_data) if ecowitt_data else current_data['soil_moisture']
-        weather_data = extract_weather_data(ecowitt_data) if ecowitt_data else current_data['weather']
+        ecowitt_data = test_ecowitt_connection(prop)
+        soil_data = extract_soil_data(ecowitt_data, prop) if ecowitt_data else prop.state['soil_moisture']
+        weather_data = extract_weather_data(ecowitt_data, prop) if ecowitt_data else prop.state['weather']
         
         # Get maintenance data
         maintenance_data = {
@@ -3889,21 +3758,25 @@ def comprehensive_ai_analysis():
             })
         
         # Generate comprehensive AI analysis
-        analysis = lawn_ai.generate_comprehensive_analysis(
-            soil_data, weather_data or {}, maintenance_data, maintenance_data['last_observations']
-        )
-        
-        current_data['ai_analysis'] = analysis
+        analysis = lawn_ai.analyze_cached(soil_data, weather_data, last_mow_date(prop))
+        publish_analysis(analysis, prop)
         
         logger.info("✅ Comprehensive AI analysis completed")
         
+        # ?format=json returns the decisions without rendering HTML
+        if request.args.get('format') == 'json':
+            analysis_body = analysis.to_dict()
+        else:
+            analysis_body = current_analysis_html(prop)
+        
         return jsonify({
             'success': True,
-            'analysis': analysis,
+            'property_id': prop.property_id,
+            'analysis': analysis_body,
             'soil_data': soil_data,
             'weather_data': weather_data,
             'maintenance_data': maintenance_data,
-            'mow_confidence': current_data['mow_confidence'],
+            'mow_confidence': prop.state['mow_confidence'],
             'timestamp': datetime.now().isoformat()
         })
         
@@ -3911,19 +3784,42 @@ def comprehensive_ai_analysis():
         logger.error(f"❌ Comprehensive AI analysis failed: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/ecowitt/push', methods=['POST'])
+@app.route('/api/properties/<property_id>/ecowitt/push', methods=['POST'])
+def ecowitt_push(property_id=None):
+    """Receive a gateway's customized upload (Ecowitt protocol) - same extraction and pipeline as polling"""
+    form = request.form.to_dict()
+    if property_id is None:
+        prop = properties.by_passkey(form.get('PASSKEY'))
+    else:
+        prop = properties.get(property_id)
+        if prop.passkey and form.get('PASSKEY', '').upper() != prop.passkey:
+            return jsonify({'success': False, 'error': 'PASSKEY does not match this property'}), 403
+    
+    ecowitt_data = push_to_api_response(form)
+    # Callers of test_ecowitt_connection get the pushed reading instead of a cloud round trip
+    ecowitt_cache.put(prop.station_key, ecowitt_data)
+    soil_data = extract_soil_data(ecowitt_data, prop)
+    if not soil_data:
+        return jsonify({'success': False, 'error': 'No configured soil moisture channels in push'}), 400
+    
+    reading = {'soil': soil_data, 'weather': extract_weather_data(ecowitt_data, prop)}
+    if not ingestion.push(f'ecowitt:{prop.property_id}', reading):
+        analyze_reading(prop, reading)
+    return jsonify({'success': True, 'property_id': prop.property_id})
+
 @app.route('/api/calendar/event', methods=['POST'])
+@default_property_only
 def save_calendar_event():
     """Save calendar event"""
     try:
         data = request.get_json()
-        date = data.get('date')
         event_type = data.get('event_type')
         event_data = json.dumps(data.get('data', {}))
-        
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
-        c.execute('INSERT INTO calendar_events (date, event_type, event_data) VALUES (?, ?, ?)',
-                 (date, event_type, event_data))
+        try:
+            date = event_date(data.get('date'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'date must be YYYY-MM-DD'}), 400
         
         # Also log to historical logs
         description = f"{event_type.title()} event recorded"
@@ -3934,11 +3830,12 @@ def save_calendar_event():
             fert_data = data.get('data', {})
             description = f"Applied {fert_data.get('brand', '')} {fert_data.get('npk', '')} fertilizer"
         
-        c.execute('INSERT INTO historical_logs (event_type, description, data) VALUES (?, ?, ?)',
-                 (event_type, description, event_data))
-        
-        conn.commit()
-        conn.close()
+        with db.transaction() as conn:
+            conn.execute('INSERT INTO calendar_events (date, event_type, event_data) VALUES (?, ?, ?)',
+                         (date, event_type, event_data))
+            conn.execute('INSERT INTO historical_logs (event_type, description, data) VALUES (?, ?, ?)',
+                         (event_type, description, event_data))
+        maintenance_index.record_event(event_type, date, event_data)
         
         logger.info(f"✅ Calendar event saved: {event_type} on {date}")
         return jsonify({'success': True})
@@ -3948,23 +3845,21 @@ def save_calendar_event():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/calendar/month/<int:year>/<int:month>')
+@default_property_only
 def get_calendar_month(year, month):
     """Get calendar events for a month"""
     try:
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
-        
         # Get events for the month
         start_date = f"{year}-{month:02d}-01"
         end_date = f"{year}-{month:02d}-31"
         
-        c.execute('''SELECT date, event_type, event_data 
-                    FROM calendar_events 
-                    WHERE date >= ? AND date <= ?''',
-                 (start_date, end_date))
+        rows = db.query('''SELECT date, event_type, event_data 
+                           FROM calendar_events 
+                           WHERE date >= ? AND date <= ?''',
+                        (start_date, end_date))
         
         events = {}
-        for row in c.fetchall():
+        for row in rows:
             date = row[0]
             if date not in events:
                 events[date] = {}
@@ -3977,8 +3872,6 @@ def get_calendar_month(year, month):
             elif event_type == 'maintenance':
                 events[date]['maintenance'] = True
         
-        conn.close()
-        
         return jsonify({
             'success': True,
             'events': events
@@ -3989,36 +3882,32 @@ def get_calendar_month(year, month):
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/logs/historical')
+@default_property_only
 def get_historical_logs():
     """Get historical logs with filtering"""
     try:
         log_type = request.args.get('type', 'all')
         days = int(request.args.get('days', 30))
         
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
-        
         query = '''SELECT event_type, description, timestamp 
                   FROM historical_logs 
-                  WHERE timestamp >= datetime('now', '-{} days')'''.format(days)
+                  WHERE timestamp >= datetime('now', ?)'''
+        params = [f'-{days} days']
         
         if log_type != 'all':
-            query += f" AND event_type = '{log_type}'"
+            query += " AND event_type = ?"
+            params.append(log_type)
         
         query += " ORDER BY timestamp DESC LIMIT 100"
         
-        c.execute(query)
-        
         logs = []
-        for row in c.fetchall():
+        for row in db.query(query, params):
             logs.append({
                 'event_type': row[0],
                 'description': row[1],
                 'timestamp': row[2]
             })
         
-        conn.close()
-        
         return jsonify({
             'success': True,
             'logs': logs
@@ -4047,19 +3936,17 @@ def stop_systems():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/calendar/day/<date>')
+@default_property_only
 def get_calendar_day_events(date):
     """Get events for a specific day"""
     try:
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
-        
-        c.execute('''SELECT id, event_type, event_data, timestamp 
-                    FROM calendar_events 
-                    WHERE date = ? 
-                    ORDER BY timestamp DESC''', (date,))
+        rows = db.query('''SELECT id, event_type, event_data, timestamp 
+                           FROM calendar_events 
+                           WHERE date = ? 
+                           ORDER BY timestamp DESC''', (date,))
         
         events = []
-        for row in c.fetchall():
+        for row in rows:
             events.append({
                 'id': row[0],
                 'event_type': row[1],
@@ -4067,8 +3954,6 @@ def get_calendar_day_events(date):
                 'timestamp': row[3]
             })
         
-        conn.close()
-        
         return jsonify({
             'success': True,
             'events': events
@@ -4079,22 +3964,21 @@ def get_calendar_day_events(date):
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/calendar/event/<int:event_id>', methods=['DELETE'])
+@default_property_only
 def delete_calendar_event(event_id):
     """Delete a calendar event"""
     try:
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
+        event = db.query_one('SELECT event_type, date, event_data FROM calendar_events WHERE id = ?', (event_id,))
         
         # Delete the event
-        c.execute('DELETE FROM calendar_events WHERE id = ?', (event_id,))
+        c = db.execute('DELETE FROM calendar_events WHERE id = ?', (event_id,))
         
         if c.rowcount > 0:
-            conn.commit()
-            conn.close()
+            if event:
+                maintenance_index.remove_event(db, event['event_type'], event['date'], event['event_data'])
             logger.info(f"✅ Calendar event {event_id} deleted")
             return jsonify({'success': True})
         else:
-            conn.close()
             return jsonify({'success': False, 'error': 'Event not found'})
         
     except Exception as e:
@@ -4102,39 +3986,19 @@ def delete_calendar_event(event_id):
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/weather/historical/<date>')
+@default_property_only
 def get_historical_weather(date):
     """Get historical weather data for a specific date"""
     try:
-        conn = sqlite3.connect('hughes_lawn_ai.db')
-        c = conn.cursor()
+        # Daily rollup: last reading of the day plus min/max/mean per field
+        weather = daily_weather_summary(db, date)
         
-        # Get weather data for the specific date
-        c.execute('''SELECT temperature, humidity, rain_today, rain_week, wind_speed, uvi, pressure, timestamp 
-                    FROM weather_history 
-                    WHERE DATE(timestamp) = ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT 1''', (date,))
-        
-        row = c.fetchone()
-        if row:
-            weather = {
-                'temperature': row[0],
-                'humidity': row[1],
-                'rain_today': row[2],
-                'rain_week': row[3],
-                'wind_speed': row[4],
-                'uvi': row[5],
-                'pressure': row[6],
-                'timestamp': row[7]
-            }
-            
-            conn.close()
+        if weather:
             return jsonify({
                 'success': True,
                 'weather': weather
             })
         else:
-            conn.close()
             return jsonify({
                 'success': False,
                 'error': 'No weather data found for this date'
@@ -4144,9 +4008,52 @@ def get_historical_weather(date):
         logger.error(f"❌ Failed to get historical weather: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+def history_response(kind, series, labels):
+    """Columnar history for ?start=&end=&resolution=&agg=, with ETag revalidation"""
+    try:
+        start, end = parse_history_range(request.args.get('start'), request.args.get('end'))
+        result = query_history(db, kind, series, start, end,
+                               resolution=request.args.get('resolution', 'hour'),
+                               agg=request.args.get('agg', 'mean'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"❌ Failed to get {kind} history: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
+    response = jsonify({
+        'success': True,
+        'start': start,
+        'end': end,
+        'resolution': request.args.get('resolution', 'hour'),
+        'agg': request.args.get('agg', 'mean'),
+        'timestamps': result['timestamps'],
+        'series': {labels.get(name, name): values for name, values in result['series'].items()}
+    })
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+@app.route('/api/history/soil')
+@default_property_only
+def get_soil_history():
+    """Soil moisture series per zone, bucketed and aggregated in SQL"""
+    series = [f'soil_{zone}' for zone in ZONES]
+    return history_response('soil', series, {f'soil_{zone}': zone for zone in ZONES})
+
+@app.route('/api/history/weather')
+@default_property_only
+def get_weather_history():
+    """Weather series per field (?fields=temperature,humidity), bucketed and aggregated in SQL"""
+    fields = request.args.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else WEATHER_FIELDS
+    return history_response('weather', fields, {})
+
 @app.route('/api/rainbird/start-zone', methods=['POST'])
-def start_rainbird_zone():
+@app.route('/api/properties/<property_id>/rainbird/start-zone', methods=['POST'])
+def start_rainbird_zone(property_id=None):
     """Start RainBird zone via Node.js service"""
+    prop = rainbird_property(property_id)
     try:
         data = request.get_json()
         zone = data.get('zone')
@@ -4157,7 +4064,7 @@ def start_rainbird_zone():
             return jsonify({'success': False, 'error': 'Zone must be between 1 and 7'}), 400
 
         logger.info(f"▶️ Request to start RainBird zone {zone} for {duration_minutes} minutes via Node.js service...")
-        result = call_rainbird_service('start-zone', method='post', data={'zone': zone, 'duration': duration_minutes})
+        result = run_rainbird_command('start-zone', {'zone': zone, 'duration': duration_minutes}, prop=prop)
 
         if result and result.get('success'):
             logger.info(f"✅ RainBird zone {zone} started successfully.")
@@ -4172,11 +4079,13 @@ def start_rainbird_zone():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/rainbird/stop-all', methods=['POST'])
-def stop_all_rainbird_zones():
+@app.route('/api/properties/<property_id>/rainbird/stop-all', methods=['POST'])
+def stop_all_rainbird_zones(property_id=None):
     """Stop all RainBird zones via Node.js service"""
+    prop = rainbird_property(property_id)
     try:
         logger.info("⛔ Request to stop all RainBird zones via Node.js service...")
-        result = call_rainbird_service('stop-zone', method='post')
+        result = run_rainbird_command('stop-zone', prop=prop)
 
         if result and result.get('success'):
             logger.info("✅ All RainBird zones stopped successfully.")
@@ -4191,8 +4100,10 @@ def stop_all_rainbird_zones():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/rainbird/test-zone', methods=['POST'])
-def test_rainbird_zone():
+@app.route('/api/properties/<property_id>/rainbird/test-zone', methods=['POST'])
+def test_rainbird_zone(property_id=None):
     """Test RainBird zone via Node.js service by running for 2 minutes"""
+    prop = rainbird_property(property_id)
     try:
         data = request.get_json()
         zone = data.get('zone')
@@ -4202,7 +4113,7 @@ def test_rainbird_zone():
 
         duration_minutes = 2
         logger.info(f"🔍 Request to test RainBird zone {zone} for {duration_minutes} minutes via Node.js service...")
-        result = call_rainbird_service('start-zone', method='post', data={'zone': zone, 'duration': duration_minutes})
+        result = run_rainbird_command('start-zone', {'zone': zone, 'duration': duration_minutes}, prop=prop)
 
         if result and result.get('success'):
             logger.info(f"✅ RainBird zone {zone} test started successfully.")
@@ -4221,6 +4132,7 @@ def test_rainbird_zone():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/rainbird/zones')
+@default_property_only
 def get_rainbird_zones():
     """Get RainBird zones status and configuration from Node.js service"""
     try:
@@ -4251,8 +4163,10 @@ def get_rainbird_zones():
 
 
 @app.route('/api/rainbird/zone/<int:zone_id>/start', methods=['POST'])
-def start_specific_rainbird_zone(zone_id):
+@app.route('/api/properties/<property_id>/rainbird/zone/<int:zone_id>/start', methods=['POST'])
+def start_specific_rainbird_zone(zone_id, property_id=None):
     """Start a specific RainBird zone via direct API call - SIMPLIFIED"""
+    prop = rainbird_property(property_id)
     try:
         data = request.get_json()
         seconds = data.get('seconds', 900)  # Default 15 minutes
@@ -4263,27 +4177,21 @@ def start_specific_rainbird_zone(zone_id):
 
         logger.info(f"▶️ Starting RainBird zone {zone_id} for {minutes} minutes - DIRECT API CALL")
         
-        # Use direct requests instead of complex queue system
-        url = 'http://localhost:3000/api/start-zone'
+        # Direct call over the shared RainBird session, journaled in the outbox
         payload = {'zone': zone_id, 'duration': minutes}
-        
-        response = requests.post(url, json=payload, timeout=45)
-        result = response.json()
+        result = run_rainbird_command('start-zone', payload, timeout=45, prop=prop)
         
         if result and result.get('success'):
             zone_name = RAINBIRD_ZONE_NAMES.get(zone_id, f"Zone {zone_id}")
             
-            # Log to historical logs
-            try:
-                conn = sqlite3.connect('hughes_lawn_ai.db')
-                c = conn.cursor()
-                c.execute('INSERT INTO historical_logs (event_type, description, data) VALUES (?, ?, ?)',
-                         ('watering', f'Manual watering: {zone_name} for {minutes} minutes', 
-                          json.dumps({'zone': zone_id, 'duration_minutes': minutes, 'method': 'manual'})))
-                conn.commit()
-                conn.close()
-            except:
-                pass  # Don't fail if logging fails
+            # Log to historical logs and watering history - these tables track the default lawn
+            if prop is properties.default:
+                timestamp = sqlite_timestamp()
+                sensor_writer.add_log('watering', f'Manual watering: {zone_name} for {minutes} minutes',
+                                      json.dumps({'zone': zone_id, 'duration_minutes': minutes, 'method': 'manual'}),
+                                      timestamp=timestamp)
+                sensor_writer.add_watering(f'zone_{zone_id}', minutes, 'manual', timestamp=timestamp)
+                maintenance_index.record_watering(zone_id, timestamp)
             
             logger.info(f"✅ RainBird zone {zone_id} ({zone_name}) started for {minutes} minutes")
             return jsonify({
@@ -4314,13 +4222,18 @@ def n8n_webhook():
     """Receive data from n8n workflow"""
     try:
         data = request.get_json()
+        prop = properties.get(data.get('property_id'))
+        state = prop.state
         
         # Process n8n data
         if 'ai_analysis' in data:
-            current_data['ai_analysis'] = data['ai_analysis']
+            state['ai_analysis'] = data['ai_analysis']
         
         if 'mow_confidence' in data:
-            current_data['mow_confidence'] = data['mow_confidence']
+            state['mow_confidence'] = data['mow_confidence']
+        
+        if 'ai_analysis' in data or 'mow_confidence' in data:
+            publish_confidence(prop)
         
         if 'schedule_adjustment' in data:
             # Handle RainBird schedule adjustments from n8n
@@ -4329,27 +4242,23 @@ def n8n_webhook():
         # Handle smart irrigation decisions from n8n
         if 'irrigation_command' in data:
             command = data['irrigation_command']
-            if command.get('action') == 'start_watering':
+            if command.get('action') == 'start_watering' and prop is properties.default:
                 zones = command.get('zones', [])
                 duration = command.get('duration', 15)
                 
                 # Log the watering event
-                conn = sqlite3.connect('hughes_lawn_ai.db')
-                c = conn.cursor()
+                timestamp = sqlite_timestamp()
                 for zone in zones:
-                    c.execute('INSERT INTO watering_history (zone_id, duration_minutes, triggered_by) VALUES (?, ?, ?)',
-                             (f'zone_{zone}', duration, 'n8n_ai_automation'))
+                    sensor_writer.add_watering(f'zone_{zone}', duration, 'n8n_ai_automation', timestamp=timestamp)
+                    maintenance_index.record_watering(zone, timestamp)
+                sensor_writer.add_log('watering', f'Auto-watering activated for zones {zones} for {duration} minutes',
+                                      json.dumps(command))
                 
-                # Add to calendar
+                # Add to calendar right away so the dashboard shows it
                 today = datetime.now().strftime('%Y-%m-%d')
-                c.execute('INSERT INTO calendar_events (date, event_type, event_data) VALUES (?, ?, ?)',
-                         (today, 'watering', json.dumps({'zones': zones, 'duration': duration, 'auto': True})))
-                
-                c.execute('INSERT INTO historical_logs (event_type, description, data) VALUES (?, ?, ?)',
-                         ('watering', f'Auto-watering activated for zones {zones} for {duration} minutes', json.dumps(command)))
-                
-                conn.commit()
-                conn.close()
+                db.execute('INSERT INTO calendar_events (date, event_type, event_data) VALUES (?, ?, ?)',
+                           (today, 'watering', json.dumps({'zones': zones, 'duration': duration, 'auto': True})))
+                maintenance_index.record_event('watering', today)
                 
                 logger.info(f"✅ Auto-watering executed: Zones {zones} for {duration} minutes")
         
@@ -4362,6 +4271,16 @@ def n8n_webhook():
 
 # Initialize database
 init_db()
+maintenance_index.load(db)
+sensor_writer.start()
+n8n_dispatcher.start()
+rainbird_dispatcher.start()
+
+# AI monitoring starts at import so every gunicorn worker runs it, not just `python hughes_lawn_ai.py`.
+# NO RAINBIRD POLLING - status stays available for manual use. start() is a no-op while the loop is running.
+for prop in properties:
+    prop.state['rainbird_status'] = 'available'
+ingestion.start()
 
 if __name__ == '__main__':
     print("=" * 80)
@@ -4403,9 +4322,5 @@ if __name__ == '__main__':
     print("🤖 Starting AI monitoring loop...")
     print("=" * 80)
     
-    # Start AI monitoring in background thread
-    ai_thread = threading.Thread(target=ai_monitoring_loop, daemon=True)
-    ai_thread.start()
-    
     # Start Flask server
     app.run(host='0.0.0.0', port=8000, debug=False)
\ No newline at end of file
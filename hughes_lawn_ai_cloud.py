@@ -14,6 +14,10 @@ import sqlite3
 import os
 import random
 import urllib3
+from lawn_http import get_session
+from lawn_logging import configure_logging
+from lawn_cache import SingleFlightCache
+from lawn_ecowitt import EcowittParser
 
 # Disable SSL warnings for self-signed certificates
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -21,7 +25,7 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 app = Flask(__name__)
 CORS(app)
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # REAL Ecowitt API Configuration
@@ -60,6 +64,10 @@ RAINBIRD_CONFIG = {
     }
 }
 
+# Ecowitt readings are shared across requests for this long
+ECOWITT_CACHE_TTL = int(os.environ.get('ECOWITT_CACHE_TTL', 60))  # seconds
+ecowitt_cache = SingleFlightCache(ttl=ECOWITT_CACHE_TTL, negative_ttl=10)
+
 # Database path for Azure - use temp directory
 DB_PATH = os.environ.get('DATABASE_PATH', '/tmp/hughes_lawn_ai.db')
 
@@ -71,9 +79,9 @@ def call_rainbird_service(endpoint, method='get', data=None):
     
     try:
         if method.lower() == 'get':
-            response = requests.get(url, headers=headers, timeout=15)
+            response = get_session('rainbird').get(url, headers=headers, timeout=15)
         elif method.lower() == 'post':
-            response = requests.post(url, headers=headers, json=data, timeout=15)
+            response = get_session('rainbird').post(url, headers=headers, json=data, timeout=15)
         else:
             raise ValueError("Unsupported HTTP method")
         
@@ -140,22 +148,8 @@ current_data = {
     'forecast_data': []
 }
 
-# Unit conversion functions
-def celsius_to_fahrenheit(celsius):
-    """Convert Celsius to Fahrenheit"""
-    return (celsius * 9/5) + 32
-
-def mm_to_inches(mm):
-    """Convert millimeters to inches"""
-    return mm * 0.0393701
-
-def kmh_to_mph(kmh):
-    """Convert km/h to mph"""
-    return kmh * 0.621371
-
-def mmhg_to_inhg(mmhg):
-    """Convert mmHg to inHg"""
-    return mmhg * 0.03937
+# Ecowitt channel -> zone extractor shared with the other deployments
+ecowitt_parser = EcowittParser({zone['channel']: zone_id for zone_id, zone in ZONES.items()})
 
 # Initialize database
 def init_db():
@@ -210,57 +204,36 @@ def init_db():
     conn.close()
 
 # Get weather data from Ecowitt
+def fetch_ecowitt_data():
+    """Fetch raw real-time data from the Ecowitt cloud API"""
+    response = get_session('ecowitt').get(ECOWITT_CONFIG['url'], params=ECOWITT_CONFIG['params'], timeout=10)
+    if response.status_code == 200:
+        return response.json()
+    logger.error(f"❌ Ecowitt error: HTTP {response.status_code}")
+    return None
+
 def get_ecowitt_weather():
     """Fetch real weather data from Ecowitt API"""
     try:
-        response = requests.get(ECOWITT_CONFIG['url'], params=ECOWITT_CONFIG['params'], timeout=10)
+        data = ecowitt_cache.get(ECOWITT_CONFIG['params']['mac'], fetch_ecowitt_data)
         
-        if response.status_code == 200:
-            data = response.json()
-            
+        if data:
             if data.get('code') == 0 and 'data' in data:
-                weather_data = data['data']
-                
-                # Extract outdoor data with unit conversion
-                outdoor = weather_data.get('outdoor', {})
-                rainfall = weather_data.get('rainfall', {})
-                wind = weather_data.get('wind', {})
-                solar_and_uvi = weather_data.get('solar_and_uvi', {})
-                pressure = weather_data.get('pressure', {})
-                
-                # Convert units
-                temp_c = float(outdoor.get('temperature', {}).get('value', 20))
-                temp_f = celsius_to_fahrenheit(temp_c)
-                
-                rain_day_mm = float(rainfall.get('daily', {}).get('value', 0))
-                rain_day_in = mm_to_inches(rain_day_mm)
-                
-                rain_week_mm = float(rainfall.get('weekly', {}).get('value', 0))
-                rain_week_in = mm_to_inches(rain_week_mm)
-                
-                wind_kmh = float(wind.get('wind_speed', {}).get('value', 0))
-                wind_mph = kmh_to_mph(wind_kmh)
-                
-                pressure_mmhg = float(pressure.get('absolute', {}).get('value', 760))
-                pressure_inhg = mmhg_to_inhg(pressure_mmhg)
+                soil, weather = ecowitt_parser.parse(data)
                 
-                # Store in current_data
+                # Store weather data - missing readings fall back to mild defaults
                 current_data['weather'] = {
-                    'temperature': round(temp_f, 1),
-                    'humidity': float(outdoor.get('humidity', {}).get('value', 50)),
-                    'rainfall_24h': round(rain_day_in, 2),
-                    'rainfall_week': round(rain_week_in, 2),
-                    'wind_speed': round(wind_mph, 1),
-                    'uv_index': int(solar_and_uvi.get('uvi', {}).get('value', 0)),
-                    'pressure': round(pressure_inhg, 2)
+                    'temperature': round(weather.get('temperature', 68.0), 1),
+                    'humidity': weather.get('humidity', 50.0),
+                    'rainfall_24h': round(weather.get('rain_today', 0.0), 2),
+                    'rainfall_week': round(weather.get('rain_week', 0.0), 2),
+                    'wind_speed': round(weather.get('wind_speed', 0.0), 1),
+                    'uv_index': weather.get('uvi', 0),
+                    'pressure': round(weather.get('pressure', 29.92), 2)
                 }
                 
                 # Store soil moisture data
-                for zone_key, zone_info in ZONES.items():
-                    channel = zone_info['channel']
-                    if channel in weather_data:
-                        moisture_value = float(weather_data[channel].get('humidity', {}).get('value', 30))
-                        current_data['soil_moisture'][zone_key] = moisture_value
+                current_data['soil_moisture'].update(soil)
                 
                 logger.info(f"✅ Weather data updated: {current_data['weather']['temperature']}°F")
                 return current_data['weather']
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Decision engine
+Pure mowing / watering analysis, plus the HTML renderer used by the dashboard
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from lawn_cache import LRUCache
+from lawn_metrics import REGISTRY
+from lawn_tracing import span
+
+try:
+    import numpy as np
+except ImportError:  # Optional - only the batch scorer needs it
+    np = None
+
+# Readings are rounded to this many decimals before fingerprinting - the
+# precision the analysis displays, so sensor jitter below it is a cache hit
+SOIL_FINGERPRINT_DECIMALS = 1
+WEATHER_FINGERPRINT_DECIMALS = 2
+
+ANALYSIS_SECONDS = REGISTRY.histogram('lawn_analysis_seconds', 'LawnAI.analyze compute time (cache misses only)')
+
+# Mow confidence starts at 100; each rule subtracts its penalty.
+# Average soil moisture bands, checked in order - 30-40% is the sweet spot
+TOO_DRY_BELOW, TOO_DRY_PENALTY = 30, 30
+MOISTURE_BANDS = ((40, 0), (50, 15), (60, 50), (70, 60))  # (upper bound inclusive, penalty)
+TOO_WET_PENALTY = 80
+# Weather rules: (field, default when missing, threshold, penalty)
+RAIN_RULE = ('rain_today', 0, 0.5, 30)  # Recent rain, above threshold
+HUMIDITY_RULE = ('humidity', 0, 80, 10)  # High humidity, above threshold
+HOT_RULE = ('temperature', 75, 90, 20)  # Hot, above threshold
+COLD_RULE = ('temperature', 75, 50, 25)  # Too cold, below threshold
+# Confidence at or above this is a "mow" decision
+MOW_CONFIDENCE_THRESHOLD = 60
+
+
+def _quantized(values, decimals):
+    """Sorted (name, rounded value) pairs for the numeric entries of a reading dict"""
+    return tuple(sorted(
+        (name, round(value, decimals))
+        for name, value in (values or {}).items()
+        if isinstance(value, (int, float))
+    ))
+
+
+def mow_confidence_inputs(soil_data, weather_data):
+    """(has soil, average moisture, rain today, humidity, temperature) for one snapshot"""
+    weather_data = weather_data or {}
+    moistures = [v for v in (soil_data or {}).values() if isinstance(v, (int, float))]
+    avg_moisture = sum(moistures) / len(moistures) if moistures else 0
+
+    def field(rule):
+        value = weather_data.get(rule[0])
+        return rule[1] if value is None else value
+
+    return bool(soil_data), avg_moisture, field(RAIN_RULE), field(HUMIDITY_RULE), field(HOT_RULE)
+
+
+def mow_confidence_batch(avg_moisture, rain_today, humidity, temperature, has_soil=True):
+    """Mow confidence for arrays of readings (timestamps, zones or properties) in one vectorized pass.
+
+    Arguments broadcast against each other; has_soil=False rows score 0
+    as calculate_mow_confidence does for an empty soil reading. Returns
+    an int array. Requires NumPy.
+    """
+    if np is None:
+        raise RuntimeError("NumPy is required for batch mow confidence scoring")
+    avg_moisture = np.asarray(avg_moisture, dtype=float)
+    rain_today = np.asarray(rain_today, dtype=float)
+    humidity = np.asarray(humidity, dtype=float)
+    temperature = np.asarray(temperature, dtype=float)
+
+    # Band lookup - np.select takes the first true condition, like the if/elif chain did
+    penalty = np.select([avg_moisture < TOO_DRY_BELOW] + [avg_moisture <= upper for upper, _ in MOISTURE_BANDS],
+                        [TOO_DRY_PENALTY] + [band_penalty for _, band_penalty in MOISTURE_BANDS],
+                        default=TOO_WET_PENALTY)
+    penalty = penalty + np.where(rain_today > RAIN_RULE[2], RAIN_RULE[3], 0)
+    penalty = penalty + np.where(humidity > HUMIDITY_RULE[2], HUMIDITY_RULE[3], 0)
+    penalty = penalty + np.where(temperature > HOT_RULE[2], HOT_RULE[3],
+                                 np.where(temperature < COLD_RULE[2], COLD_RULE[3], 0))
+
+    confidence = np.clip(100 - penalty, 0, 100).astype(int)
+    return np.where(np.asarray(has_soil, dtype=bool), confidence, 0)
+
+
+def analysis_fingerprint(soil_data, weather_data, last_mow_date=None, current_date=None):
+    """Hashable key for every input analyze() depends on"""
+    current_date = current_date or datetime.now()
+    return (
+        _quantized(soil_data, SOIL_FINGERPRINT_DECIMALS),
+        _quantized(weather_data, WEATHER_FINGERPRINT_DECIMALS),
+        last_mow_date,
+        current_date.date()
+    )
+
+
+@dataclass
+class Analysis:
+    """Everything the engine decided for one soil/weather snapshot"""
+    __slots__ = ('generated_at', 'season', 'mow_confidence', 'can_mow', 'mow_reason', 'avg_moisture',
+                 'zone_moisture', 'zone_status', 'immediate_actions', 'days_since_mow', 'next_mow_date',
+                 'next_mow_reason', 'watering_status', 'rainbird_assessment', 'weekly_water_need',
+                 'expected_rain', 'weather')
+
+    generated_at: datetime
+    season: str
+    mow_confidence: int
+    can_mow: bool
+    mow_reason: str
+    avg_moisture: float
+    zone_moisture: dict
+    zone_status: list
+    immediate_actions: list
+    days_since_mow: int
+    next_mow_date: datetime
+    next_mow_reason: str
+    watering_status: str
+    rainbird_assessment: str
+    weekly_water_need: float
+    expected_rain: float
+    weather: dict
+
+    def enhanced_data(self):
+        """Payload n8n receives as enhanced_analysis"""
+        return {
+            'zones': self.zone_moisture,
+            'weather': self.weather,
+            'days_since_mow': self.days_since_mow,
+            'immediate_actions': self.immediate_actions,
+            'can_mow': self.can_mow,
+            'season': self.season
+        }
+
+    def to_dict(self):
+        """JSON-ready view for API clients that do not want HTML"""
+        return {
+            'generated_at': self.generated_at.isoformat(),
+            'season': self.season,
+            'mow_confidence': self.mow_confidence,
+            'can_mow': self.can_mow,
+            'mow_reason': self.mow_reason,
+            'avg_moisture': round(self.avg_moisture, 1),
+            'zone_moisture': self.zone_moisture,
+            'zone_status': self.zone_status,
+            'immediate_actions': self.immediate_actions,
+            'days_since_mow': self.days_since_mow if self.days_since_mow < 999 else None,
+            'next_mow_date': self.next_mow_date.strftime('%Y-%m-%d'),
+            'next_mow_reason': self.next_mow_reason,
+            'watering_status': self.watering_status,
+            'rainbird_assessment': self.rainbird_assessment,
+            'weekly_water_need': self.weekly_water_need,
+            'expected_rain': self.expected_rain
+        }
+
+
+# AI Analysis Class
+class LawnAI:
+    def __init__(self, cache_size=128):
+        self.zone = '7b'
+        self.location = 'Fuquay-Varina, NC 27526'
+        self.grass_type = 'TifTuf Bermuda'
+        self.target_height = '1.5-2 inches'
+        self.cache = LRUCache(cache_size)
+
+    def get_season(self, date):
+        """Get the current season based on date"""
+        month = date.month
+        if month in [12, 1, 2]:
+            return "Winter"
+        elif month in [3, 4, 5]:
+            return "Spring"
+        elif month in [6, 7, 8]:
+            return "Summer"
+        else:
+            return "Fall"
+
+    def get_seasonal_advice(self, season):
+        """Get seasonal lawn care advice"""
+        advice = {
+            'Spring': "Begin fertilizing, increase mowing frequency, watch for spring dead spot",
+            'Summer': "Deep watering 2-3x weekly, maintain 1.5-2 inch height, monitor for armyworms",
+            'Fall': "Apply fall fertilizer, overseed thin areas, continue mowing until dormancy",
+            'Winter': "Minimal maintenance, avoid heavy traffic when frozen, clean mower for storage"
+        }
+        return advice.get(season, "Monitor conditions and adjust care accordingly")
+
+    def get_fertilizer_advice(self, month):
+        """Get month-specific fertilizer recommendations"""
+        advice = {
+            'January': "Hold off - Bermuda is dormant",
+            'February': "Late month: Apply pre-emergent crabgrass preventer",
+            'March': "Light starter fertilizer (8-8-8) as grass greens up",
+            'April': "First major feeding (16-4-8 Bermuda Blend)",
+            'May': "Continue nitrogen feeding for growth",
+            'June': "Regular feeding with 15-0-15 Summer blend",
+            'July': "Light feeding only if needed - watch for heat stress",
+            'August': "Resume regular feeding schedule",
+            'September': "Fall fertilizer (5-10-30) for root development",
+            'October': "Last feeding of season - winterizer blend",
+            'November': "No fertilizing - prepare for dormancy",
+            'December': "Dormant season - no fertilizer needed"
+        }
+        return advice.get(month, "Adjust based on grass conditions")
+
+    def calculate_mow_confidence(self, soil_data, weather_data):
+        """Calculate mowing confidence based on conditions - the same tables as mow_confidence_batch"""
+        has_soil, avg_moisture, rain_today, humidity, temperature = mow_confidence_inputs(soil_data, weather_data)
+        if not has_soil:
+            return 0
+
+        # Plain Python for one reading - a NumPy call costs more than the rules themselves.
+        # check_mow_confidence_batch() verifies this matches mow_confidence_batch row for row.
+        penalty = TOO_WET_PENALTY
+        if avg_moisture < TOO_DRY_BELOW:
+            penalty = TOO_DRY_PENALTY
+        else:
+            for upper, band_penalty in MOISTURE_BANDS:
+                if avg_moisture <= upper:
+                    penalty = band_penalty
+                    break
+        if rain_today > RAIN_RULE[2]:
+            penalty += RAIN_RULE[3]
+        if humidity > HUMIDITY_RULE[2]:
+            penalty += HUMIDITY_RULE[3]
+        if temperature > HOT_RULE[2]:
+            penalty += HOT_RULE[3]
+        elif temperature < COLD_RULE[2]:
+            penalty += COLD_RULE[3]
+        return max(0, min(100, 100 - penalty))
+
+    def calculate_mow_confidence_batch(self, soil_readings, weather_readings):
+        """Mow confidence for parallel sequences of soil and weather dicts - an int array"""
+        rows = [mow_confidence_inputs(soil, weather) for soil, weather in zip(soil_readings, weather_readings)]
+        if not rows:
+            return mow_confidence_batch([], [], [], [])
+        has_soil, avg_moisture, rain_today, humidity, temperature = zip(*rows)
+        return mow_confidence_batch(avg_moisture, rain_today, humidity, temperature, has_soil)
+
+    def analyze(self, soil_data, weather_data, last_mow_date=None, current_date=None):
+        """Compute the mowing / watering decision - no I/O, no global state"""
+        current_date = current_date or datetime.now()
+        weather_data = weather_data or {}
+        season = self.get_season(current_date)
+        mow_confidence = self.calculate_mow_confidence(soil_data, weather_data)
+
+        weekly_water_need = 1.5
+
+        # Analyze soil conditions with zone comparisons
+        soil_analysis = []
+        zone_moisture = {}
+        avg_moisture = 0
+
+        if soil_data:
+            for zone, moisture in soil_data.items():
+                if isinstance(moisture, (int, float)):
+                    zone_moisture[zone] = moisture
+                    if moisture < 30:
+                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: TOO DRY - NEEDS WATER ({moisture:.1f}%)")
+                    elif moisture <= 40:
+                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: PERFECT MOISTURE ({moisture:.1f}%)")
+                    elif moisture <= 50:
+                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: MOIST ({moisture:.1f}%)")
+                    elif moisture <= 60:
+                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: More MOIST, may clump and make tracks ({moisture:.1f}%)")
+                    elif moisture <= 70:
+                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: WET - delay mowing ({moisture:.1f}%)")
+                    else:
+                        soil_analysis.append(f"{zone.replace('_', ' ').title()}: TOO WET - do not mow ({moisture:.1f}%)")
+
+            moistures = [v for v in soil_data.values() if isinstance(v, (int, float))]
+            avg_moisture = sum(moistures) / len(moistures) if moistures else 0
+
+        # Determine if good to mow and why
+        can_mow = mow_confidence >= MOW_CONFIDENCE_THRESHOLD
+        mow_reason = "Excellent conditions" if can_mow else "Poor conditions"
+
+        # Specific condition analysis
+        temp = weather_data.get('temperature', 75)
+        rain_today = weather_data.get('rain_today', 0)
+        rain_week = weather_data.get('rain_week', 0)
+
+        # Update expected rain
+        expected_rain = rain_week
+
+        days_since_mow = 999
+        if last_mow_date:
+            days_since_mow = (current_date - last_mow_date).days
+
+        # Build specific immediate actions
+        immediate_actions = []
+
+        # Mowing recommendation with specifics
+        if can_mow:
+            if temp > 90:
+                immediate_actions.append(f"⚠️ Temperature is high ({int(temp)}°F) - mow early morning or evening to avoid heat stress")
+            elif days_since_mow > 7:
+                immediate_actions.append(f"🚜 It's been {days_since_mow} days since your last mow - grass may be tall, set height to 2.5\" for first pass")
+            elif days_since_mow < 5:
+                immediate_actions.append(f"⏰ Last mow was only {days_since_mow} days ago - wait until day 6 to avoid stressing the grass")
+            else:
+                immediate_actions.append("✅ Proceed with mowing at 1.5-2 inch height - conditions are optimal")
+        else:
+            # Specific reasons why not to mow
+            if rain_today > 0.5:
+                days_to_wait = 2 if rain_today > 1.0 else 1
+                immediate_actions.append(f"🌧️ Just rained {rain_today:.2f}\" today - wait {days_to_wait} days for soil to dry")
+            elif avg_moisture > 60:
+                next_good_day = "tomorrow" if avg_moisture < 70 else "2-3 days"
+                immediate_actions.append(f"💧 Soil too wet (avg {avg_moisture:.0f}%) - next good mowing day likely {next_good_day}")
+            elif temp < 50:
+                immediate_actions.append(f"🥶 Too cold ({int(temp)}°F) - wait for temperature above 55°F for healthy mowing")
+            else:
+                immediate_actions.append("❌ Conditions not optimal - check specific zone recommendations below")
+
+        # Zone-specific comparisons
+        if zone_moisture:
+            zones_sorted = sorted(zone_moisture.items(), key=lambda x: x[1])
+            if len(zones_sorted) >= 2:
+                driest = zones_sorted[0]
+                wettest = zones_sorted[-1]
+
+                if wettest[1] - driest[1] > 15:
+                    immediate_actions.append(f"💦 {wettest[0].replace('_', ' ').title()} is significantly wetter ({wettest[1]:.0f}%) than {driest[0].replace('_', ' ').title()} ({driest[1]:.0f}%) - adjust watering zones")
+
+        # Specific watering recommendations
+        for zone, moisture in zone_moisture.items():
+            if moisture < 25:
+                immediate_actions.append(f"🚨 {zone.replace('_', ' ').title()} critically dry ({moisture:.0f}%) - water immediately")
+            elif moisture < 30:
+                immediate_actions.append(f"💧 {zone.replace('_', ' ').title()} needs water soon ({moisture:.0f}%)")
+            elif moisture > 70:
+                immediate_actions.append(f"⚠️ {zone.replace('_', ' ').title()} is oversaturated ({moisture:.0f}%) - skip next watering cycle")
+
+        # Perfect conditions check
+        if all(30 <= m <= 40 for m in zone_moisture.values()):
+            immediate_actions.append("🌟 All zones are at perfect moisture levels (30-40%) - excellent lawn management!")
+
+        # Weather-based recommendations
+        if temp > 85 and rain_week < 0.5:
+            immediate_actions.append("🌡️ Hot and dry week - consider increasing watering frequency")
+
+        # Seasonal specific actions
+        if current_date.month in [2, 3, 9] and not any("pre-emergent" in action for action in immediate_actions):
+            immediate_actions.append("🌱 Apply pre-emergent crabgrass preventer this week")
+
+        # Calculate next optimal mow date
+        if not can_mow:
+            # Calculate when conditions will be good
+            if avg_moisture > 60:
+                days_to_dry = int((avg_moisture - 40) / 10)
+                next_mow_date = current_date + timedelta(days=days_to_dry)
+                next_mow_reason = f"allowing soil to dry to optimal moisture (currently {avg_moisture:.0f}%)"
+            elif rain_today > 0:
+                next_mow_date = current_date + timedelta(days=2)
+                next_mow_reason = "allowing 48 hours after rain for soil to dry"
+            elif temp < 55:
+                next_mow_date = current_date + timedelta(days=2)
+                next_mow_reason = "waiting for warmer temperatures"
+            else:
+                next_mow_date = current_date + timedelta(days=1)
+                next_mow_reason = "conditions should improve tomorrow"
+        else:
+            next_mow_date = current_date + timedelta(days=5)
+            next_mow_reason = "maintaining 5-day mowing cycle"
+
+        # Analyze RainBird schedule
+        if expected_rain > 1.0:
+            rainbird_assessment = "should be reduced by 50% due to significant rainfall"
+            watering_status = "⚠️ Needs adjustment"
+        elif expected_rain > 0.5:
+            rainbird_assessment = "is optimal with current rainfall supplementing irrigation"
+            watering_status = "✅ Optimal"
+        elif avg_moisture < 30:
+            rainbird_assessment = "should be increased by 20-30% due to dry conditions"
+            watering_status = "⚠️ Needs increase"
+        elif avg_moisture > 50:
+            rainbird_assessment = "should be reduced to prevent overwatering"
+            watering_status = "⚠️ Needs reduction"
+        else:
+            rainbird_assessment = "is currently optimal for maintaining 30-40% soil moisture"
+            watering_status = "✅ Optimal"
+
+        return Analysis(
+            generated_at=current_date,
+            season=season,
+            mow_confidence=mow_confidence,
+            can_mow=can_mow,
+            mow_reason=mow_reason,
+            avg_moisture=avg_moisture,
+            zone_moisture=zone_moisture,
+            zone_status=soil_analysis,
+            immediate_actions=immediate_actions,
+            days_since_mow=days_since_mow,
+            next_mow_date=next_mow_date,
+            next_mow_reason=next_mow_reason,
+            watering_status=watering_status,
+            rainbird_assessment=rainbird_assessment,
+            weekly_water_need=weekly_water_need,
+            expected_rain=expected_rain,
+            weather=dict(weather_data or {})  # Copied - the caller may update its dict in place after a cache hit
+        )
+
+    def analyze_cached(self, soil_data, weather_data, last_mow_date=None, current_date=None):
+        """analyze(), memoized on the input fingerprint - unchanged readings return the same Analysis"""
+        key = analysis_fingerprint(soil_data, weather_data, last_mow_date, current_date)
+        analysis = self.cache.get(key)
+        if analysis is None:
+            with ANALYSIS_SECONDS.time(), span('analysis'):
+                analysis = self.analyze(soil_data, weather_data, last_mow_date, current_date)
+            self.cache.put(key, analysis)
+        return analysis
+
+    def render_html(self, analysis):
+        """Render an Analysis as the dashboard's AI analysis HTML"""
+        a = analysis
+        current_date = a.generated_at
+        days_since_mow = a.days_since_mow
+        return f"""
+        <div class="ai-decision">
+            <span class="decision-icon">{'✅' if a.can_mow else '❌'}</span>
+            <div class="decision-text">
+                <strong>Mowing Decision: {'YES - ' + a.mow_reason if a.can_mow else 'NO - ' + a.mow_reason}</strong>
+                <div>Confidence Level: {a.mow_confidence}% | Average Soil Moisture: {a.avg_moisture:.1f}%</div>
+            </div>
+            <div class="decision-confidence">{a.mow_confidence}%</div>
+        </div>
+
+        <div class="ai-section">
+            <h3>📍 Zone Status</h3>
+            <ul style="margin: 0; padding-left: 1.5rem;">
+                {"".join(f"<li>{status}</li>" for status in a.zone_status)}
+            </ul>
+        </div>
+
+        <div class="ai-section">
+            <h3>⚡ Immediate Actions</h3>
+            <ul style="margin: 0; padding-left: 1.5rem;">
+                {"".join(f"<li>{action}</li>" for action in a.immediate_actions)}
+            </ul>
+        </div>
+
+        <div class="ai-section">
+            <h3>📅 This Week's Plan</h3>
+            <p><strong>Next Optimal Mow Date:</strong> {a.next_mow_date.strftime('%A, %B %d')} - {a.next_mow_reason}.
+            {"Ready to mow now!" if a.can_mow and days_since_mow >= 5 else f"Last mow was {days_since_mow} days ago." if days_since_mow < 999 else "No recent mow recorded in system."}</p>
+
+            <p><strong>RainBird Schedule:</strong> {a.watering_status} - Current watering schedule {a.rainbird_assessment}.
+            Target: {a.weekly_water_need:.1f}" per week, with {a.expected_rain:.1f}" expected from rainfall.</p>
+
+            <p><strong>Current season:</strong> {a.season} - {self.get_seasonal_advice(a.season)}</p>
+        </div>
+
+        <div class="ai-section">
+            <h3>📆 {current_date.strftime('%B')} Recommendations</h3>
+            <p><strong>Fertilization:</strong> {self.get_fertilizer_advice(current_date.strftime('%B'))}</p>
+            <p><strong>Watering:</strong> Target 1-1.5 inches per week including rainfall. Water early morning (6-8 AM).</p>
+        </div>
+
+        <div class="ai-section">
+            <h3>🌱 Bermuda Grass Health</h3>
+            <p>Maintain {self.target_height} height for golf course appearance.
+            {"Conditions are optimal for healthy growth." if 30 <= a.avg_moisture <= 40 else "Adjust watering to optimize growth conditions."}</p>
+            <p><strong>Health Score:</strong> {"⭐⭐⭐⭐⭐" if 30 <= a.avg_moisture <= 40 else "⭐⭐⭐☆☆"}</p>
+        </div>
+        """
+
+
+def check_mow_confidence_batch(samples=50000, seed=0):
+    """Score random readings, band edges included, both ways; returns the rows where they disagree"""
+    import random
+
+    rng = random.Random(seed)
+    edges = [TOO_DRY_BELOW, TOO_DRY_BELOW - 1e-9] + [upper + offset for upper, _ in MOISTURE_BANDS
+                                                     for offset in (0, 1e-9)]
+
+    def value(choices, low, high):
+        return rng.choice(choices + [rng.uniform(low, high), None])
+
+    soil_readings, weather_readings = [], []
+    for _ in range(samples):
+        soil = {f'zone_{zone}': rng.choice(edges + [rng.uniform(-10, 110)]) for zone in range(rng.randint(0, 3))}
+        if soil and rng.random() < 0.05:
+            soil['status'] = 'offline'  # Non-numeric entries are ignored
+        weather = {
+            RAIN_RULE[0]: value([RAIN_RULE[2], RAIN_RULE[2] + 1e-9, 0], 0, 3),
+            HUMIDITY_RULE[0]: value([HUMIDITY_RULE[2], HUMIDITY_RULE[2] + 1e-9], 0, 100),
+            HOT_RULE[0]: value([HOT_RULE[2], HOT_RULE[2] + 1e-9, COLD_RULE[2], COLD_RULE[2] - 1e-9], 20, 110)
+        }
+        soil_readings.append(soil)
+        weather_readings.append({k: v for k, v in weather.items() if rng.random() < 0.9})
+
+    engine = LawnAI(cache_size=1)
+    batch = engine.calculate_mow_confidence_batch(soil_readings, weather_readings).tolist()
+    return [(soil, weather, scalar, vectorized)
+            for soil, weather, vectorized in zip(soil_readings, weather_readings, batch)
+            for scalar in [engine.calculate_mow_confidence(soil, weather)] if scalar != vectorized]
+
+
+if __name__ == '__main__':
+    # python lawn_analysis.py - scalar and batch mow confidence must agree
+    mismatches = check_mow_confidence_batch()
+    for mismatch in mismatches[:10]:
+        print('MISMATCH soil=%r weather=%r scalar=%r batch=%r' % mismatch)
+    print(f"{'FAIL' if mismatches else 'OK'}: {len(mismatches)} of 50000 readings differ")
+    raise SystemExit(1 if mismatches else 0)
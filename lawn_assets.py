@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Static assets
+Dashboard split into content-hashed HTML/CSS/JS and resized images, built once at startup and served with strong ETags
+"""
+
+import gzip
+import hashlib
+import io
+import logging
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # Pinned in requirements.txt - gzip only if it is missing
+    brotli = None
+
+try:
+    from PIL import Image, features
+except ImportError:  # Optional - images are served at their original size without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults - override with environment variables
+ASSET_CONFIG = {
+    'prefix': '/assets',
+    'gzip_level': int(os.environ.get('ASSET_GZIP_LEVEL', 9)),
+    'brotli_quality': int(os.environ.get('ASSET_BROTLI_QUALITY', 11)),
+    'min_compress': int(os.environ.get('ASSET_MIN_COMPRESS', 512)),  # Bytes - smaller bodies are sent as-is
+    'max_age': int(os.environ.get('ASSET_MAX_AGE', 31536000))  # Hashed assets never change under their name
+}
+
+IMAGE_CONFIG = {
+    'widths': tuple(int(w) for w in os.environ.get('IMAGE_WIDTHS', '480,960,1440,1920').split(',') if w.strip()),
+    'quality': int(os.environ.get('IMAGE_QUALITY', 80)),
+    'webp': os.environ.get('IMAGE_WEBP', '1') != '0',  # Only when Pillow was built with WebP support
+    'max_age': int(os.environ.get('IMAGE_MAX_AGE', 86400))  # Same URL for every build - revalidated by ETag after this
+}
+
+# Advertise on the page so browsers send their viewport width and pixel ratio with image requests
+CLIENT_HINTS = 'Sec-CH-Viewport-Width, Sec-CH-DPR, Viewport-Width, DPR'
+
+# Inline blocks moved out of a page; <script src=...> tags are left alone
+_STYLE_RE = re.compile(r'<style>(.*?)</style>', re.S)
+_SCRIPT_RE = re.compile(r'<script>(.*?)</script>', re.S)
+
+
+class Asset:
+    """One body with its precompressed variants; ETags differ per encoding"""
+
+    def __init__(self, name, body, content_type, immutable, compress=True):
+        self.name = name
+        self.content_type = content_type
+        self.immutable = immutable
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {None: body}
+        if compress and len(body) >= ASSET_CONFIG['min_compress']:
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body, quality=ASSET_CONFIG['brotli_quality'])
+            self.variants['gzip'] = gzip.compress(body, compresslevel=ASSET_CONFIG['gzip_level'], mtime=0)
+
+    def etag(self, encoding):
+        return self.digest if encoding is None else f'{self.digest}-{encoding}'
+
+    def negotiate(self, accept_encoding):
+        """Smallest variant the client accepts - (encoding or None, body)"""
+        accepted = set()
+        for part in (accept_encoding or '').lower().replace(' ', '').split(','):
+            coding, _, params = part.partition(';')
+            if params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(coding)
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding]
+        return None, self.variants[None]
+
+    def sizes(self):
+        return {encoding or 'identity': len(body) for encoding, body in self.variants.items()}
+
+
+def serve(asset, cache_control, vary='Accept-Encoding', headers=None):
+    """Flask response for an Asset - the negotiated variant, or 304 when the client's ETag still matches"""
+    from flask import Response, request
+
+    encoding, body = asset.negotiate(request.headers.get('Accept-Encoding'))
+    etag = asset.etag(encoding)
+    headers = dict(headers or {}, **{'ETag': f'"{etag}"', 'Vary': vary, 'Cache-Control': cache_control})
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, content_type=asset.content_type, headers=headers)
+
+
+def _hoist(pattern, html, replacement):
+    """Drop every match of pattern, putting replacement where the last one was"""
+    last = list(pattern.finditer(html))[-1]
+    return pattern.sub('', html[:last.start()]) + replacement + html[last.end():]
+
+
+class AssetBundle:
+    """Assets built at import time and served from memory.
+
+    Pages are split with add_page(): inline <style> and <script> blocks
+    become /assets/<name>.<hash>.css|js files cached for a year, and the
+    page itself is revalidated with its ETag on every load.
+    """
+
+    def __init__(self, prefix=None):
+        self.prefix = prefix or ASSET_CONFIG['prefix']
+        self._assets = {}
+
+    def add(self, name, body, content_type, hashed=True):
+        """Register body (str or bytes); hashed names are content-addressed and immutable"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        asset = Asset(name, body, content_type, immutable=hashed)
+        if hashed:
+            stem, ext = os.path.splitext(name)
+            asset.name = f'{stem}.{asset.digest[:12]}{ext}'
+        self._assets[asset.name] = asset
+        return asset
+
+    def url(self, asset):
+        return f'{self.prefix}/{asset.name}'
+
+    def add_page(self, name, html):
+        """Move a page's inline CSS and JS into hashed assets and register the rewritten page"""
+        stem = os.path.splitext(name)[0]
+        built = []
+        styles = _STYLE_RE.findall(html)
+        if styles:
+            css = self.add(f'{stem}.css', '\n'.join(styles), 'text/css; charset=utf-8')
+            html = _hoist(_STYLE_RE, html, f'<link rel="stylesheet" href="{self.url(css)}">')
+            built.append(css)
+        scripts = _SCRIPT_RE.findall(html)
+        if scripts:
+            js = self.add(f'{stem}.js', '\n;\n'.join(scripts), 'application/javascript; charset=utf-8')
+            html = _hoist(_SCRIPT_RE, html, f'<script src="{self.url(js)}"></script>')
+            built.append(js)
+        page = self.add(name, html.strip() + '\n', 'text/html; charset=utf-8', hashed=False)
+        built.append(page)
+        logger.info("📦 %s built: %s", name, ', '.join(f'{asset.name} {asset.sizes()}' for asset in built))
+        return page
+
+    def get(self, name):
+        return self._assets.get(name)
+
+    def response(self, asset, headers=None):
+        """Flask response for the current request - 304 when the client's ETag still matches"""
+        cache_control = f"public, max-age={ASSET_CONFIG['max_age']}, immutable" if asset.immutable else 'no-cache'
+        return serve(asset, cache_control, headers=headers)
+
+    def register(self, app):
+        """Serve every registered asset under the bundle's prefix"""
+        def serve_asset(name):
+            asset = self._assets.get(name)
+            if asset is None or not asset.immutable:
+                return '', 404
+            return self.response(asset)
+
+        app.add_url_rule(f'{self.prefix}/<name>', 'serve_asset', serve_asset)
+        return app
+
+    def stats(self):
+        """Asset sizes per encoding for diagnostics"""
+        return {name: asset.sizes() for name, asset in self._assets.items()}
+
+
+def _hint(headers, *names):
+    for name in names:
+        try:
+            return float(headers[name])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+class ResponsiveImage:
+    """An image file read once, with JPEG (and WebP) width variants built at startup.
+
+    Requests pick a variant by ?w= or the viewport client hints; the
+    smallest variant at least that wide is sent, the original when
+    none is. Without Pillow only the original is served.
+    """
+
+    def __init__(self, path, widths=None, quality=None, webp=None):
+        self.path = path
+        self.widths = IMAGE_CONFIG['widths'] if widths is None else tuple(widths)
+        self.quality = IMAGE_CONFIG['quality'] if quality is None else quality
+        self.webp = IMAGE_CONFIG['webp'] if webp is None else webp
+        self.variants = {}  # (width, content type) -> Asset; width None is the original file
+        self.width = None
+        self.load()
+
+    def load(self):
+        """(Re)build every variant from the file on disk"""
+        self.variants = {}
+        if not os.path.exists(self.path):
+            logger.warning("⚠️ Image not found: %s", self.path)
+            return
+        with open(self.path, 'rb') as f:
+            original = f.read()
+        name = os.path.basename(self.path)
+        self.variants[(None, 'image/jpeg')] = Asset(name, original, 'image/jpeg', immutable=False, compress=False)
+        if Image is None:
+            return
+
+        try:
+            source = Image.open(io.BytesIO(original))
+            source.load()
+        except OSError as e:
+            logger.error(f"❌ Cannot decode {self.path}: {e}")
+            return
+        self.width = source.width
+        source = source.convert('RGB')
+        formats = [('image/jpeg', 'JPEG', {'progressive': True, 'optimize': True})]
+        if self.webp and features.check('webp'):
+            formats.append(('image/webp', 'WEBP', {'method': 6}))
+        for width in sorted(set(self.widths)):
+            if width >= source.width:
+                continue
+            height = round(source.height * width / source.width)
+            resized = source.resize((width, height), Image.LANCZOS)
+            for content_type, image_format, options in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, image_format, quality=self.quality, **options)
+                self.variants[(width, content_type)] = Asset(f'{name}@{width}', buffer.getvalue(), content_type,
+                                                             immutable=False, compress=False)
+        if len(formats) > 1:
+            # Full width WebP - usually well under the original JPEG
+            buffer = io.BytesIO()
+            source.save(buffer, 'WEBP', quality=self.quality, method=6)
+            self.variants[(None, 'image/webp')] = Asset(name, buffer.getvalue(), 'image/webp',
+                                                        immutable=False, compress=False)
+        logger.info("🖼️ %s variants: %s", name, ', '.join(
+            f"{width or 'original'} {content_type.split('/')[1]} {len(asset.variants[None]) // 1024}KB"
+            for (width, content_type), asset in sorted(self.variants.items(), key=lambda item: item[0][0] or 0)))
+
+    def requested_width(self, args, headers):
+        """Pixels wanted: ?w=, else viewport width x DPR from client hints, else None (original)"""
+        try:
+            width = int(args.get('w', 0))
+        except (TypeError, ValueError):
+            width = 0
+        if width > 0:
+            return width
+        viewport = _hint(headers, 'Sec-CH-Viewport-Width', 'Viewport-Width')
+        if viewport:
+            return int(viewport * (_hint(headers, 'Sec-CH-DPR', 'DPR') or 1))
+        return None
+
+    def select(self, width, accept):
+        """The Asset to send for a wanted width and an Accept header"""
+        content_type = 'image/webp' if 'image/webp' in (accept or '') else 'image/jpeg'
+        candidates = {w: asset for (w, ct), asset in self.variants.items() if ct == content_type}
+        if not candidates:
+            candidates = {w: asset for (w, ct), asset in self.variants.items() if ct == 'image/jpeg'}
+        if width:
+            fits = sorted(w for w in candidates if w is not None and w >= width)
+            if fits:
+                return candidates[fits[0]]
+        return candidates.get(None) or self.variants.get((None, 'image/jpeg'))
+
+    def response(self):
+        """Flask response for the current request - 404 when the file is missing, 304 when unchanged"""
+        from flask import request
+
+        asset = self.select(self.requested_width(request.args, request.headers), request.headers.get('Accept'))
+        if asset is None:
+            return '', 404
+        return serve(asset, f"public, max-age={IMAGE_CONFIG['max_age']}",
+                     vary=f'Accept, {CLIENT_HINTS}', headers={'Accept-CH': CLIENT_HINTS})
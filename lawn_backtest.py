@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Backtesting
+Replay stored soil, weather and mow history through LawnAI and record what it would have decided
+
+    python lawn_backtest.py --start 2025-06-01 --end 2025-09-01 --step 300 --out backtest.db
+
+Reads the history database read-only and never touches the network.
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from lawn_analysis import MOW_CONFIDENCE_THRESHOLD, LawnAI, mow_confidence_inputs
+from lawn_logging import configure_logging
+from lawn_rollups import WEATHER_FIELDS
+from lawn_storage import sqlite_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Defaults - override with environment variables or command line options
+BACKTEST_CONFIG = {
+    'db_path': os.environ.get('DB_PATH', 'hughes_lawn_ai.db'),
+    'out': os.environ.get('BACKTEST_OUT', 'backtest.db'),
+    'step': int(os.environ.get('BACKTEST_STEP', 300)),  # Seconds between evaluations, like MONITOR_INTERVAL
+    'chunk': int(os.environ.get('BACKTEST_CHUNK', 2000)),  # Snapshots per worker task
+    'workers': int(os.environ.get('BACKTEST_WORKERS', os.cpu_count() or 1))
+}
+
+RESULTS_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS backtest_runs
+       (run_id TEXT PRIMARY KEY,
+        created_at TIMESTAMP,
+        db_path TEXT,
+        start TIMESTAMP,
+        end TIMESTAMP,
+        step INTEGER,
+        mode TEXT,
+        summary TEXT)''',
+    # decision: mow, wait, or no_data before the first soil reading
+    '''CREATE TABLE IF NOT EXISTS backtest_results
+       (run_id TEXT NOT NULL,
+        timestamp TIMESTAMP NOT NULL,
+        decision TEXT NOT NULL,
+        mow_confidence INTEGER NOT NULL,
+        avg_moisture REAL,
+        next_mow_date DATE,
+        PRIMARY KEY (run_id, timestamp)) WITHOUT ROWID'''
+]
+
+
+def open_history(db_path):
+    """Read-only connection - a backtest never migrates or writes the live database"""
+    return sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+
+
+def history_range(conn):
+    """(first, last) timestamp across soil and weather history, or (None, None) when empty"""
+    row = conn.execute(
+        '''SELECT MIN(first), MAX(last) FROM (
+               SELECT MIN(timestamp) AS first, MAX(timestamp) AS last FROM sensor_data WHERE sensor_type LIKE 'soil_%'
+               UNION ALL
+               SELECT MIN(timestamp), MAX(timestamp) FROM weather_history)''').fetchone()
+    return row[0], row[1]
+
+
+def snapshots(conn, start, end, step):
+    """(timestamp, soil, weather, last mow) every step seconds from start to end, in time order.
+
+    Soil and weather rows are streamed from two cursors and merged; each
+    snapshot carries forward the latest value of every zone and weather
+    field, the same way the live state does between polls. Timestamps are
+    UTC, as stored.
+    """
+    start_text, end_text = sqlite_timestamp(start), sqlite_timestamp(end)
+
+    # State as of start - latest reading per zone and the latest weather row before the window
+    soil = {sensor_type[len('soil_'):]: value for sensor_type, value, _ in conn.execute(
+        '''SELECT sensor_type, sensor_value, MAX(timestamp) FROM sensor_data
+           WHERE sensor_type LIKE 'soil_%' AND timestamp < ? GROUP BY sensor_type''', (start_text,))}
+    weather = {}
+    columns = ', '.join(WEATHER_FIELDS)
+    row = conn.execute(f'SELECT {columns} FROM weather_history WHERE timestamp < ? ORDER BY timestamp DESC LIMIT 1',
+                       (start_text,)).fetchone()
+    if row:
+        weather.update((field, value) for field, value in zip(WEATHER_FIELDS, row) if value is not None)
+
+    mow_dates = [datetime.strptime(date, '%Y-%m-%d') for (date,) in conn.execute(
+        "SELECT DISTINCT date FROM calendar_events WHERE event_type = 'mow' AND date IS NOT NULL ORDER BY date")]
+
+    soil_rows = ((timestamp, 0, (sensor_type[len('soil_'):], value)) for timestamp, sensor_type, value in
+                 conn.execute('''SELECT timestamp, sensor_type, sensor_value FROM sensor_data
+                                 WHERE sensor_type LIKE 'soil_%' AND timestamp >= ? AND timestamp <= ?
+                                 ORDER BY timestamp''', (start_text, end_text)))
+    weather_cursor = conn.cursor()
+    weather_rows = ((row[-1], 1, row[:-1]) for row in weather_cursor.execute(
+        f'SELECT {columns}, timestamp FROM weather_history WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp',
+        (start_text, end_text)))
+
+    tick, delta = start, timedelta(seconds=step)
+    tick_text = start_text
+
+    def snapshot():
+        index = bisect.bisect_right(mow_dates, tick)
+        return tick_text, dict(soil), dict(weather), mow_dates[index - 1] if index else None
+
+    for timestamp, kind, values in heapq.merge(soil_rows, weather_rows, key=lambda item: item[0]):
+        # Readings taken at a tick are part of that tick's snapshot
+        while tick <= end and tick_text < timestamp:
+            yield snapshot()
+            tick += delta
+            tick_text = sqlite_timestamp(tick)
+        if kind == 0:
+            zone, value = values
+            soil[zone] = value
+        else:
+            weather.update((field, value) for field, value in zip(WEATHER_FIELDS, values) if value is not None)
+    while tick <= end:
+        yield snapshot()
+        tick += delta
+        tick_text = sqlite_timestamp(tick)
+
+
+_engine = None
+
+
+def evaluate_chunk(chunk, mode='full'):
+    """Worker task - result rows for a list of snapshots.
+
+    full runs LawnAI.analyze (memoized per day, like the live app) for the
+    decision and next mow date; fast scores confidence only, with the
+    vectorized batch scorer.
+    """
+    global _engine
+    if _engine is None:
+        _engine = LawnAI(cache_size=4096)
+
+    if mode == 'fast':
+        confidences = _engine.calculate_mow_confidence_batch([item[1] for item in chunk], [item[2] for item in chunk])
+        rows = []
+        for (timestamp, soil, weather, _), confidence in zip(chunk, confidences.tolist()):
+            if not soil:
+                rows.append((timestamp, 'no_data', 0, None, None))
+                continue
+            avg_moisture = mow_confidence_inputs(soil, weather)[1]
+            decision = 'mow' if confidence >= MOW_CONFIDENCE_THRESHOLD else 'wait'
+            rows.append((timestamp, decision, confidence, round(avg_moisture, 1), None))
+        return rows
+
+    rows = []
+    for timestamp, soil, weather, last_mow in chunk:
+        if not soil:
+            rows.append((timestamp, 'no_data', 0, None, None))
+            continue
+        analysis = _engine.analyze_cached(soil, weather, last_mow, datetime.fromisoformat(timestamp))
+        rows.append((timestamp, 'mow' if analysis.can_mow else 'wait', analysis.mow_confidence,
+                     round(analysis.avg_moisture, 1), analysis.next_mow_date.strftime('%Y-%m-%d')))
+    return rows
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Summary:
+    """Running totals over result rows - nothing is kept per row"""
+
+    def __init__(self):
+        self.decisions = {'mow': 0, 'wait': 0, 'no_data': 0}
+        self.confidence_counts = [0] * 101
+        self.flips = 0
+        self.mow_days = set()
+        self._last_decision = None
+
+    def add(self, rows):
+        for timestamp, decision, confidence, _, _ in rows:
+            self.decisions[decision] += 1
+            if decision == 'no_data':
+                continue
+            self.confidence_counts[max(0, min(100, confidence))] += 1
+            if decision == 'mow':
+                self.mow_days.add(timestamp[:10])
+            if self._last_decision is not None and decision != self._last_decision:
+                self.flips += 1
+            self._last_decision = decision
+
+    def percentile(self, fraction):
+        total = sum(self.confidence_counts)
+        if not total:
+            return None
+        seen = 0
+        for value, count in enumerate(self.confidence_counts):
+            seen += count
+            if seen >= fraction * total:
+                return value
+        return 100
+
+    def to_dict(self):
+        scored = self.decisions['mow'] + self.decisions['wait']
+        total = sum(self.confidence_counts)
+        return {
+            'snapshots': sum(self.decisions.values()),
+            'decisions': dict(self.decisions),
+            'mow_share': round(self.decisions['mow'] / scored, 4) if scored else None,
+            'mow_days': len(self.mow_days),
+            'decision_changes': self.flips,
+            'confidence_mean': (round(sum(value * count for value, count in enumerate(self.confidence_counts)) / total, 2)
+                                if total else None),
+            'confidence_p10': self.percentile(0.10),
+            'confidence_p50': self.percentile(0.50),
+            'confidence_p90': self.percentile(0.90)
+        }
+
+
+def run_backtest(db_path=None, out=None, start=None, end=None, step=None, mode='full', workers=None, chunk=None):
+    """Replay history into backtest_results in out; returns (run_id, summary dict)"""
+    db_path = db_path or BACKTEST_CONFIG['db_path']
+    out = out or BACKTEST_CONFIG['out']
+    step = step or BACKTEST_CONFIG['step']
+    workers = workers or BACKTEST_CONFIG['workers']
+    chunk = chunk or BACKTEST_CONFIG['chunk']
+
+    history = open_history(db_path)
+    if start is None or end is None:
+        first, last = history_range(history)
+        if first is None:
+            raise ValueError(f"No soil or weather history in {db_path}")
+        start = start or datetime.strptime(first, '%Y-%m-%d %H:%M:%S')
+        end = end or datetime.strptime(last, '%Y-%m-%d %H:%M:%S')
+
+    run_id = uuid.uuid4().hex[:12]
+    results = sqlite3.connect(out)
+    for statement in RESULTS_SCHEMA:
+        results.execute(statement)
+
+    logger.info(f"🔁 Backtest {run_id}: {start} -> {end} every {step}s, {mode} mode, {workers} workers")
+    started = time.perf_counter()
+    summary = Summary()
+
+    def write(rows):
+        results.executemany('INSERT INTO backtest_results VALUES (?, ?, ?, ?, ?, ?)',
+                            [(run_id, timestamp, decision, confidence, avg_moisture, next_mow_date)
+                             for timestamp, decision, confidence, avg_moisture, next_mow_date in rows])
+        summary.add(rows)
+
+    chunks = _chunks(snapshots(history, start, end, step), chunk)
+    if workers <= 1:
+        for items in chunks:
+            write(evaluate_chunk(items, mode))
+    else:
+        # At most 2 tasks per worker in flight, so memory stays flat however long the window is
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for items in chunks:
+                pending.append(pool.submit(evaluate_chunk, items, mode))
+                if len(pending) >= workers * 2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    history.close()
+
+    stats = summary.to_dict()
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = round(elapsed, 2)
+    stats['snapshots_per_second'] = round(stats['snapshots'] / elapsed) if elapsed else None
+    results.execute('INSERT INTO backtest_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (run_id, sqlite_timestamp(), db_path, sqlite_timestamp(start), sqlite_timestamp(end),
+                     step, mode, json.dumps(stats)))
+    results.commit()
+    results.close()
+    logger.info(f"✅ Backtest {run_id}: {stats['snapshots']} snapshots in {stats['seconds']}s -> {out}")
+    return run_id, stats
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay Hughes Lawn AI history through the decision engine')
+    parser.add_argument('--db', default=BACKTEST_CONFIG['db_path'], help='history database (opened read-only)')
+    parser.add_argument('--out', default=BACKTEST_CONFIG['out'], help='SQLite file for backtest_runs / backtest_results')
+    parser.add_argument('--start', type=_parse_time, help='UTC start, e.g. 2025-06-01 (default: first reading)')
+    parser.add_argument('--end', type=_parse_time, help='UTC end (default: last reading)')
+    parser.add_argument('--step', type=int, default=BACKTEST_CONFIG['step'], help='seconds between evaluations')
+    parser.add_argument('--mode', choices=('full', 'fast'), default='full',
+                        help='full: decision and next mow date; fast: vectorized confidence only')
+    parser.add_argument('--workers', type=int, default=BACKTEST_CONFIG['workers'])
+    parser.add_argument('--chunk', type=int, default=BACKTEST_CONFIG['chunk'], help='snapshots per worker task')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    run_id, stats = run_backtest(args.db, args.out, args.start, args.end, args.step, args.mode, args.workers, args.chunk)
+    print(json.dumps({'run_id': run_id, **stats}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
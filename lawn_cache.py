@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - In-process caches
+TTL cache with request coalescing so concurrent callers share one upstream fetch,
+and a bounded LRU for memoizing computed results
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _InFlight:
+    """A fetch in progress that other callers can wait on"""
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """Keyed TTL cache where concurrent misses for the same key run the loader once.
+
+    Successful results live for `ttl` seconds. A loader returning None is treated
+    as a failed fetch and is kept for `negative_ttl` seconds so an outage does not
+    turn every caller into another upstream request.
+    """
+
+    def __init__(self, ttl, negative_ttl=0):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}  # key -> (expires_at, value)
+        self._inflight = {}  # key -> _InFlight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() at most once per window"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlight()
+                self._inflight[key] = call
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if call.error is None:
+                    ttl = self.ttl if call.value is not None else self.negative_ttl
+                    if ttl > 0:
+                        self._entries[key] = (time.monotonic() + ttl, call.value)
+                self._inflight.pop(key, None)
+            call.event.set()
+
+        return call.value
+
+    def put(self, key, value):
+        """Store a value that arrived some other way, e.g. pushed by the source"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Hit/miss counters for diagnostics"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'entries': len(self._entries),
+                'in_flight': len(self._inflight)
+            }
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key once full"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it most recently used"""
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Store value for key, evicting the oldest entry when over maxsize"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for diagnostics"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'maxsize': self.maxsize
+            }
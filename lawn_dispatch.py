@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Outbound dispatch
+SQLite outbox for n8n events and RainBird commands, drained by background dispatchers
+"""
+
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+
+from lawn_http import get_session
+from lawn_logging import sampled, structured
+from lawn_metrics import REGISTRY
+from lawn_tracing import span
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENDING = 'sending'
+OUTBOX_SENT = 'sent'
+OUTBOX_DEAD = 'dead'
+
+WEBHOOK_SECONDS = REGISTRY.histogram('lawn_webhook_delivery_seconds', 'Webhook POST latency by outbox topic',
+                                     ('topic', 'status'))
+
+
+class Outbox:
+    """Durable queue in the outbox table (schema migration v5).
+
+    Producers append rows and return; dispatchers claim due rows in bulk,
+    deliver them, then mark them sent, dead or due again later. Claimed
+    rows carry a lease, so a process that dies mid-delivery leaves rows
+    that are claimed again once the lease runs out (at-least-once). Every
+    row has a unique idempotency key for receivers to de-duplicate on.
+    """
+
+    def __init__(self, db, lease=120.0):
+        self.db = db
+        self.lease = lease
+
+    def enqueue(self, topic, payload, key=None, coalesce_key=None, delay=0.0, ttl=None,
+                claim=False, max_pending=None):
+        """Append an event and return its id (None if key was already used).
+
+        coalesce_key merges payload into the pending event with the same key
+        (newer fields win) instead of adding a row. claim=True records a row
+        the caller is about to deliver itself. Past max_pending pending rows
+        the oldest are marked dead.
+        """
+        now = time.time()
+        conn = self.db.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if coalesce_key is not None and not claim:
+                row = conn.execute("""SELECT id, payload FROM outbox
+                                      WHERE topic = ? AND coalesce_key = ? AND status = 'pending'
+                                      LIMIT 1""", (topic, coalesce_key)).fetchone()
+                if row is not None:
+                    merged = json.loads(row[1])
+                    merged.update(payload)
+                    conn.execute('UPDATE outbox SET payload = ?, updated_at = ? WHERE id = ?',
+                                 (json.dumps(merged), now, row[0]))
+                    return row[0]
+
+            cursor = conn.execute(
+                '''INSERT OR IGNORE INTO outbox
+                   (topic, idempotency_key, coalesce_key, payload, status, next_attempt_at,
+                    claimed_at, expires_at, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (topic, key or uuid.uuid4().hex, coalesce_key, json.dumps(payload),
+                 OUTBOX_SENDING if claim else OUTBOX_PENDING, now + delay,
+                 now if claim else None, now + ttl if ttl else None, now, now))
+            if cursor.rowcount == 0:
+                return None
+            event_id = cursor.lastrowid
+
+            if max_pending:
+                overflow = conn.execute("SELECT COUNT(*) FROM outbox WHERE topic = ? AND status = 'pending'",
+                                        (topic,)).fetchone()[0] - max_pending
+                if overflow > 0:
+                    conn.execute("""UPDATE outbox SET status = 'dead', last_error = 'dropped: queue full', updated_at = ?
+                                    WHERE id IN (SELECT id FROM outbox WHERE topic = ? AND status = 'pending'
+                                                 ORDER BY id LIMIT ?)""", (now, topic, overflow))
+                    logger.warning(f"⚠️ Outbox {topic} full - dropped {overflow} oldest event(s)")
+            return event_id
+
+    def claim(self, topic, limit):
+        """Lease up to limit due events: [(id, idempotency_key, payload, attempts)]"""
+        now = time.time()
+        conn = self.db.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute("""UPDATE outbox SET status = 'dead', last_error = 'expired', updated_at = ?
+                            WHERE topic = ? AND status IN ('pending', 'sending') AND expires_at < ?""",
+                         (now, topic, now))
+            rows = conn.execute("""SELECT id, idempotency_key, payload, attempts FROM outbox
+                                   WHERE topic = ? AND status = 'pending' AND next_attempt_at <= ?
+                                   UNION ALL
+                                   SELECT id, idempotency_key, payload, attempts FROM outbox
+                                   WHERE topic = ? AND status = 'sending' AND claimed_at < ?
+                                   ORDER BY id LIMIT ?""",
+                                (topic, now, topic, now - self.lease, limit)).fetchall()
+            if rows:
+                conn.executemany("""UPDATE outbox SET status = 'sending', claimed_at = ?, attempts = attempts + 1,
+                                    updated_at = ? WHERE id = ?""", [(now, now, row[0]) for row in rows])
+        return [(row[0], row[1], json.loads(row[2]), row[3] + 1) for row in rows]
+
+    def mark_sent(self, ids):
+        self._set_status(ids, OUTBOX_SENT)
+
+    def mark_dead(self, ids, error):
+        self._set_status(ids, OUTBOX_DEAD, error)
+
+    def retry(self, ids, error, delay):
+        """Put claimed events back in the queue, due again after delay seconds"""
+        now = time.time()
+        conn = self.db.connection()
+        with conn:
+            conn.executemany("""UPDATE outbox SET status = 'pending', next_attempt_at = ?, last_error = ?,
+                                updated_at = ? WHERE id = ?""", [(now + delay, error, now, event_id) for event_id in ids])
+
+    def next_due(self, topic):
+        """Seconds until the next pending event is due (0 if one is due now), None if empty"""
+        due = self.db.scalar("SELECT MIN(next_attempt_at) FROM outbox WHERE topic = ? AND status = 'pending'",
+                             (topic,))
+        return None if due is None else max(0.0, due - time.time())
+
+    def purge(self, older_than):
+        """Delete sent and dead events last touched more than older_than seconds ago"""
+        cursor = self.db.execute("DELETE FROM outbox WHERE status IN ('sent', 'dead') AND updated_at < ?",
+                                 (time.time() - older_than,))
+        return cursor.rowcount
+
+    def stats(self):
+        """Event counts per topic and status"""
+        counts = {}
+        for row in self.db.query('SELECT topic, status, COUNT(*) FROM outbox GROUP BY topic, status'):
+            counts.setdefault(row[0], {})[row[1]] = row[2]
+        return counts
+
+    def _set_status(self, ids, status, error=None):
+        now = time.time()
+        conn = self.db.connection()
+        with conn:
+            conn.executemany('UPDATE outbox SET status = ?, last_error = ?, updated_at = ? WHERE id = ?',
+                             [(status, error, now, event_id) for event_id in ids])
+
+
+class OutboxDispatcher:
+    """Background thread draining one outbox topic.
+
+    Claims up to `batch_size` due events at a time and hands them to
+    `deliver(events)`, which returns ('sent' | 'retry' | 'drop', error). Retries
+    back off exponentially with jitter per event, and the whole topic
+    pauses for the same delay so a down receiver is not hammered. Sent
+    and dead rows older than `retention` seconds are purged hourly.
+    """
+
+    def __init__(self, outbox, topic, deliver, batch_size=1, poll_interval=30.0,
+                 base_backoff=2.0, max_backoff=300.0, max_attempts=None, retention=7 * 86400):
+        self.outbox = outbox
+        self.topic = topic
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.deliver = deliver
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._failures = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def start(self):
+        """Start the dispatch thread (idempotent)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f'outbox-{self.topic}', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def wake(self):
+        """Check the outbox now instead of at the next poll"""
+        self._wake.set()
+
+    def flush(self, timeout=10):
+        """Wait until nothing is pending for this topic; False on timeout or while backing off"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.outbox.next_due(self.topic) is None:
+                return True
+            if self._failures:
+                return False
+            self.wake()
+            time.sleep(0.05)
+        return False
+
+    def close(self):
+        """Stop the dispatch thread - undelivered events stay in the outbox"""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=30)
+
+    def stats(self):
+        """Delivery counters for diagnostics"""
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'consecutive_failures': self._failures
+        }
+
+    def _run(self):
+        next_purge = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() >= next_purge:
+                    self.outbox.purge(self.retention)
+                    next_purge = time.monotonic() + 3600
+
+                events = self.outbox.claim(self.topic, self.batch_size)
+                if not events:
+                    due = self.outbox.next_due(self.topic)
+                    self._wait(self.poll_interval if due is None else min(due, self.poll_interval))
+                    continue
+
+                ids = [event[0] for event in events]
+                try:
+                    outcome, error = self.deliver(events)
+                except Exception as e:
+                    outcome, error = 'retry', str(e)
+
+                if outcome == 'sent':
+                    self.outbox.mark_sent(ids)
+                    self.sent += len(ids)
+                    self._failures = 0
+                elif outcome == 'drop':
+                    self.outbox.mark_dead(ids, error)
+                    self.dropped += len(ids)
+                    self._failures = 0
+                else:
+                    self.failed += len(ids)
+                    self._failures += 1
+                    attempts = max(event[3] for event in events)
+                    if self.max_attempts and attempts >= self.max_attempts:
+                        self.outbox.mark_dead(ids, error)
+                        self.dropped += len(ids)
+                        continue
+                    delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+                    delay *= random.uniform(0.5, 1.0)
+                    self.outbox.retry(ids, error, delay)
+                    logger.error("❌ Outbox %s: %d event(s) failed (%s) - retry in %.0fs", self.topic, len(ids), error, delay,
+                                 extra=structured('outbox.retry', topic=self.topic))
+                    self._wait(delay)
+            except Exception as e:
+                logger.error(f"❌ Outbox {self.topic} dispatcher error: {e}")
+                self._wait(self.poll_interval)
+
+    def _wait(self, seconds):
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+
+class WebhookDispatcher(OutboxDispatcher):
+    """Delivers an outbox topic as JSON POSTs to a webhook.
+
+    Events are queued with `flush_interval` delay, so submits with the same
+    coalesce key in that window merge into one post. A batch size of 1
+    posts the payload unchanged with an Idempotency-Key header; larger
+    batches post {"events": [...], "idempotency_keys": [...]}. Network
+    errors, 5xx and 429 are retried; other 4xx responses are dropped.
+    """
+
+    def __init__(self, outbox, url, topic='n8n', session_name='n8n', max_queue=500, flush_interval=1.0,
+                 timeout=10, **kwargs):
+        super().__init__(outbox, topic, self.deliver, **kwargs)
+        self.url = url
+        self.session_name = session_name
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+
+    def submit(self, payload, key=None, coalesce_key=None):
+        """Queue payload for delivery - one SQLite insert, never waits on the webhook"""
+        self.start()
+        with span(f'{self.topic}_enqueue'):
+            event_id = self.outbox.enqueue(self.topic, payload, key=key, coalesce_key=coalesce_key,
+                                           delay=self.flush_interval, max_pending=self.max_queue)
+        self.wake()
+        return event_id
+
+    def deliver(self, events):
+        keys = [event[1] for event in events]
+        if self.batch_size == 1:
+            body, headers = events[0][2], {'Idempotency-Key': keys[0]}
+        else:
+            body, headers = {'events': [event[2] for event in events], 'idempotency_keys': keys}, {}
+        started = time.perf_counter()
+        try:
+            response = get_session(self.session_name).post(self.url, json=body, headers=headers, timeout=self.timeout)
+        except Exception:
+            WEBHOOK_SECONDS.observe(time.perf_counter() - started, topic=self.topic, status='error')
+            raise
+        WEBHOOK_SECONDS.observe(time.perf_counter() - started, topic=self.topic, status=response.status_code)
+        if response.status_code < 300:
+            logger.info("✅ Webhook delivered %d event(s)", len(events), extra=sampled('webhook.delivered'))
+            return 'sent', None
+        if response.status_code == 429 or response.status_code >= 500:
+            return 'retry', f'HTTP {response.status_code}'
+        logger.error(f"❌ Webhook rejected {len(events)} event(s) with {response.status_code} - dropped")
+        return 'drop', f'HTTP {response.status_code}'
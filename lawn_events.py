@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Live updates
+Server-Sent Events fan-out of ingestion results with a bounded buffer per client
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Defaults - override with environment variables
+STREAM_CONFIG = {
+    'buffer': int(os.environ.get('STREAM_BUFFER', 32)),  # Events held per client before the oldest is dropped
+    'heartbeat': float(os.environ.get('STREAM_HEARTBEAT', 15)),  # Seconds between keep-alive comments
+    'retry_ms': int(os.environ.get('STREAM_RETRY_MS', 5000)),  # Browser reconnect delay
+    # Each open stream holds a server thread for as long as the tab is open. Keep this well below the
+    # worker's thread count (gunicorn --threads 16 in startup.txt) so API and RainBird routes always have
+    # threads left - past the cap, /api/stream answers 503 and the dashboard falls back to polling.
+    'max_clients': int(os.environ.get('STREAM_MAX_CLIENTS', 8))
+}
+
+
+def format_event(event, data, event_id=None):
+    """One SSE frame; data is already JSON encoded"""
+    frame = f'id: {event_id}\n' if event_id is not None else ''
+    return frame + f'event: {event}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """One connected client - a bounded queue that drops its oldest event when full"""
+
+    def __init__(self, property_id, maxsize):
+        self.property_id = property_id
+        self.queue = deque(maxlen=maxsize)
+        self.condition = threading.Condition()
+        self.lagged = False  # Events were dropped - the client must refetch the full state
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.lagged = True
+                self.dropped += 1
+            self.queue.append(item)
+            self.condition.notify()
+
+    def drain(self, timeout):
+        """(events, lagged) - waits up to timeout for something to send"""
+        with self.condition:
+            if not self.queue and not self.lagged:
+                self.condition.wait(timeout)
+            items = list(self.queue)
+            self.queue.clear()
+            lagged, self.lagged = self.lagged, False
+        return items, lagged
+
+
+class EventBroker:
+    """Publishes state changes to SSE subscribers, per property.
+
+    publish() is called from the ingestion loop and request handlers; it
+    never blocks on a slow client. A payload identical to the last one
+    of the same type for the same property is not sent again.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(STREAM_CONFIG, **(config or {}))
+        self._subscribers = set()
+        self._last = {}  # (property_id, event) -> encoded payload
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.unchanged = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self, property_id):
+        """A new Subscription, or None when max_clients are already connected"""
+        with self._lock:
+            if len(self._subscribers) >= self.config['max_clients']:
+                self.rejected += 1
+                return None
+            subscription = Subscription(property_id, self.config['buffer'])
+            self._subscribers.add(subscription)
+        logger.info("📡 Live update client connected (%s)", property_id)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            self.dropped += subscription.dropped
+        logger.info("📡 Live update client disconnected (%s)", subscription.property_id)
+
+    def has_subscribers(self, property_id):
+        with self._lock:
+            return any(s.property_id == property_id for s in self._subscribers)
+
+    def publish(self, event, data, property_id):
+        """Queue an event for every subscriber of the property; returns how many received it"""
+        encoded = json.dumps(data, default=str, sort_keys=True)
+        with self._lock:
+            key = (property_id, event)
+            if self._last.get(key) == encoded:
+                self.unchanged += 1
+                return 0
+            self._last[key] = encoded
+            self._next_id += 1
+            item = (self._next_id, event, encoded)
+            targets = [s for s in self._subscribers if s.property_id == property_id]
+            self.published += 1
+            self.delivered += len(targets)
+        for subscription in targets:
+            subscription.put(item)
+        return len(targets)
+
+    def stream(self, subscription, snapshot=None):
+        """SSE frames for one client: reconnect delay, current state, then changes and heartbeats.
+
+        snapshot() returns the (event, data) pairs describing the current
+        state; it runs after subscribing so no change falls in between.
+        """
+        try:
+            yield f'retry: {self.config["retry_ms"]}\n\n'
+            for event, data in (snapshot() if snapshot else ()):
+                yield format_event(event, json.dumps(data, default=str, sort_keys=True))
+            while True:
+                items, lagged = subscription.drain(self.config['heartbeat'])
+                if lagged:
+                    # Buffer overflowed - tell the client to refetch rather than replay a partial history
+                    yield format_event('resync', '{}')
+                if not items and not lagged:
+                    yield ': heartbeat\n\n'
+                    continue
+                for event_id, event, data in items:
+                    yield format_event(event, data, event_id)
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        """Client and event counters for diagnostics"""
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'published': self.published,
+                'unchanged': self.unchanged,
+                'delivered': self.delivered,
+                'dropped': self.dropped + sum(s.dropped for s in self._subscribers),
+                'rejected': self.rejected
+            }
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Maintenance state index
+Last mow / fertilizer / aeration / per-zone watering kept in memory
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Calendar dates are compared as text, so only zero-padded YYYY-MM-DD rows take part
+_DATE_GLOB = "date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+
+
+def event_date(text):
+    """Calendar date as zero-padded 'YYYY-MM-DD' - raises ValueError for anything strptime rejects"""
+    return datetime.strptime(str(text), '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+def _is_event_date(text):
+    try:
+        return event_date(text) == text
+    except ValueError:
+        return False
+
+
+def _event_keys(event_type, event_data):
+    """Index keys for a calendar event - maintenance events are also keyed by their type (aeration, ...)"""
+    keys = [event_type]
+    if event_type == 'maintenance' and event_data:
+        try:
+            data = json.loads(event_data) if isinstance(event_data, str) else event_data
+            if isinstance(data, dict) and data.get('type'):
+                keys.append(str(data['type']))
+        except (ValueError, TypeError):
+            pass
+    return keys
+
+
+def _zone_number(zone_id):
+    """watering_history stores zones as 'zone_3' or '3' - normalize to 3"""
+    text = str(zone_id)
+    if text.startswith('zone_'):
+        text = text[5:]
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+class MaintenanceIndex:
+    """Latest date per calendar event type plus latest watering per RainBird zone.
+
+    Loaded once from the database at startup and then kept current by the
+    routes that write calendar events or watering, so the analysis never
+    has to query SQLite for "days since last mow".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_event = {}  # key -> 'YYYY-MM-DD'
+        self._last_watering = {}  # zone -> 'YYYY-MM-DD HH:MM:SS'
+
+    def load(self, db):
+        """Rebuild the index from calendar_events and watering_history"""
+        last_event = {}
+        for row in db.query(f'SELECT event_type, MAX(date) FROM calendar_events WHERE {_DATE_GLOB} '
+                            'GROUP BY event_type'):
+            if row[0] and row[1]:
+                last_event[row[0]] = row[1]
+        for row in db.query(f"SELECT date, event_data FROM calendar_events "
+                            f"WHERE event_type = 'maintenance' AND {_DATE_GLOB}"):
+            for key in _event_keys('maintenance', row[1])[1:]:
+                if row[0] and row[0] > last_event.get(key, ''):
+                    last_event[key] = row[0]
+
+        last_watering = {}
+        for row in db.query('SELECT zone_id, MAX(timestamp) FROM watering_history GROUP BY zone_id'):
+            zone = _zone_number(row[0])
+            if row[1] and row[1] > last_watering.get(zone, ''):
+                last_watering[zone] = row[1]
+
+        with self._lock:
+            self._last_event = last_event
+            self._last_watering = last_watering
+        logger.info(f"✅ Maintenance index loaded: {len(last_event)} event types, {len(last_watering)} zones")
+
+    def record_event(self, event_type, date, event_data=None):
+        """A calendar event was saved; dates that are not zero-padded YYYY-MM-DD are ignored"""
+        if not event_type or not _is_event_date(date):
+            return
+        with self._lock:
+            for key in _event_keys(event_type, event_data):
+                if date > self._last_event.get(key, ''):
+                    self._last_event[key] = date
+
+    def remove_event(self, db, event_type, date, event_data=None):
+        """A calendar event was deleted - recompute the keys it may have been the latest for"""
+        keys = _event_keys(event_type, event_data)
+        with self._lock:
+            stale = [key for key in keys if self._last_event.get(key) == date]
+        if not stale:
+            return
+        last_date = db.scalar(f'SELECT MAX(date) FROM calendar_events WHERE event_type = ? AND {_DATE_GLOB}',
+                              (event_type,))
+        subtypes = {}
+        if len(stale) > 1 or stale[0] != event_type:
+            for row in db.query(f"SELECT date, event_data FROM calendar_events "
+                                f"WHERE event_type = 'maintenance' AND {_DATE_GLOB}"):
+                for key in _event_keys('maintenance', row[1])[1:]:
+                    if row[0] and row[0] > subtypes.get(key, ''):
+                        subtypes[key] = row[0]
+        with self._lock:
+            for key in stale:
+                value = last_date if key == event_type else subtypes.get(key)
+                if value:
+                    self._last_event[key] = value
+                else:
+                    self._last_event.pop(key, None)
+
+    def record_watering(self, zone, timestamp):
+        """A zone was watered at timestamp ('YYYY-MM-DD HH:MM:SS')"""
+        zone = _zone_number(zone)
+        with self._lock:
+            if timestamp > self._last_watering.get(zone, ''):
+                self._last_watering[zone] = timestamp
+
+    def last_date(self, key):
+        """datetime of the latest event for key (mow, fertilizer, aeration, ...) or None"""
+        date = self._last_event.get(key)
+        try:
+            return datetime.strptime(date, '%Y-%m-%d') if date else None
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring malformed {key} date: {date!r}")
+            return None
+
+    def last_watering(self, zone):
+        """Latest watering timestamp string for a RainBird zone or None"""
+        return self._last_watering.get(_zone_number(zone))
+
+    def snapshot(self):
+        """Plain dict copy for JSON responses and analysis inputs"""
+        with self._lock:
+            return {
+                'last_mow': self._last_event.get('mow'),
+                'last_fertilizer': self._last_event.get('fertilizer'),
+                'last_aeration': self._last_event.get('aeration'),
+                'last_events': dict(self._last_event),
+                'last_watering': {str(zone): ts for zone, ts in self._last_watering.items()}
+            }
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Time-series rollups
+Hourly and daily min/max/mean/last aggregates per soil zone and weather field
+"""
+
+import calendar
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# weather_history columns that get their own rollup series
+WEATHER_FIELDS = ['temperature', 'humidity', 'rain_today', 'rain_week', 'wind_speed', 'uvi', 'pressure']
+
+RESOLUTIONS = ('hour', 'day')
+
+# Raw rows older than this are deleted once they are covered by rollups (0 keeps everything)
+RETENTION_CONFIG = {
+    'raw_days': int(os.environ.get('RAW_RETENTION_DAYS', 365)),
+    'hourly_days': int(os.environ.get('HOURLY_ROLLUP_RETENTION_DAYS', 0)),
+    'interval_seconds': int(os.environ.get('RETENTION_INTERVAL', 6 * 3600))
+}
+
+ROLLUP_TABLE = '''CREATE TABLE IF NOT EXISTS sensor_rollups
+                  (resolution TEXT NOT NULL,
+                   bucket TEXT NOT NULL,
+                   series TEXT NOT NULL,
+                   min_value REAL,
+                   max_value REAL,
+                   sum_value REAL,
+                   count INTEGER,
+                   last_value REAL,
+                   last_timestamp TEXT,
+                   PRIMARY KEY (resolution, series, bucket)) WITHOUT ROWID'''
+
+# Every SET expression sees the old row, so last_value compares against the old last_timestamp
+ROLLUP_UPSERT = '''INSERT INTO sensor_rollups
+                   (resolution, bucket, series, min_value, max_value, sum_value, count, last_value, last_timestamp)
+                   VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                   ON CONFLICT (resolution, series, bucket) DO UPDATE SET
+                       min_value = MIN(min_value, excluded.min_value),
+                       max_value = MAX(max_value, excluded.max_value),
+                       sum_value = sum_value + excluded.sum_value,
+                       count = count + 1,
+                       last_value = CASE WHEN excluded.last_timestamp >= last_timestamp
+                                         THEN excluded.last_value ELSE last_value END,
+                       last_timestamp = MAX(last_timestamp, excluded.last_timestamp)'''
+
+
+def bucket_for(resolution, timestamp):
+    """Bucket key for a 'YYYY-MM-DD HH:MM:SS' timestamp"""
+    if resolution == 'hour':
+        return timestamp[:13] + ':00:00'
+    return timestamp[:10]
+
+
+def rollup_params(series, value, timestamp):
+    """ROLLUP_UPSERT parameter rows (one per resolution) for a single reading"""
+    return [(resolution, bucket_for(resolution, timestamp), series, value, value, value, value, timestamp)
+            for resolution in RESOLUTIONS]
+
+
+def backfill_rollups(conn):
+    """Build rollups from raw rows already in the database (migration helper)"""
+    conn.execute(ROLLUP_TABLE)
+    buckets = {'hour': "strftime('%Y-%m-%d %H:00:00', timestamp)", 'day': 'DATE(timestamp)'}
+
+    for resolution, bucket in buckets.items():
+        conn.execute(f'''INSERT OR REPLACE INTO sensor_rollups
+                         (resolution, bucket, series, min_value, max_value, sum_value, count, last_timestamp)
+                         SELECT '{resolution}', {bucket}, sensor_type, MIN(sensor_value), MAX(sensor_value),
+                                SUM(sensor_value), COUNT(sensor_value), MAX(timestamp)
+                         FROM sensor_data
+                         WHERE sensor_value IS NOT NULL AND sensor_type LIKE 'soil_%'
+                         GROUP BY 2, 3''')
+        for field in WEATHER_FIELDS:
+            conn.execute(f'''INSERT OR REPLACE INTO sensor_rollups
+                             (resolution, bucket, series, min_value, max_value, sum_value, count, last_timestamp)
+                             SELECT '{resolution}', {bucket}, '{field}', MIN({field}), MAX({field}),
+                                    SUM({field}), COUNT({field}), MAX(timestamp)
+                             FROM weather_history
+                             WHERE {field} IS NOT NULL
+                             GROUP BY 2''')
+
+    conn.execute('''UPDATE sensor_rollups SET last_value =
+                        (SELECT sensor_value FROM sensor_data
+                         WHERE sensor_type = sensor_rollups.series AND timestamp = sensor_rollups.last_timestamp
+                         ORDER BY id DESC LIMIT 1)
+                    WHERE series LIKE 'soil_%' ''')
+    for field in WEATHER_FIELDS:
+        conn.execute(f'''UPDATE sensor_rollups SET last_value =
+                             (SELECT {field} FROM weather_history
+                              WHERE timestamp = sensor_rollups.last_timestamp AND {field} IS NOT NULL
+                              ORDER BY id DESC LIMIT 1)
+                         WHERE series = ?''', (field,))
+
+
+def apply_retention(conn, raw_days=None, hourly_days=None):
+    """Delete raw readings (and optionally hourly rollups) past their retention window"""
+    raw_days = RETENTION_CONFIG['raw_days'] if raw_days is None else raw_days
+    hourly_days = RETENTION_CONFIG['hourly_days'] if hourly_days is None else hourly_days
+    deleted = 0
+    with conn:
+        if raw_days > 0:
+            cutoff = f'-{int(raw_days)} days'
+            deleted += conn.execute("DELETE FROM sensor_data WHERE timestamp < datetime('now', ?)", (cutoff,)).rowcount
+            deleted += conn.execute("DELETE FROM weather_history WHERE timestamp < datetime('now', ?)", (cutoff,)).rowcount
+        if hourly_days > 0:
+            deleted += conn.execute("""DELETE FROM sensor_rollups
+                                       WHERE resolution = 'hour' AND bucket < datetime('now', ?)""",
+                                    (f'-{int(hourly_days)} days',)).rowcount
+    if deleted:
+        logger.info(f"🧹 Retention removed {deleted} old rows")
+    return deleted
+
+
+def read_rollups(db, resolution, series, start_bucket, end_bucket):
+    """Rollup rows for the given series with start_bucket <= bucket <= end_bucket"""
+    placeholders = ', '.join('?' for _ in series)
+    return db.query(f'''SELECT bucket, series, min_value, max_value, sum_value, count, last_value, last_timestamp
+                        FROM sensor_rollups
+                        WHERE resolution = ? AND series IN ({placeholders}) AND bucket >= ? AND bucket <= ?
+                        ORDER BY bucket''',
+                    [resolution, *series, start_bucket, end_bucket])
+
+
+def daily_weather_summary(db, date):
+    """Last value plus min/max/mean of every weather field for one day, or None"""
+    rows = read_rollups(db, 'day', WEATHER_FIELDS, date, date)
+    if not rows:
+        return None
+    weather = {field: None for field in WEATHER_FIELDS}
+    summary = {}
+    timestamp = None
+    for row in rows:
+        weather[row['series']] = row['last_value']
+        summary[row['series']] = {
+            'min': row['min_value'],
+            'max': row['max_value'],
+            'mean': row['sum_value'] / row['count'] if row['count'] else None
+        }
+        timestamp = max(timestamp or '', row['last_timestamp'] or '')
+    weather['timestamp'] = timestamp
+    weather['summary'] = summary
+    return weather
+
+
+# Range queries - raw rows are bucketed in SQL for sub-hour resolutions, rollups serve hour/day
+HISTORY_RESOLUTIONS = {'5m': 300, '15m': 900, '30m': 1800, 'hour': 3600, 'day': 86400}
+HISTORY_AGGREGATES = {
+    'mean': 'sum_value / count',
+    'min': 'min_value',
+    'max': 'max_value',
+    'last': 'last_value'
+}
+HISTORY_MAX_POINTS = int(os.environ.get('HISTORY_MAX_POINTS', 5000))
+
+
+def _to_epoch(timestamp):
+    return calendar.timegm(time.strptime(timestamp, '%Y-%m-%d %H:%M:%S'))
+
+
+def _raw_bucket(seconds):
+    return f"datetime((CAST(strftime('%s', timestamp) AS INTEGER) / {seconds}) * {seconds}, 'unixepoch')"
+
+
+def _raw_soil_rows(db, series, start, end, seconds, agg):
+    placeholders = ', '.join('?' for _ in series)
+    bucket = _raw_bucket(seconds)
+    if agg == 'last':
+        # SQLite returns the bare column from the row that holds MAX(timestamp)
+        value = 'sensor_value, MAX(timestamp)'
+    else:
+        value = {'mean': 'AVG', 'min': 'MIN', 'max': 'MAX'}[agg] + '(sensor_value)'
+    rows = db.query(f'''SELECT {bucket} AS bucket, sensor_type, {value}
+                        FROM sensor_data
+                        WHERE sensor_type IN ({placeholders}) AND timestamp >= ? AND timestamp <= ?
+                        GROUP BY bucket, sensor_type''',
+                    [*series, start, end])
+    return [(row[0], row[1], row[2]) for row in rows]
+
+
+def _raw_weather_rows(db, fields, start, end, seconds, agg):
+    bucket = _raw_bucket(seconds)
+    if agg == 'last':
+        columns = ', '.join(fields) + ', MAX(timestamp)'
+    else:
+        func = {'mean': 'AVG', 'min': 'MIN', 'max': 'MAX'}[agg]
+        columns = ', '.join(f'{func}({field})' for field in fields)
+    rows = db.query(f'''SELECT {bucket} AS bucket, {columns}
+                        FROM weather_history
+                        WHERE timestamp >= ? AND timestamp <= ?
+                        GROUP BY bucket''',
+                    (start, end))
+    return [(row[0], field, row[i + 1]) for row in rows for i, field in enumerate(fields)]
+
+
+def parse_history_range(start=None, end=None, default_days=7):
+    """Parse ISO date/datetime query args (UTC) into inclusive SQLite timestamp strings"""
+    def parse(value, name):
+        try:
+            return datetime.fromisoformat(value.strip().rstrip('Z').replace('T', ' '))
+        except ValueError:
+            raise ValueError(f'{name} must be an ISO date or datetime')
+
+    end_dt = parse(end, 'end') if end else datetime.utcnow()
+    if end and len(end.strip()) == 10:
+        end_dt += timedelta(days=1, seconds=-1)  # A bare end date covers the whole day
+    start_dt = parse(start, 'start') if start else end_dt - timedelta(days=default_days)
+    return start_dt.strftime('%Y-%m-%d %H:%M:%S'), end_dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def query_history(db, kind, series, start, end, resolution='hour', agg='mean'):
+    """Columnar series between start and end (inclusive 'YYYY-MM-DD HH:MM:SS' strings).
+
+    kind is 'soil' (series are sensor_data sensor_types) or 'weather'
+    (series are weather_history columns). Returns
+    {'timestamps': [...], 'series': {name: [...]}} with values aligned to
+    timestamps and None where a series has no reading in a bucket.
+    """
+    if resolution not in HISTORY_RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {', '.join(HISTORY_RESOLUTIONS)}")
+    if agg not in HISTORY_AGGREGATES:
+        raise ValueError(f"agg must be one of {', '.join(HISTORY_AGGREGATES)}")
+    if kind == 'weather' and any(field not in WEATHER_FIELDS for field in series):
+        raise ValueError(f"fields must be from {', '.join(WEATHER_FIELDS)}")
+    if end < start:
+        raise ValueError('end must not be before start')
+
+    seconds = HISTORY_RESOLUTIONS[resolution]
+    span = (_to_epoch(end) - _to_epoch(start)) // seconds + 1
+    if span > HISTORY_MAX_POINTS:
+        raise ValueError(f'{span} points requested, limit is {HISTORY_MAX_POINTS} - use a coarser resolution')
+
+    if resolution in RESOLUTIONS:
+        placeholders = ', '.join('?' for _ in series)
+        value = HISTORY_AGGREGATES[agg]
+        rows = db.query(f'''SELECT bucket, series, {value}
+                            FROM sensor_rollups
+                            WHERE resolution = ? AND series IN ({placeholders}) AND bucket >= ? AND bucket <= ?''',
+                        [resolution, *series, bucket_for(resolution, start), bucket_for(resolution, end)])
+        rows = [(row[0], row[1], row[2]) for row in rows]
+    elif kind == 'soil':
+        rows = _raw_soil_rows(db, series, start, end, seconds, agg)
+    else:
+        rows = _raw_weather_rows(db, series, start, end, seconds, agg)
+
+    timestamps = sorted({row[0] for row in rows})
+    index = {timestamp: i for i, timestamp in enumerate(timestamps)}
+    columns = {name: [None] * len(timestamps) for name in series}
+    for bucket, name, value in rows:
+        if name in columns and value is not None:
+            columns[name][index[bucket]] = round(value, 2)
+
+    return {'timestamps': timestamps, 'series': columns}
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Ingestion scheduler
+asyncio event loop running fixed-rate pipelines: one source fanned out to many sinks
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lawn_logging import structured
+from lawn_metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = REGISTRY.histogram('lawn_ingest_stage_seconds', 'Ingestion stage run time (source or sink)', ('stage',))
+
+
+class _Stage:
+    """A callable with its own timeout and counters"""
+    __slots__ = ('name', 'func', 'timeout', 'runs', 'failures', 'timeouts', 'last_duration')
+
+    def __init__(self, name, func, timeout):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.last_duration = None
+
+    def stats(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'last_duration_ms': None if self.last_duration is None else round(self.last_duration * 1000, 1)
+        }
+
+
+class _Budget:
+    """Token bucket shared by every pipeline calling the same API"""
+
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = None
+        self.waiting = 0
+        self.acquired = 0
+        self.max_wait = 0.0
+        self._lock = None
+
+    async def acquire(self):
+        """Wait for a token - waiters are served in arrival order"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None:
+            self._lock = asyncio.Lock()  # Created on the scheduler loop (3.9 binds locks to a loop)
+        started = loop.time()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill(loop.time())
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill(loop.time())
+                self.tokens -= 1
+        finally:
+            self.waiting -= 1
+        self.acquired += 1
+        self.max_wait = max(self.max_wait, loop.time() - started)
+
+    def _refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'burst': self.burst,
+            'queue_depth': self.waiting,
+            'acquired': self.acquired,
+            'max_wait_ms': round(self.max_wait * 1000, 1)
+        }
+
+
+class _Pipeline:
+    """source() every interval seconds; a non-None result goes to every sink concurrently"""
+
+    def __init__(self, name, source, sinks, interval, offset, jitter=0.0, budget=None,
+                 change_key=None, min_interval=None, max_interval=None):
+        self.name = name
+        self.source = source
+        self.sinks = sinks
+        self.base_interval = interval
+        self.interval = interval
+        self.offset = offset
+        self.jitter = jitter
+        self.budget = budget
+        self.change_key = change_key
+        self.min_interval = min_interval or interval
+        self.max_interval = max_interval or interval
+        self.ticks = 0
+        self.skipped = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.pushed = 0
+        self.covered = 0
+        self.last_push = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._last_key = None
+        self._push_task = None
+
+    def adapt(self, reading):
+        """Poll faster while readings move, back off while they repeat"""
+        try:
+            key = self.change_key(reading)
+        except Exception as e:
+            logger.error(f"❌ {self.name}: change key failed: {e}")
+            return
+        if self._last_key is not None:
+            if key == self._last_key:
+                self.unchanged += 1
+                self.interval = min(self.max_interval, self.interval * 1.5)
+            else:
+                self.changed += 1
+                self.interval = max(self.min_interval, self.interval / 2)
+        self._last_key = key
+
+
+class IngestionScheduler:
+    """Runs pipelines on a private asyncio loop in a background thread.
+
+    Each pipeline ticks at a fixed rate: tick n is due at start + offset +
+    n * interval, so a slow tick never pushes later ones back. A tick
+    that would start while the previous one is still running is skipped.
+    Stages are plain functions (run on a small thread pool, since
+    requests and sqlite3 block) or coroutine functions. Each stage has
+    its own timeout, so a hung Ecowitt call cannot hold up the sinks of
+    another pipeline. New stations or controllers add pipelines instead
+    of lengthening one loop.
+
+    Pipelines polling one API share a named budget (a token bucket of
+    requests per second) and add random jitter to each tick, so many
+    stations never fire together. With a change_key the interval adapts
+    between min_interval and max_interval: halved when the key changes,
+    stretched 1.5x while it repeats.
+
+    push() hands a reading that arrived by itself (an Ecowitt gateway
+    posting to us) straight to a pipeline's sinks. While pushes keep
+    arriving within the interval, the pipeline's polls are skipped.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._pipelines = []
+        self._budgets = {}
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._executor = None
+        self._start_lock = threading.Lock()
+
+    def add_budget(self, name, rate, burst=1):
+        """Shared requests-per-second limit for pipelines created with budget=name"""
+        self._budgets[name] = _Budget(name, rate, burst)
+        return self._budgets[name]
+
+    def add_pipeline(self, name, source, sinks, interval, source_timeout=30.0, sink_timeout=15.0, offset=0.0,
+                     jitter=0.0, budget=None, change_key=None, min_interval=None, max_interval=None):
+        """Register source -> sinks; sinks is a list of callables or (name, callable, timeout) tuples"""
+        stages = []
+        for sink in sinks:
+            if callable(sink):
+                sink = (getattr(sink, '__name__', 'sink'), sink, sink_timeout)
+            sink_name, func, timeout = sink
+            stages.append(_Stage(f'{name}.{sink_name}', func, timeout))
+        pipeline = _Pipeline(name, _Stage(f'{name}.source', source, source_timeout), stages, interval, offset,
+                             jitter=jitter, budget=self._budgets[budget] if budget else None,
+                             change_key=change_key, min_interval=min_interval, max_interval=max_interval)
+        self._pipelines.append(pipeline)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: self._loop.create_task(self._run_pipeline(pipeline)))
+        return pipeline
+
+    def push(self, name, reading):
+        """Run a pipeline's sinks on a pushed reading; False if the scheduler is not running"""
+        loop = self._loop
+        if loop is None:
+            return False
+        pipeline = next(p for p in self._pipelines if p.name == name)
+        loop.call_soon_threadsafe(self._accept_push, pipeline, reading)
+        return True
+
+    def start(self):
+        """Start the scheduler thread (idempotent)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                ready = threading.Event()
+                self._thread = threading.Thread(target=self._thread_main, args=(ready,),
+                                                name='ingestion-scheduler', daemon=True)
+                self._thread.start()
+                ready.wait(5)
+
+    def stop(self, timeout=10):
+        """Cancel every pipeline and stop the loop"""
+        loop = self._loop
+        if loop is not None and self._stop is not None:
+            loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Per-pipeline tick counts, lag and per-stage timings; budget queue depth"""
+        stats = {
+            pipeline.name: {
+                'interval': round(pipeline.interval, 1),
+                'base_interval': pipeline.base_interval,
+                'ticks': pipeline.ticks,
+                'skipped': pipeline.skipped,
+                'changed': pipeline.changed,
+                'unchanged': pipeline.unchanged,
+                'pushed': pipeline.pushed,
+                'polls_covered_by_push': pipeline.covered,
+                'lag_ms': round(pipeline.last_lag * 1000, 1),
+                'max_lag_ms': round(pipeline.max_lag * 1000, 1),
+                'stages': {stage.name: stage.stats() for stage in [pipeline.source] + pipeline.sinks}
+            }
+            for pipeline in list(self._pipelines)
+        }
+        if self._budgets:
+            stats['budgets'] = {name: budget.stats() for name, budget in self._budgets.items()}
+        return stats
+
+    def _thread_main(self, ready):
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ingest')
+        try:
+            asyncio.run(self._main(ready))
+        finally:
+            self._executor.shutdown(wait=False)
+            self._loop = None
+
+    async def _main(self, ready):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        tasks = [asyncio.create_task(self._run_pipeline(pipeline)) for pipeline in self._pipelines]
+        ready.set()
+        await self._stop.wait()
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_pipeline(self, pipeline):
+        loop = asyncio.get_running_loop()
+        due = loop.time() + pipeline.offset
+        running = None
+        while True:
+            # Jitter moves this tick only - slots stay on the fixed-rate grid
+            target = due + random.uniform(0.0, pipeline.jitter)
+            await asyncio.sleep(max(0.0, target - loop.time()))
+            if running is not None and not running.done():
+                pipeline.skipped += 1
+                logger.warning("⚠️ %s: previous tick still running - skipped", pipeline.name,
+                               extra=structured('ingest.overrun', pipeline=pipeline.name))
+            else:
+                running = asyncio.create_task(self._tick(pipeline, target))
+            pipeline.ticks += 1
+            # Fixed rate: the next tick is the first future slot, never "now + interval"
+            due += pipeline.interval
+            behind = loop.time() - due
+            if behind >= 0:
+                missed = int(behind // pipeline.interval) + 1
+                pipeline.skipped += missed
+                due += missed * pipeline.interval
+
+    def _accept_push(self, pipeline, reading):
+        pipeline.pushed += 1
+        pipeline.last_push = asyncio.get_running_loop().time()
+        if pipeline._push_task is not None and not pipeline._push_task.done():
+            return  # Sinks still busy with the previous push - the next one carries newer data anyway
+        pipeline._push_task = asyncio.ensure_future(self._fan_out(pipeline, reading))
+
+    async def _fan_out(self, pipeline, reading):
+        await asyncio.gather(*(self._call(sink, reading) for sink in pipeline.sinks))
+
+    async def _tick(self, pipeline, target):
+        loop = asyncio.get_running_loop()
+        if pipeline.last_push is not None and loop.time() - pipeline.last_push < pipeline.interval:
+            pipeline.covered += 1
+            return
+        if pipeline.budget is not None:
+            await pipeline.budget.acquire()
+        # Lag: how late the source starts - sleep overrun plus time queued for the budget
+        pipeline.last_lag = loop.time() - target
+        pipeline.max_lag = max(pipeline.max_lag, pipeline.last_lag)
+        reading = await self._call(pipeline.source)
+        if reading is None:
+            return
+        if pipeline.change_key is not None:
+            pipeline.adapt(reading)
+        await self._fan_out(pipeline, reading)
+
+    async def _call(self, stage, *args):
+        """Run one stage under its timeout; None on failure"""
+        started = time.perf_counter()
+        stage.runs += 1
+        try:
+            if asyncio.iscoroutinefunction(stage.func):
+                call = stage.func(*args)
+            else:
+                call = asyncio.get_running_loop().run_in_executor(self._executor, stage.func, *args)
+            return await asyncio.wait_for(call, stage.timeout)
+        except asyncio.TimeoutError:
+            stage.timeouts += 1
+            logger.error("❌ %s timed out after %ss", stage.name, stage.timeout,
+                         extra=structured('ingest.timeout', stage=stage.name))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stage.failures += 1
+            logger.error("❌ %s failed: %s", stage.name, e, extra=structured('ingest.failure', stage=stage.name))
+        finally:
+            stage.last_duration = time.perf_counter() - started
+            STAGE_SECONDS.observe(stage.last_duration, stage=stage.name)
+        return None
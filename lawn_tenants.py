@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Hughes Lawn AI - Property registry
+Per-lawn station credentials, zone map, controller endpoint and live state
+"""
+
+import json
+import logging
+import os
+import threading
+
+from lawn_ecowitt import EcowittParser, passkey_for
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROPERTY_ID = os.environ.get('DEFAULT_PROPERTY_ID', 'default')
+
+
+class UnknownProperty(KeyError):
+    """A route or command named a property this process does not serve"""
+
+
+class NoRainbird(LookupError):
+    """A RainBird command targeted a property without its own RainBird service"""
+
+
+def new_state():
+    """Live state for one lawn - the shape of the original global current_data"""
+    return {
+        'soil_moisture': {},
+        'weather': {},
+        'rainbird_status': 'online',
+        'rainbird_next_schedule': None,
+        'mow_confidence': 75,
+        'analysis': None,
+        'ai_analysis': '',
+        'calendar_events': {},
+        'forecast_data': []
+    }
+
+
+class Property:
+    """One lawn: Ecowitt station, soil zones, RainBird controller and live state"""
+
+    def __init__(self, property_id, name=None, ecowitt=None, zones=None, rainbird=None, location=None,
+                 hardiness_zone=None, state=None):
+        self.property_id = property_id
+        self.name = name or property_id
+        self.ecowitt = ecowitt or {}
+        self.zones = zones or {}
+        self.rainbird = rainbird or {}
+        self.location = location
+        self.hardiness_zone = hardiness_zone  # USDA zone sent to n8n, e.g. '7b'
+        self.state = state if state is not None else new_state()
+        # Ecowitt channel -> zone id, e.g. soil_ch14 -> front_yard
+        self.soil_channels = {zone['channel']: zone_id for zone_id, zone in self.zones.items() if zone.get('channel')}
+        self.parser = EcowittParser(self.soil_channels)
+
+    @property
+    def station_key(self):
+        """Cache key for this lawn's Ecowitt readings - properties sharing a station share the fetch"""
+        return self.ecowitt.get('params', {}).get('mac') or self.property_id
+
+    @property
+    def has_rainbird(self):
+        """Irrigation control is only on for lawns with their own RainBird service_url"""
+        return bool(self.rainbird.get('service_url'))
+
+    @property
+    def passkey(self):
+        """PASSKEY this lawn's gateway sends when pushing readings"""
+        mac = self.ecowitt.get('params', {}).get('mac')
+        return passkey_for(mac) if mac else None
+
+    def summary(self):
+        """Public description for /api/properties"""
+        return {
+            'id': self.property_id,
+            'name': self.name,
+            'location': self.location,
+            'zones': list(self.zones),
+            'station': self.ecowitt.get('params', {}).get('mac'),
+            'rainbird': self.has_rainbird,
+            'mow_confidence': self.state.get('mow_confidence'),
+            'has_data': bool(self.state.get('soil_moisture'))
+        }
+
+
+class PropertyRegistry:
+    """All lawns served by this process, looked up by property id"""
+
+    def __init__(self, default_id=DEFAULT_PROPERTY_ID):
+        self.default_id = default_id
+        self._properties = {}
+        self._lock = threading.Lock()
+
+    def register(self, prop):
+        with self._lock:
+            self._properties[prop.property_id] = prop
+        return prop
+
+    @property
+    def default(self):
+        return self._properties[self.default_id]
+
+    def get(self, property_id=None):
+        """Property by id; None means the default lawn"""
+        if property_id is None:
+            return self.default
+        try:
+            return self._properties[property_id]
+        except KeyError:
+            raise UnknownProperty(property_id) from None
+
+    def by_passkey(self, passkey):
+        """Property whose gateway pushed with this PASSKEY"""
+        passkey = (passkey or '').upper()
+        for prop in self:
+            if prop.passkey == passkey:
+                return prop
+        raise UnknownProperty(passkey)
+
+    def __iter__(self):
+        return iter(list(self._properties.values()))
+
+    def __len__(self):
+        return len(self._properties)
+
+    def load_file(self, path):
+        """Register the lawns listed in a JSON file.
+
+        Each entry needs an "id" and its Ecowitt keys; zones and location
+        are inherited from the default property when missing:
+
+            [{"id": "oak-st", "name": "Oak St", "location": "Cary, NC", "hardiness_zone": "8a",
+              "ecowitt": {"application_key": "...", "api_key": "...", "mac": "..."},
+              "rainbird": {"service_url": "http://10.0.4.2:3000"},
+              "zones": {...}}]
+
+        The RainBird service is never inherited - without a service_url,
+        irrigation control is off for that property. History, calendar,
+        logs and watering are only recorded for the default property.
+        """
+        if not path:
+            return []
+        with open(path) as f:
+            entries = json.load(f)
+
+        base = self.default
+        loaded = []
+        for entry in entries:
+            ecowitt = {
+                'url': base.ecowitt.get('url'),
+                'params': dict(base.ecowitt.get('params', {}), **entry.get('ecowitt', {}))
+            }
+            rainbird = dict(entry.get('rainbird', {}))
+            if not rainbird.get('service_url'):
+                logger.warning(f"⚠️ Property {entry['id']} has no rainbird.service_url - RainBird control disabled")
+            loaded.append(self.register(Property(
+                entry['id'],
+                name=entry.get('name'),
+                ecowitt=ecowitt,
+                zones=entry.get('zones', base.zones),
+                rainbird=rainbird,
+                location=entry.get('location', base.location),
+                hardiness_zone=entry.get('hardiness_zone')
+            )))
+        logger.info(f"✅ Loaded {len(loaded)} properties from {path}")
+        return loaded